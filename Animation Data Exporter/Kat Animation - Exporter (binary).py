@@ -14,61 +14,458 @@ bl_info = {
 }
 
 import bpy
+import os
+import sys
+import zlib
+import lzma
 import struct
+import hashlib
 import concurrent.futures
+import importlib.util
+import numpy as np
 
 from bpy_extras.io_utils import ExportHelper
-from bpy.props import StringProperty, BoolProperty, EnumProperty
+from bpy.props import StringProperty, BoolProperty, EnumProperty, IntProperty, FloatProperty
 from bpy.types import Operator
 
+# helpers shared by the kat exporters have one copy, Exporter Common/kat_export_common.py next
+# to this exporter's folder. an importable kat_export_common (e.g. in blender's scripts/modules)
+# is used as is, so is one another exporter already loaded.
+def load_common():
+    try:
+        import kat_export_common
+        return kat_export_common
+    except ImportError:
+        root   = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        spec   = importlib.util.spec_from_file_location("kat_export_common", os.path.join(root, "Exporter Common", "kat_export_common.py"))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules["kat_export_common"] = module
+        spec.loader.exec_module(module)
+        return module
+
+kat_export_common = load_common()
+from kat_export_common import (CHANNELS, simplify_keys, to_kat_keyframes, hash_fcurve, PROFILE_OPTIONS, ExportProfile,
+                               profiled, finish_profile, cache_fetch, cache_store, SectionRecorder, write_sections)
+
+# merged key times of the curves and a (keys, curves) array of their values,
+# a missing curve (not animated) is constant at its default.
+def sample_curves(curves, defaults):
+    keys = []
+    for curve in curves:
+        co = np.empty(2 * len(curve.keyframe_points) if curve else 0, dtype = np.float32)
+        if curve:
+            curve.keyframe_points.foreach_get('co', co)
+        keys.append(co.reshape(-1, 2))
+    
+    times  = np.unique(np.concatenate([co[:, 0] for co in keys]))
+    values = np.empty((len(times), len(curves)), dtype = np.float64)
+    for channel, (curve, co) in enumerate(zip(curves, keys)):
+        if curve is None:
+            values[:, channel] = defaults[channel]
+        elif len(co) == len(times) and np.array_equal(co[:, 0], times):
+            values[:, channel] = co[:, 1]
+        else:
+            # keyed frames are copied, the frames only other channels key are evaluated.
+            keyed   = np.searchsorted(times, co[:, 0])
+            missing = np.ones(len(times), dtype = bool)
+            missing[keyed] = False
+            values[keyed, channel]   = co[:, 1]
+            values[missing, channel] = [curve.evaluate(frame) for frame in times[missing].tolist()]
+    
+    return times, values
+
+# every curve evaluated at the given times.
+def evaluate_curves(curves, defaults, times):
+    frames = times.tolist()
+    values = np.empty((len(times), len(curves)), dtype = np.float64)
+    for channel, curve in enumerate(curves):
+        if curve is None:
+            values[:, channel] = defaults[channel]
+        else:
+            values[:, channel] = [curve.evaluate(frame) for frame in frames]
+    return values
+
+# merged key times of all channels and a (keys, 9) array of channel values.
+def extract_channels(obj):
+    fcurves = obj.animation_data.action.fcurves
+    curves  = [fcurves.find(data_path, index = index) for data_path, index in CHANNELS]
+    return sample_curves(curves, [getattr(obj, data_path)[index] for data_path, index in CHANNELS])
+
+# sample times at rate per second (0 = scene rate) over the action's range.
+def bake_times(action, scene, rate):
+    start, end = action.frame_range
+    step       = (scene.render.fps / scene.render.fps_base) / rate if rate else 1.0
+    
+    # evenly spaced, the last sample is at or past the end where the curves hold their value.
+    count = int(np.ceil((end - start) / step - 1e-6)) + 1
+    return start + step * np.arange(count)
+
+# samples every channel at the bake rate, then reduces the samples within the
+# position/rotation/scale tolerances.
+def bake_channels(obj, scene, rate, tolerances):
+    action = obj.animation_data.action
+    times  = bake_times(action, scene, rate)
+    curves = [action.fcurves.find(data_path, index = index) for data_path, index in CHANNELS]
+    values = evaluate_curves(curves, [getattr(obj, data_path)[index] for data_path, index in CHANNELS], times)
+    
+    keep = simplify_keys(times, values, np.repeat(tolerances, 3))
+    return times[keep], values[keep], len(times)
+
+# compact .kanim: magic header, quantized channels, see README.md.
+KANIM_COMPACT_MAGIC     = b"KANQ"
+KANIM_COMPACT_VERSION   = 1
+KANIM_CONSTANT_POSITION = 1 << 0
+KANIM_CONSTANT_SCALE    = 1 << 1
+KANIM_UNIFORM_TIMES     = 1 << 2
+
+SQRT1_2 = 0.7071067811865476
+
+# blender XYZ euler -> unit quaternion (x,y,z,w) in kat axes. kat (y,z,-x) is a
+# reflection of blender's axes, so the vector part is mapped and negated.
+def to_kat_quaternions(rotation):
+    cx, cy, cz = np.cos(rotation * 0.5).T
+    sx, sy, sz = np.sin(rotation * 0.5).T
+    w = cx*cy*cz + sx*sy*sz
+    x = sx*cy*cz - cx*sy*sz
+    y = cx*sy*cz + sx*cy*sz
+    z = cx*cy*sz - sx*sy*cz
+    return np.stack([-y, -z, x, w], axis = 1)
+
+# smallest three: 2 bits for the dropped largest component, 10 bits for each of the others.
+def pack_quaternions(quaternions):
+    rows    = np.arange(len(quaternions))
+    largest = np.argmax(np.abs(quaternions), axis = 1)
+    # q and -q are the same rotation, the dropped component is always positive.
+    quaternions = quaternions * np.where(quaternions[rows, largest] < 0, -1.0, 1.0)[:, None]
+    
+    others = np.ones(quaternions.shape, dtype = bool)
+    others[rows, largest] = False
+    rest = quaternions[others].reshape(-1, 3)
+    bits = np.clip(np.round((rest + SQRT1_2) * (1023 / (2 * SQRT1_2))), 0, 1023).astype(np.uint32)
+    return (largest.astype(np.uint32) << 30) | (bits[:, 0] << 20) | (bits[:, 1] << 10) | bits[:, 2]
+
+def unpack_quaternions(packed):
+    largest = (packed >> 30).astype(np.intp)
+    bits    = np.stack([(packed >> 20) & 1023, (packed >> 10) & 1023, packed & 1023], axis = 1)
+    rest    = bits * ((2 * SQRT1_2) / 1023) - SQRT1_2
+    
+    quaternions = np.empty((len(packed), 4), dtype = np.float64)
+    others = np.ones(quaternions.shape, dtype = bool)
+    others[np.arange(len(packed)), largest] = False
+    quaternions[others] = rest.ravel()
+    quaternions[np.arange(len(packed)), largest] = np.sqrt(np.maximum(0.0, 1.0 - np.sum(rest * rest, axis = 1)))
+    return quaternions
+
+# per-clip range quantization to 16 bits, value = minimum + q * step.
+def quantize_range(values):
+    minimum = values.min(axis = 0) if len(values) else np.zeros(3)
+    maximum = values.max(axis = 0) if len(values) else np.zeros(3)
+    step    = (maximum - minimum) / 65535
+    scaled  = (values - minimum) / np.where(step > 0, step, 1.0)
+    return np.round(scaled).astype('<u2'), minimum, step
+
+# index of the last keyframe at or before each whole frame, seeking is one lookup.
+def frame_time_index(times):
+    if len(times) == 0:
+        return 0, np.zeros(0, dtype = '<u2')
+    first  = int(np.floor(times[0]))
+    frames = first + np.arange(int(np.floor(times[-1])) - first + 1)
+    index  = np.searchsorted(times, frames, side = 'right') - 1
+    return first, np.maximum(index, 0).astype('<u2' if len(times) <= 65536 else '<u4')
+
+def write_compact_kanim(f, times, values, frames_per_sec, report = None):
+    keyframes   = to_kat_keyframes(times, values)
+    times       = keyframes[:, 0].astype('<f4')
+    quaternions = to_kat_quaternions(values[:, 3:6])
+    rotations   = pack_quaternions(quaternions).astype('<u4')
+    positions, position_min, position_step = quantize_range(keyframes[:, 1:4])
+    scales,    scale_min,    scale_step    = quantize_range(keyframes[:, 7:10])
+    
+    # evenly spaced keys (every bake) need neither times nor an index, key = (time - first) / step.
+    flags     = 0
+    time_step = (times[-1] - times[0]) / (len(times) - 1) if len(times) > 1 else 0.0
+    if len(times) < 2 or np.abs(times - (times[0] + time_step * np.arange(len(times)))).max() <= 1e-4:
+        flags |= KANIM_UNIFORM_TIMES
+        first_frame, time_index = 0, np.zeros(0, dtype = '<u2')
+    else:
+        time_step = 0.0
+        first_frame, time_index = frame_time_index(times)
+    
+    # constant channels are stored once, in the header.
+    if not np.any(position_step):
+        flags |= KANIM_CONSTANT_POSITION
+    if not np.any(scale_step):
+        flags |= KANIM_CONSTANT_SCALE
+    
+    first_time = times[0] if len(times) else 0.0
+    f.write(struct.pack('<4s4IiI14f', KANIM_COMPACT_MAGIC, KANIM_COMPACT_VERSION, len(times), frames_per_sec, flags,
+                        first_frame, len(time_index), first_time, time_step,
+                        *position_min, *position_step, *scale_min, *scale_step))
+    f.write(rotations.tobytes())
+    if not flags & KANIM_UNIFORM_TIMES:
+        f.write(times.tobytes())
+        f.write(time_index.tobytes())
+    if not flags & KANIM_CONSTANT_POSITION:
+        f.write(positions.tobytes())
+    if not flags & KANIM_CONSTANT_SCALE:
+        f.write(scales.tobytes())
+    
+    if report is not None and len(times):
+        decoded  = unpack_quaternions(rotations)
+        dot      = np.minimum(1.0, np.abs(np.sum(decoded * quaternions, axis = 1)))
+        position = np.abs(position_min + positions * position_step - keyframes[:, 1:4]).max()
+        scale    = np.abs(scale_min + scales * scale_step - keyframes[:, 7:10]).max()
+        report({'INFO'}, "Compact: %i bytes (%.1f:1), max error position %.6f rotation %.4f deg scale %.6f"
+                         % (f.tell(), (8 + 40 * len(times)) / f.tell(), position, np.degrees(2 * np.arccos(dot)).max(), scale))
+
+# skeletal .kanim: every pose bone of an armature, see README.md.
+KANIM_SKELETON_MAGIC   = b"KANS"
+KANIM_SKELETON_VERSION = 1
+
+# a pose bone's animated channels, the rotation ones follow its rotation mode.
+def bone_channels(pose_bone):
+    rotation = {'QUATERNION': ('rotation_quaternion', 4),
+                'AXIS_ANGLE': ('rotation_axis_angle', 4)}.get(pose_bone.rotation_mode, ('rotation_euler', 3))
+    return [(name, index) for name, size in (('location', 3), rotation, ('scale', 3)) for index in range(size)]
+
+def bone_data_path(pose_bone, name):
+    return 'pose.bones["%s"].%s' % (bpy.utils.escape_identifier(pose_bone.name), name)
+
+# parents before children, the runtime can build the pose in one pass.
+def ordered_pose_bones(obj):
+    def depth(bone):
+        return 0 if bone.parent is None else 1 + depth(bone.parent)
+    return sorted(obj.pose.bones, key = lambda pose_bone: depth(pose_bone.bone))
+
+# hamilton product of (n,4) w,x,y,z quaternions.
+def multiply_quaternions(a, b):
+    aw, ax, ay, az = a.T
+    bw, bx, by, bz = b.T
+    return np.stack([aw*bw - ax*bx - ay*by - az*bz,
+                     aw*bx + ax*bw + ay*bz - az*by,
+                     aw*by - ax*bz + ay*bw + az*bx,
+                     aw*bz + ax*by - ay*bx + az*bw], axis = 1)
+
+# the channel values of one rotation mode -> unit w,x,y,z quaternions.
+def bone_rotation_quaternions(mode, rotation):
+    if mode == 'QUATERNION':
+        quaternions = rotation
+    elif mode == 'AXIS_ANGLE':
+        axis   = rotation[:, 1:]
+        length = np.linalg.norm(axis, axis = 1, keepdims = True)
+        axis   = np.where(length > 0, axis / np.where(length > 0, length, 1.0), (0.0, 1.0, 0.0))
+        quaternions = np.concatenate([np.cos(rotation[:, :1] * 0.5), axis * np.sin(rotation[:, :1] * 0.5)], axis = 1)
+    else:
+        # eulers rotate about each axis in the order the mode names them.
+        quaternions = np.zeros((len(rotation), 4))
+        quaternions[:, 0] = 1.0
+        for axis in mode:
+            index = 'XYZ'.index(axis)
+            turn  = np.zeros((len(rotation), 4))
+            turn[:, 0]         = np.cos(rotation[:, index] * 0.5)
+            turn[:, 1 + index] = np.sin(rotation[:, index] * 0.5)
+            quaternions = multiply_quaternions(turn, quaternions)
+    length = np.linalg.norm(quaternions, axis = 1, keepdims = True)
+    return quaternions / np.where(length > 0, length, 1.0)
+
+# blender w,x,y,z -> kat x,y,z,w, the same mapping as to_kat_quaternions.
+def kat_quaternions(quaternions):
+    return np.stack([-quaternions[:, 2], -quaternions[:, 3], quaternions[:, 1], quaternions[:, 0]], axis = 1)
+
+# consecutive keys on the same hemisphere, so the runtime can lerp them.
+def continuous_quaternions(quaternions):
+    flips = np.sum(quaternions[1:] * quaternions[:-1], axis = 1) < 0
+    signs = np.cumprod(np.concatenate([[1.0], np.where(flips, -1.0, 1.0)]))
+    return quaternions * signs[:, None]
+
+# rest transform of each bone relative to its parent, in kat axes.
+def bone_rest_transforms(pose_bones):
+    rest = []
+    for pose_bone in pose_bones:
+        bone   = pose_bone.bone
+        matrix = bone.matrix_local if bone.parent is None else bone.parent.matrix_local.inverted() @ bone.matrix_local
+        location, rotation, scale = matrix.decompose()
+        rotation = kat_quaternions(np.array([[rotation.w, rotation.x, rotation.y, rotation.z]]))[0]
+        rest.append(((location.y, location.z, -location.x), tuple(rotation), (scale.y, scale.z, scale.x)))
+    return rest
+
+def write_skeleton_kanim(f, obj, scene, use_bake=False, bake_rate=0,
+                         position_tolerance=0.0001, rotation_tolerance=0.0001, scale_tolerance=0.0001, report=None,
+                         profile=None):
+    action     = obj.animation_data.action
+    pose_bones = ordered_pose_bones(obj)
+    
+    # fcurves are only read on this thread, blender data is not thread safe.
+    channels   = [bone_channels(pose_bone) for pose_bone in pose_bones]
+    curves     = []
+    defaults   = []
+    tolerances = []
+    for pose_bone, bone in zip(pose_bones, channels):
+        for name, index in bone:
+            curves.append(action.fcurves.find(bone_data_path(pose_bone, name), index = index))
+            defaults.append(getattr(pose_bone, name)[index])
+            # quaternion components move about half as much as the angle.
+            tolerances.append({'location': position_tolerance, 'scale': scale_tolerance,
+                               'rotation_euler': rotation_tolerance}.get(name, rotation_tolerance * 0.5))
+    
+    if use_bake:
+        with profiled(profile, "bake"):
+            times  = bake_times(action, scene, bake_rate)
+            values = evaluate_curves(curves, defaults, times)
+            keep   = simplify_keys(times, values, np.array(tolerances))
+        if report is not None:
+            report({'INFO'}, "Baked %i samples to %i keyframes (%.1f:1)" % (len(times), np.count_nonzero(keep), len(times) / max(np.count_nonzero(keep), 1)))
+        times, values = times[keep], values[keep]
+    else:
+        with profiled(profile, "extract"):
+            times, values = sample_curves(curves, defaults)
+    
+    # structure of arrays: each keyframe holds every bone's position, then rotation, then scale.
+    keyframe_count = len(times)
+    bone_count     = len(pose_bones)
+    positions = np.empty((keyframe_count, bone_count, 3), dtype = np.float64)
+    rotations = np.empty((keyframe_count, bone_count, 4), dtype = np.float64)
+    scales    = np.empty((keyframe_count, bone_count, 3), dtype = np.float64)
+    firsts    = np.cumsum([0] + [len(bone) for bone in channels])
+    
+    def convert_bone(index):
+        bone = values[:, firsts[index]:firsts[index + 1]]
+        positions[:, index] = bone[:, [1, 2, 0]] * (1, 1, -1)
+        rotations[:, index] = continuous_quaternions(kat_quaternions(
+            bone_rotation_quaternions(pose_bones[index].rotation_mode, bone[:, 3:-3])))
+        scales[:, index]    = bone[:, [-2, -1, -3]]
+    
+    # the per-bone numpy work runs in parallel, each bone fills its own columns.
+    with profiled(profile, "convert"), concurrent.futures.ThreadPoolExecutor() as pool:
+        list(pool.map(convert_bone, range(bone_count)))
+    
+    # offsets
+    header_size    = 8 * 4
+    bone_size      = 32 + 4 + (10 * 4) + 4
+    bones_offset   = header_size
+    times_offset   = bones_offset + (bone_count * bone_size)
+    tracks_offset  = (times_offset + (keyframe_count * 4) + 15) // 16 * 16
+    
+    parents = {pose_bone.name: index for index, pose_bone in enumerate(pose_bones)}
+    table   = bytearray(bone_count * bone_size)
+    for index, (pose_bone, (location, rotation, scale)) in enumerate(zip(pose_bones, bone_rest_transforms(pose_bones))):
+        parent = pose_bone.bone.parent
+        struct.pack_into('<32si10f4x', table, index * bone_size,
+                         pose_bone.name.encode('utf-8')[:32].ljust(32, b"\0"),
+                         -1 if parent is None else parents[parent.name],
+                         *location, *rotation, *scale)
+    
+    tracks = np.concatenate([positions.reshape(keyframe_count, -1), rotations.reshape(keyframe_count, -1),
+                             scales.reshape(keyframe_count, -1)], axis = 1)
+    
+    with profiled(profile, "write"):
+        f.write(struct.pack('<4s7I', KANIM_SKELETON_MAGIC, KANIM_SKELETON_VERSION, bone_count, keyframe_count,
+                            scene.render.fps, bones_offset, times_offset, tracks_offset))
+        f.write(table)
+        f.write(times.astype('<f4').tobytes())
+        f.write(bytes(tracks_offset - times_offset - (keyframe_count * 4)))
+        f.write(tracks.astype('<f4').tobytes())
+    
+    if profile is not None:
+        profile.count("bones",     bone_count)
+        profile.count("channels",  len(curves))
+        profile.count("keyframes", keyframe_count)
+    
+    if report is not None:
+        report({'INFO'}, "Skeleton: %i bones, %i keyframes" % (bone_count, keyframe_count))
+
+# write one object's clip in .kanim layout.
+def write_kanim(f, obj, scene, use_bake=False, bake_rate=0,
+                position_tolerance=0.0001, rotation_tolerance=0.0001, scale_tolerance=0.0001,
+                use_compact=False, report=None, profile=None):
+    if obj.type == 'ARMATURE':
+        if use_compact and report is not None:
+            report({'WARNING'}, "Compact is not available for armatures, the bone tracks are written as floats")
+        write_skeleton_kanim(f, obj, scene, use_bake, bake_rate,
+                             position_tolerance, rotation_tolerance, scale_tolerance, report, profile)
+        return
+    
+    if use_bake:
+        tolerances = (position_tolerance, rotation_tolerance, scale_tolerance)
+        with profiled(profile, "bake"):
+            times, values, samples = bake_channels(obj, scene, bake_rate, tolerances)
+        if report is not None:
+            report({'INFO'}, "Baked %i samples to %i keyframes (%.1f:1)" % (samples, len(times), samples / max(len(times), 1)))
+    else:
+        with profiled(profile, "extract"):
+            times, values = extract_channels(obj)
+    
+    frame_count = len(times)
+    frames_per_sec =  scene.render.fps
+    if profile is not None:
+        profile.count("keyframes", frame_count)
+    if use_compact:
+        with profiled(profile, "compact"):
+            write_compact_kanim(f, times, values, frames_per_sec, report)
+        return
+    
+    header = struct.pack('<2I', frame_count, frames_per_sec)
+    
+    # 10 floats per keyframe: time, position, rotation, scale.
+    with profiled(profile, "encode"):
+        keyframes = to_kat_keyframes(times, values)
+    
+    with profiled(profile, "write"):
+        f.write(header)
+        f.write(keyframes.astype('<f4').tobytes())
+
 # write .kanim data to disk
-def write_kanim_data(context, filepath):
-    f = open(filepath, "wb")
+def write_kanim_data(context, filepath, use_bake=False, bake_rate=0,
+                     position_tolerance=0.0001, rotation_tolerance=0.0001, scale_tolerance=0.0001,
+                     use_compact=False, compression='NONE', section_filter='SHUFFLE',
+                     use_profile=False, profile_log="", report=None):
+    profile = ExportProfile("kanim-binary") if use_profile or profile_log else None
+    f = open(filepath, "wb") if compression == 'NONE' else SectionRecorder()
     
     selected = bpy.context.selected_objects[0]
-    curves = selected.animation_data.action.fcurves
- 
-    frame_count = len(curves[0].keyframe_points)
-    frames_per_sec =  bpy.context.scene.render.fps
-    f.write(frame_count.to_bytes(4, byteorder = 'little'))
-    f.write(frames_per_sec.to_bytes(4, byteorder = 'little'))
-              
-    frame = 0
-    while frame < frame_count:
-        frame_time = curves[0].keyframe_points[frame].co.x
-        f.write(struct.pack('f', frame_time))
-
-        # position
-        f.write(struct.pack('f',  curves[1].keyframe_points[frame].co.y))
-        f.write(struct.pack('f',  curves[2].keyframe_points[frame].co.y))
-        f.write(struct.pack('f', -curves[0].keyframe_points[frame].co.y))
-
-        # rotation
-        rotation_x = curves[3].keyframe_points[frame].co.y
-        rotation_y = curves[3+1].keyframe_points[frame].co.y
-        rotation_z = curves[3+2].keyframe_points[frame].co.y
-        
-        if(rotation_x < 0): rotation_x = -rotation_x
-        else:          rotation_x = (2*3.14159) - rotation_x    
-        if(rotation_y < 0): rotation_y = -rotation_y
-        else:          rotation_y = (2*3.14159) - rotation_y
-        if(rotation_z < 0): rotation_z = -rotation_z
-        else:          rotation_z = (2*3.14159) - rotation_z
-        
-        f.write(struct.pack('f', rotation_y))
-        f.write(struct.pack('f', rotation_z))
-        f.write(struct.pack('f', rotation_x))
-
-        # scale
-        f.write(struct.pack('f', curves[6+1].keyframe_points[frame].co.y))
-        f.write(struct.pack('f', curves[6+2].keyframe_points[frame].co.y))
-        f.write(struct.pack('f', curves[6].keyframe_points[frame].co.y))
-                                       
-        frame = frame + 1
+    write_kanim(f, selected, bpy.context.scene, use_bake, bake_rate,
+                position_tolerance, rotation_tolerance, scale_tolerance, use_compact, report, profile)
     
+    # the clip is encoded in memory, then written as compressed sections.
+    if compression != 'NONE':
+        with profiled(profile, "compress"), open(filepath, "wb") as packed:
+            size, packed_size = write_sections(packed, f.getbuffer(), f.starts, compression, section_filter)
+        if report is not None:
+            report({'INFO'}, "Compressed %i bytes to %i (%.1f:1) with %s"
+                             % (size, packed_size, size / max(packed_size, 1), compression.lower()))
     f.close()
+    finish_profile(profile, filepath, profile_log, report)
     return {'FINISHED'}
 
+# hash everything the export reads: keyframes, fps and the export options.
+def hash_anim_inputs(context, keywords):
+    digest = hashlib.blake2b(digest_size = 20)
+    for path in (__file__, kat_export_common.__file__):
+        with open(path, 'rb') as source:
+            digest.update(source.read())
+    digest.update(repr(sorted(item for item in keywords.items() if item[0] not in PROFILE_OPTIONS)).encode('utf-8'))
+    digest.update(struct.pack('<id', context.scene.render.fps, context.scene.render.fps_base))
+    
+    selected = context.selected_objects[0]
+    # baked and partly keyed channels are evaluated, not just read from the keys.
+    for curve in selected.animation_data.action.fcurves:
+        hash_fcurve(digest, curve)
+    
+    # bone tracks also depend on the rest pose, the rotation modes and the unkeyed channels.
+    if selected.type == 'ARMATURE':
+        for pose_bone in selected.pose.bones:
+            digest.update(('%s %s' % (pose_bone.name, pose_bone.rotation_mode)).encode('utf-8'))
+            values = [value for row in pose_bone.bone.matrix_local for value in row]
+            values = values + list(pose_bone.location) + list(pose_bone.rotation_quaternion) + list(pose_bone.rotation_euler)
+            values = values + list(pose_bone.rotation_axis_angle) + list(pose_bone.scale)
+            digest.update(np.array(values, dtype = np.float64).tobytes())
+    else:
+        # channels without an fcurve fall back to the object's own transform.
+        values = list(selected.location) + list(selected.rotation_euler) + list(selected.scale)
+        digest.update(np.array(values, dtype = np.float64).tobytes())
+    
+    return digest.hexdigest()
+
 
 class ExportAnimData(Operator, ExportHelper):
     """Export animation data in Kat Animation format [binary] (.kanim)"""
@@ -83,8 +480,106 @@ class ExportAnimData(Operator, ExportHelper):
         maxlen=255,  # Max internal buffer length, longer would be clamped.
         )
     
+    use_bake: BoolProperty(
+        name="Bake",
+        description="Sample the action at a fixed rate and keep only the keyframes needed within the tolerances",
+        default=False,
+        )
+    
+    bake_rate: IntProperty(
+        name="Bake Rate",
+        description="Samples per second, 0 uses the scene frame rate",
+        default=0,
+        min=0,
+        )
+    
+    position_tolerance: FloatProperty(
+        name="Position Tolerance",
+        description="Largest position error a dropped keyframe may introduce",
+        default=0.0001,
+        min=0.0,
+        precision=5,
+        )
+    
+    rotation_tolerance: FloatProperty(
+        name="Rotation Tolerance",
+        description="Largest rotation error a dropped keyframe may introduce",
+        default=0.0001,
+        min=0.0,
+        precision=5,
+        subtype='ANGLE',
+        )
+    
+    scale_tolerance: FloatProperty(
+        name="Scale Tolerance",
+        description="Largest scale error a dropped keyframe may introduce",
+        default=0.0001,
+        min=0.0,
+        precision=5,
+        )
+    
+    use_compact: BoolProperty(
+        name="Compact",
+        description="Quantized keyframes: smallest-three quaternion rotation, 16-bit position and scale, constant channels stored once",
+        default=False,
+        )
+    
+    compression: EnumProperty(
+        name="Compression",
+        description="Compress each section of the file on its own so readers can decompress them in parallel",
+        items=(('NONE', "None", "Raw .kanim"),
+               ('ZLIB', "zlib", "Fast to decompress"),
+               ('LZMA', "lzma", "Smaller, slower to compress and decompress")),
+        default='NONE',
+        )
+    
+    section_filter: EnumProperty(
+        name="Filter",
+        description="Rearrange each section's bytes before compressing it",
+        items=(('NONE',    "None",    "Compress the bytes as they are"),
+               ('SHUFFLE', "Shuffle", "Group the n-th byte of every 32-bit value"),
+               ('DELTA',   "Delta",   "Store each 32-bit value minus the previous one, then shuffle")),
+        default='SHUFFLE',
+        )
+    
+    use_profile: BoolProperty(
+        name="Profile",
+        description="Report the time of each export phase, element counts, bytes written and peak memory",
+        default=False,
+        )
+    
+    profile_log: StringProperty(
+        name="Profile Log",
+        description="Append the profile to this file, one row per phase and counter for .csv, one json object per line otherwise",
+        default="",
+        subtype='FILE_PATH',
+        )
+    
+    use_cache: BoolProperty(
+        name="Cache",
+        description="Reuse the previous export when the exported inputs have not changed",
+        default=False,
+        )
+    
+    cache_size: IntProperty(
+        name="Cache Size (MB)",
+        description="Size of the export cache, least recently used exports are evicted first",
+        default=1024,
+        min=1,
+        )
+    
     def execute(self, context):
-        return write_kanim_data(context, self.filepath)
+        keywords = self.as_keywords(ignore=("filepath", "filter_glob", "check_existing", "use_cache", "cache_size"))
+        if not self.use_cache:
+            return write_kanim_data(context, self.filepath, report=self.report, **keywords)
+        
+        key = hash_anim_inputs(context, keywords)
+        if cache_fetch(key, self.filepath, self.filename_ext):
+            self.report({'INFO'}, "Inputs unchanged, reused the cached export")
+            return {'FINISHED'}
+        result = write_kanim_data(context, self.filepath, report=self.report, **keywords)
+        cache_store(key, self.filepath, self.filename_ext, self.cache_size * 1024 * 1024)
+        return result
 
 # Only needed if you want to add into a dynamic menu
 def menu_func_export(self, context):
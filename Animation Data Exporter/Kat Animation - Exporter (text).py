@@ -14,56 +14,155 @@ bl_info = {
 }
 
 import bpy
+import os
+import sys
+import struct
+import hashlib
+import importlib.util
+import numpy as np
+
 from bpy_extras.io_utils import ExportHelper
-from bpy.props import StringProperty, BoolProperty, EnumProperty
+from bpy.props import StringProperty, BoolProperty, EnumProperty, IntProperty, FloatProperty
 from bpy.types import Operator
 
+# helpers shared by the kat exporters have one copy, Exporter Common/kat_export_common.py next
+# to this exporter's folder. an importable kat_export_common (e.g. in blender's scripts/modules)
+# is used as is, so is one another exporter already loaded.
+def load_common():
+    try:
+        import kat_export_common
+        return kat_export_common
+    except ImportError:
+        root   = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        spec   = importlib.util.spec_from_file_location("kat_export_common", os.path.join(root, "Exporter Common", "kat_export_common.py"))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules["kat_export_common"] = module
+        spec.loader.exec_module(module)
+        return module
+
+kat_export_common = load_common()
+from kat_export_common import (CHANNELS, simplify_keys, to_kat_keyframes, hash_fcurve, PROFILE_OPTIONS, ExportProfile,
+                               profiled, finish_profile, cache_fetch, cache_store)
+
+# merged key times of all channels and a (keys, 9) array of channel values.
+def extract_channels(obj):
+    fcurves = obj.animation_data.action.fcurves
+    curves  = [fcurves.find(data_path, index = index) for data_path, index in CHANNELS]
+    
+    keys = []
+    for curve in curves:
+        co = np.empty(2 * len(curve.keyframe_points) if curve else 0, dtype = np.float32)
+        if curve:
+            curve.keyframe_points.foreach_get('co', co)
+        keys.append(co.reshape(-1, 2))
+    
+    times  = np.unique(np.concatenate([co[:, 0] for co in keys]))
+    values = np.empty((len(times), len(CHANNELS)), dtype = np.float64)
+    for channel, (curve, co) in enumerate(zip(curves, keys)):
+        if curve is None:
+            # not animated, constant at the object's value.
+            data_path, index = CHANNELS[channel]
+            values[:, channel] = getattr(obj, data_path)[index]
+        elif len(co) == len(times) and np.array_equal(co[:, 0], times):
+            values[:, channel] = co[:, 1]
+        else:
+            # keyed frames are copied, the frames only other channels key are evaluated.
+            keyed   = np.searchsorted(times, co[:, 0])
+            missing = np.ones(len(times), dtype = bool)
+            missing[keyed] = False
+            values[keyed, channel]   = co[:, 1]
+            values[missing, channel] = [curve.evaluate(frame) for frame in times[missing].tolist()]
+    
+    return times, values
+
+# samples every channel at rate per second (0 = scene rate) over the action's range,
+# then reduces the samples within the position/rotation/scale tolerances.
+def bake_channels(obj, scene, rate, tolerances):
+    action     = obj.animation_data.action
+    start, end = action.frame_range
+    step       = (scene.render.fps / scene.render.fps_base) / rate if rate else 1.0
+    
+    # evenly spaced, the last sample is at or past the end where the curves hold their value.
+    count = int(np.ceil((end - start) / step - 1e-6)) + 1
+    times = start + step * np.arange(count)
+    
+    frames = times.tolist()
+    values = np.empty((len(times), len(CHANNELS)), dtype = np.float64)
+    for channel, (data_path, index) in enumerate(CHANNELS):
+        curve = action.fcurves.find(data_path, index = index)
+        if curve is None:
+            values[:, channel] = getattr(obj, data_path)[index]
+        else:
+            values[:, channel] = [curve.evaluate(frame) for frame in frames]
+    
+    keep = simplify_keys(times, values, np.repeat(tolerances, 3))
+    return times[keep], values[keep], len(times)
+
 # write .kanim data to disk
-def write_kanim_data(context, filepath):
+def write_kanim_data(context, filepath, use_bake=False, bake_rate=0,
+                     position_tolerance=0.0001, rotation_tolerance=0.0001, scale_tolerance=0.0001,
+                     use_profile=False, profile_log="", report=None):
+    profile = ExportProfile("kanim-text") if use_profile or profile_log else None
     f = open(filepath, "w", encoding='utf-8')
     
     selected = bpy.context.selected_objects[0]
-    curves = selected.animation_data.action.fcurves
+    if use_bake:
+        tolerances = (position_tolerance, rotation_tolerance, scale_tolerance)
+        with profiled(profile, "bake"):
+            times, values, samples = bake_channels(selected, bpy.context.scene, bake_rate, tolerances)
+        if report is not None:
+            report({'INFO'}, "Baked %i samples to %i keyframes (%.1f:1)" % (samples, len(times), samples / max(len(times), 1)))
+    else:
+        with profiled(profile, "extract"):
+            times, values = extract_channels(selected)
     
-    frame_count = len(curves[0].keyframe_points)
+    frame_count = len(times)
     frames_per_sec = bpy.context.scene.render.fps
+    if profile is not None:
+        profile.count("keyframes", frame_count)
     f.write('keyframes [%i]\n' % frame_count)
     f.write('frames per sec [%i]\n\n' % frames_per_sec)
     
-    frame = 0
-    while frame < frame_count:
-        frame_index = curves[0].keyframe_points[frame].co.x
-        f.write('frame [%i]\n' % frame_index)
-        
-        # position
-        f.write('[%s] %f, %f, %f\n' % (curves[0].data_path, 
-                                       curves[1].keyframe_points[frame].co.y,
-                                       curves[2].keyframe_points[frame].co.y,
-                                      -curves[0].keyframe_points[frame].co.y))                         
-        # rotation
-        rotation_x = curves[3].keyframe_points[frame].co.y
-        rotation_y = curves[3+1].keyframe_points[frame].co.y
-        rotation_z = curves[3+2].keyframe_points[frame].co.y
-        
-        if(rotation_x < 0): rotation_x = -rotation_x
-        else:          rotation_x = (2*3.14159) - rotation_x    
-        if(rotation_y < 0): rotation_y = -rotation_y
-        else:          rotation_y = (2*3.14159) - rotation_y
-        if(rotation_z < 0): rotation_z = -rotation_z
-        else:          rotation_z = (2*3.14159) - rotation_z
-        f.write('[%s] %f, %f, %f\n' % (curves[3].data_path, rotation_y, rotation_z, rotation_x))                      
-        
-        # scale
-        f.write('[%s] %f, %f, %f\n' % (curves[6].data_path, 
-                                       curves[6+1].keyframe_points[frame].co.y,
-                                       curves[6+2].keyframe_points[frame].co.y,
-                                       curves[6].keyframe_points[frame].co.y)) 
-        frame = frame + 1
-        
+    # baked keys can fall between frames.
+    frame    = 'frame [%i]\n' if np.array_equal(times, np.floor(times)) else 'frame [%f]\n'
+    keyframe = (frame +
+                '[location] %f, %f, %f\n'
+                '[rotation_euler] %f, %f, %f\n'
+                '[scale] %f, %f, %f\n')
+    
+    # formatted in blocks to bound the size of each write.
+    with profiled(profile, "encode"):
+        keyframes = to_kat_keyframes(times, values).tolist()
+    with profiled(profile, "write"):
+        for start in range(0, frame_count, 4096):
+            f.write(''.join([keyframe % tuple(row) for row in keyframes[start:start + 4096]]))
+    
     f.close()
+    finish_profile(profile, filepath, profile_log, report)
     return {'FINISHED'}
 
 
+# hash everything the export reads: keyframes, fps and the export options.
+def hash_anim_inputs(context, keywords):
+    digest = hashlib.blake2b(digest_size = 20)
+    for path in (__file__, kat_export_common.__file__):
+        with open(path, 'rb') as source:
+            digest.update(source.read())
+    digest.update(repr(sorted(item for item in keywords.items() if item[0] not in PROFILE_OPTIONS)).encode('utf-8'))
+    digest.update(struct.pack('<id', context.scene.render.fps, context.scene.render.fps_base))
+    
+    selected = context.selected_objects[0]
+    # baked and partly keyed channels are evaluated, not just read from the keys.
+    for curve in selected.animation_data.action.fcurves:
+        hash_fcurve(digest, curve)
+    
+    # channels without an fcurve fall back to the object's own transform.
+    values = list(selected.location) + list(selected.rotation_euler) + list(selected.scale)
+    digest.update(np.array(values, dtype = np.float64).tobytes())
+    
+    return digest.hexdigest()
+
+
 class ExportAnimData(Operator, ExportHelper):
     """Export animation data in Kat Animation format [text] (.kanim)"""
     bl_idname = "export_kanim.anim_data_text"  # Important since its how bpy.ops.import_test.some_data is constructed.
@@ -77,8 +176,82 @@ class ExportAnimData(Operator, ExportHelper):
         maxlen=255,  # Max internal buffer length, longer would be clamped.
     )
     
+    use_bake: BoolProperty(
+        name="Bake",
+        description="Sample the action at a fixed rate and keep only the keyframes needed within the tolerances",
+        default=False,
+        )
+    
+    bake_rate: IntProperty(
+        name="Bake Rate",
+        description="Samples per second, 0 uses the scene frame rate",
+        default=0,
+        min=0,
+        )
+    
+    position_tolerance: FloatProperty(
+        name="Position Tolerance",
+        description="Largest position error a dropped keyframe may introduce",
+        default=0.0001,
+        min=0.0,
+        precision=5,
+        )
+    
+    rotation_tolerance: FloatProperty(
+        name="Rotation Tolerance",
+        description="Largest rotation error a dropped keyframe may introduce",
+        default=0.0001,
+        min=0.0,
+        precision=5,
+        subtype='ANGLE',
+        )
+    
+    scale_tolerance: FloatProperty(
+        name="Scale Tolerance",
+        description="Largest scale error a dropped keyframe may introduce",
+        default=0.0001,
+        min=0.0,
+        precision=5,
+        )
+    
+    use_profile: BoolProperty(
+        name="Profile",
+        description="Report the time of each export phase, element counts, bytes written and peak memory",
+        default=False,
+        )
+    
+    profile_log: StringProperty(
+        name="Profile Log",
+        description="Append the profile to this file, one row per phase and counter for .csv, one json object per line otherwise",
+        default="",
+        subtype='FILE_PATH',
+        )
+    
+    use_cache: BoolProperty(
+        name="Cache",
+        description="Reuse the previous export when the exported inputs have not changed",
+        default=False,
+        )
+    
+    cache_size: IntProperty(
+        name="Cache Size (MB)",
+        description="Size of the export cache, least recently used exports are evicted first",
+        default=1024,
+        min=1,
+        )
+    
     def execute(self, context):
-        return write_kanim_data(context, self.filepath)
+        keywords = self.as_keywords(ignore=("filepath", "filter_glob", "check_existing", "use_cache", "cache_size"))
+        if not self.use_cache:
+            return write_kanim_data(context, self.filepath, report=self.report, **keywords)
+        
+        key = hash_anim_inputs(context, keywords)
+        if cache_fetch(key, self.filepath, self.filename_ext):
+            self.report({'INFO'}, "Inputs unchanged, reused the cached export")
+            return {'FINISHED'}
+        result = write_kanim_data(context, self.filepath, report=self.report, **keywords)
+        cache_store(key, self.filepath, self.filename_ext, self.cache_size * 1024 * 1024)
+        return result
 
 
 # Only needed if you want to add into a dynamic menu
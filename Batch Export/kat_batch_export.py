@@ -0,0 +1,246 @@
+# ========================================================================
+# Headless batch export for the Kat Mesh / Kat Animation exporters.
+#
+# driver (any python 3):
+#   python kat_batch_export.py "assets/**/*.blend" -o build/ -f kmesh-binary kanim-binary -j 8
+#   python kat_batch_export.py --manifest manifest.json --report timings.json
+#
+# each .blend is exported by its own background blender process:
+#   blender -b file.blend -P kat_batch_export.py -- --worker ...
+#
+# manifest: a json list of {"blend": path, "output": dir, "formats": [...], "objects": [...]}
+# "output", "formats" and "objects" are optional and fall back to the command line.
+# ========================================================================
+
+import os
+import sys
+import json
+import glob
+import time
+import argparse
+import subprocess
+import importlib.util
+import concurrent.futures
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# format -> (exporter script, extension, writer function)
+EXPORTERS = {
+    "kmesh-binary":  ("Mesh Data Exporter/Kat Mesh - Exporter (binary).py",           ".kmesh", "write"),
+    "kmesh-text":    ("Mesh Data Exporter/Kat Mesh - Exporter (text).py",             ".kmesh", "write"),
+    "kanim-binary":  ("Animation Data Exporter/Kat Animation - Exporter (binary).py", ".kanim", "write_kanim_data"),
+    "kanim-text":    ("Animation Data Exporter/Kat Animation - Exporter (text).py",   ".kanim", "write_kanim_data"),
+    "kanim-compact": ("Animation Data Exporter/Kat Animation - Exporter (binary).py", ".kanim", "write_kanim_data"),
+    "kpack-binary":  ("Pack Exporter/Kat Pack - Exporter.py",                         ".kpack", "write_pack"),
+}
+
+RESULT_MARKER = "KAT_BATCH_RESULT "
+
+# ------------------------------------------------------------------------
+# worker: runs inside blender with the .blend already open.
+# ------------------------------------------------------------------------
+
+def load_exporter(script, addons):
+    path   = os.path.join(addons, script)
+    name   = "kat_" + os.path.splitext(os.path.basename(path))[0].replace(" ", "_").replace("(", "").replace(")", "").replace("-", "")
+    spec   = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def select_only(context, objects):
+    for obj in context.view_layer.objects:
+        obj.select_set(obj in objects)
+    context.view_layer.objects.active = objects[0]
+
+def export_blend(blend, output, formats, object_names = None, addons = ROOT, use_join = False, cache_size = 0,
+                 profile_log = ""):
+    import bpy
+
+    context = bpy.context
+    stem    = os.path.splitext(os.path.basename(blend))[0]
+    objects = [obj for obj in context.view_layer.objects if not object_names or obj.name in object_names]
+    os.makedirs(output, exist_ok = True)
+
+    exports = []
+    for kind in formats:
+        script, extension, writer = EXPORTERS[kind]
+        exporter = load_exporter(script, addons)
+        write    = getattr(exporter, writer)
+
+        if kind.startswith("kmesh"):
+            # one joined mesh per .blend.
+            jobs = [(stem, [obj for obj in objects if obj.type == 'MESH'])]
+        elif kind.startswith("kpack"):
+            # one archive per .blend, every mesh and clip is its own entry.
+            jobs = [(stem, [obj for obj in objects if obj.type == 'MESH' or
+                            (obj.animation_data is not None and obj.animation_data.action is not None)])]
+        else:
+            # one clip per animated object.
+            jobs = [(stem + "." + obj.name, [obj]) for obj in objects
+                    if obj.animation_data is not None and obj.animation_data.action is not None]
+
+        for name, selection in jobs:
+            if not selection:
+                continue
+            # named like the samples: Test[binary].kmesh, Test[text].kmesh, Test.Cube[compact].kanim
+            filepath = os.path.join(output, "%s[%s]%s" % (name, kind.split("-")[1], extension))
+            select_only(context, selection)
+
+            keywords = {}
+            if kind.startswith("kmesh"):
+                keywords = {"use_evaluated": not use_join}
+            elif kind == "kanim-compact":
+                keywords = {"use_compact": True}
+            if profile_log and not kind.startswith("kpack"):
+                # every worker appends to the same log, see the exporters' "Profile Log" option.
+                keywords["profile_log"] = os.path.abspath(profile_log)
+
+            start    = time.perf_counter()
+            cached   = False
+            if cache_size and not kind.startswith("kpack"):
+                # unchanged inputs reuse the previous export, see the exporters' "Cache" option.
+                key    = exporter.hash_mesh_inputs(context, keywords) if kind.startswith("kmesh") else exporter.hash_anim_inputs(context, keywords)
+                cached = exporter.cache_fetch(key, filepath, extension)
+            if not cached:
+                write(context, filepath, **keywords)
+                if cache_size and not kind.startswith("kpack"):
+                    exporter.cache_store(key, filepath, extension, cache_size * 1024 * 1024)
+            exports.append({
+                "format":  kind,
+                "output":  filepath,
+                "objects": [obj.name for obj in selection],
+                "seconds": time.perf_counter() - start,
+                "bytes":   os.path.getsize(filepath),
+                "cached":  cached,
+            })
+    return exports
+
+def worker_main(argv):
+    parser = argparse.ArgumentParser(prog = "kat_batch_export.py -- --worker")
+    parser.add_argument("--worker",  action = "store_true")
+    parser.add_argument("--blend",   required = True)
+    parser.add_argument("--output",  required = True)
+    parser.add_argument("--formats", nargs = "+", required = True)
+    parser.add_argument("--objects", nargs = "*", default = None)
+    parser.add_argument("--addons",  default = ROOT)
+    parser.add_argument("--join",    action = "store_true")
+    parser.add_argument("--cache-size", type = int, default = 0)
+    parser.add_argument("--profile-log", default = "")
+    args = parser.parse_args(argv)
+
+    exports = export_blend(args.blend, args.output, args.formats, args.objects, args.addons, args.join, args.cache_size,
+                           args.profile_log)
+    sys.stdout.write(RESULT_MARKER + json.dumps(exports) + "\n")
+    sys.stdout.flush()
+
+# ------------------------------------------------------------------------
+# driver: fans the .blend files out across background blender processes.
+# ------------------------------------------------------------------------
+
+def read_jobs(args):
+    jobs = []
+    if args.manifest:
+        base = os.path.dirname(os.path.abspath(args.manifest))
+        with open(args.manifest, encoding = 'utf-8') as f:
+            for entry in json.load(f):
+                jobs.append({
+                    "blend":   os.path.join(base, entry["blend"]),
+                    "output":  os.path.join(base, entry["output"]) if "output" in entry else args.output,
+                    "formats": entry.get("formats", args.formats),
+                    "objects": entry.get("objects", args.objects),
+                })
+    for pattern in args.blends:
+        for blend in sorted(glob.glob(pattern, recursive = True)):
+            jobs.append({"blend": blend, "output": args.output, "formats": args.formats, "objects": args.objects})
+    return jobs
+
+def run_job(job, args):
+    command = [args.blender, "--factory-startup", "-b", job["blend"], "-P", os.path.abspath(__file__), "--",
+               "--worker", "--blend", job["blend"], "--output", job["output"], "--addons", args.addons,
+               "--formats"] + list(job["formats"])
+    if job["objects"]:
+        command += ["--objects"] + list(job["objects"])
+    if args.join:
+        command += ["--join"]
+    if args.cache_size:
+        command += ["--cache-size", str(args.cache_size)]
+    if args.profile_log:
+        command += ["--profile-log", os.path.abspath(args.profile_log)]
+
+    start = time.perf_counter()
+    try:
+        process = subprocess.run(command, stdout = subprocess.PIPE, stderr = subprocess.PIPE,
+                                 universal_newlines = True, timeout = args.timeout)
+        returncode, stdout, stderr = process.returncode, process.stdout, process.stderr
+    except subprocess.TimeoutExpired as error:
+        returncode, stdout, stderr = None, error.stdout or "", "timed out after %is" % args.timeout
+    elapsed = time.perf_counter() - start
+
+    exports = None
+    for line in (stdout or "").splitlines():
+        if line.startswith(RESULT_MARKER):
+            exports = json.loads(line[len(RESULT_MARKER):])
+
+    # blender exits with 0 even when the -P script raises, the result line is the proof of success.
+    ok = returncode == 0 and exports is not None
+    return {
+        "blend":   job["blend"],
+        "ok":      ok,
+        "seconds": elapsed,
+        "exports": exports or [],
+        "error":   None if ok else (stderr or stdout or "")[-2000:],
+    }
+
+def driver_main(argv):
+    parser = argparse.ArgumentParser(description = "Export .blend files to .kmesh/.kanim with background blender processes.")
+    parser.add_argument("blends", nargs = "*", help = "glob patterns of .blend files, ** is recursive")
+    parser.add_argument("--manifest",      help = "json list of {blend, output, formats, objects}")
+    parser.add_argument("-o", "--output",  default = ".", help = "output directory")
+    parser.add_argument("-f", "--formats", nargs = "+", default = ["kmesh-binary"], choices = sorted(EXPORTERS))
+    parser.add_argument("--objects",       nargs = "*", default = None, help = "only export these objects")
+    parser.add_argument("-j", "--jobs",    type = int, default = os.cpu_count() or 1)
+    parser.add_argument("--blender",       default = os.environ.get("BLENDER", "blender"))
+    parser.add_argument("--addons",        default = ROOT, help = "root of the exporter scripts")
+    parser.add_argument("--timeout",       type = int, default = 3600, help = "seconds per .blend")
+    parser.add_argument("--join",          action = "store_true", help = "duplicate and join with bpy.ops instead of reading the evaluated meshes")
+    parser.add_argument("--cache-size",    type = int, default = 0, help = "reuse unchanged exports from a cache of this many MB ($KAT_EXPORT_CACHE)")
+    parser.add_argument("--report",        help = "write per-file timings and failures to this json file")
+    parser.add_argument("--profile-log",   help = "append every export's phase times and counters to this .csv or json lines file")
+    args = parser.parse_args(argv)
+
+    jobs = read_jobs(args)
+    if not jobs:
+        parser.error("no .blend files given")
+
+    start   = time.perf_counter()
+    results = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers = max(1, args.jobs)) as pool:
+        futures = [pool.submit(run_job, job, args) for job in jobs]
+        for future in concurrent.futures.as_completed(futures):
+            result = future.result()
+            results.append(result)
+            print("%-6s %8.2fs  %s" % ("ok" if result["ok"] else "FAILED", result["seconds"], result["blend"]))
+            for export in result["exports"]:
+                print("         %8.2fs  %-12s %10i bytes  %s%s" % (export["seconds"], export["format"], export["bytes"], export["output"],
+                                                                  "  (cached)" if export["cached"] else ""))
+    elapsed = time.perf_counter() - start
+
+    failures = [result for result in results if not result["ok"]]
+    print("\n%i files, %i failed, %.2fs" % (len(results), len(failures), elapsed))
+    for failure in failures:
+        print("\n[%s]\n%s" % (failure["blend"], failure["error"]))
+
+    if args.report:
+        with open(args.report, 'w', encoding = 'utf-8') as f:
+            json.dump({"seconds": elapsed, "results": sorted(results, key = lambda result: result["blend"])}, f, indent = 2)
+
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    # blender passes the script's own arguments after "--".
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:]
+    if "--worker" in argv:
+        worker_main(argv)
+    else:
+        sys.exit(driver_main(argv))
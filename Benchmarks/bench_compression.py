@@ -0,0 +1,86 @@
+# ========================================================================
+# Section compression benchmark: file size, export time and load time of
+# compressed .kmesh/.kanim files against the raw format.
+# run with: python "Benchmarks/bench_compression.py" [--triangles 200000] [--bandwidth 200]
+# ========================================================================
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Data Reader"))
+import synthetic
+
+CODECS = [("raw", 'NONE', 'NONE'), ("zlib", 'ZLIB', 'NONE'), ("zlib+shuffle", 'ZLIB', 'SHUFFLE'),
+          ("zlib+delta", 'ZLIB', 'DELTA'), ("lzma", 'LZMA', 'NONE'), ("lzma+shuffle", 'LZMA', 'SHUFFLE')]
+
+def best_of(repeat, run):
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        seconds.append(time.perf_counter() - start)
+    return min(seconds)
+
+# opening reads (and decompresses) the file, touching every stream makes the raw map fault its pages in.
+def load_mesh(path, workers = None):
+    from kat_reader.kmesh import KMesh
+    from kat_reader.compressed import DecompressedFile, is_compressed
+    with KMesh(path, DecompressedFile(path, workers) if is_compressed(path) else None) as mesh:
+        for stream in (mesh.vertices, mesh.normals, mesh.binormals, mesh.tangents, mesh.uvs):
+            float(stream.sum())
+
+def load_anim(path, workers = None):
+    from kat_reader.kanim import KAnimSkeleton
+    from kat_reader.compressed import DecompressedFile, is_compressed
+    with KAnimSkeleton(path, DecompressedFile(path, workers) if is_compressed(path) else None) as anim:
+        float(anim.positions.sum() + anim.quaternions.sum() + anim.scales.sum())
+
+def run_cases(name, export, load, directory, args):
+    print("%s" % name)
+    print("  %-13s %9s %7s %9s %10s %10s %12s" % ("format", "MB", "ratio", "export s", "load s", "1 thread", "load @%iMB/s" % args.bandwidth))
+    raw_size = None
+    for label, compression, section_filter in CODECS:
+        path    = os.path.join(directory, "%s.%s" % (label, name))
+        written = best_of(1, lambda: export(path, compression, section_filter))
+        size    = os.path.getsize(path)
+        raw_size = raw_size or size
+        loaded  = best_of(args.repeat, lambda: load(path))
+        single  = best_of(args.repeat, lambda: load(path, 1)) if compression != 'NONE' else loaded
+        # the file is in the page cache, reading it from disk adds size / bandwidth.
+        modelled = loaded + size / (args.bandwidth * 1e6)
+        print("  %-13s %9.2f %6.1f: %9.3f %10.3f %10.3f %12.3f" % (label, size / 1e6, raw_size / size, written, loaded, single, modelled))
+        os.remove(path)
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Benchmark section compressed .kmesh/.kanim files against raw ones.")
+    parser.add_argument("--triangles", type = int,   default = 200000)
+    parser.add_argument("--bones",     type = int,   default = 60)
+    parser.add_argument("--keyframes", type = int,   default = 2000)
+    parser.add_argument("--repeat",    type = int,   default = 3, help = "best of this many loads")
+    parser.add_argument("--bandwidth", type = float, default = 200, help = "disk read speed in MB/s for the modelled load time")
+    args = parser.parse_args(argv)
+
+    bpy   = synthetic.use_fake_bpy()
+    kmesh = synthetic.load_exporter("mesh-binary")
+    kanim = synthetic.load_exporter("anim-binary")
+    directory = tempfile.mkdtemp()
+
+    mesh = synthetic.make_mesh_object(args.triangles, 8)
+    def export_mesh(path, compression, section_filter):
+        synthetic.select(mesh)
+        kmesh.write(bpy.context, path, compression = compression, section_filter = section_filter)
+    run_cases("kmesh", export_mesh, load_mesh, directory, args)
+
+    rig = synthetic.make_armature_object(args.bones, args.keyframes)
+    def export_anim(path, compression, section_filter):
+        synthetic.select(rig)
+        kanim.write_kanim_data(bpy.context, path, compression = compression, section_filter = section_filter)
+    run_cases("kanim", export_anim, load_anim, directory, args)
+    os.rmdir(directory)
+
+if __name__ == "__main__":
+    main()
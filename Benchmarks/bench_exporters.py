@@ -0,0 +1,151 @@
+# ========================================================================
+# Throughput and peak memory of the four Kat exporters on synthetic scenes.
+#
+#   python "Benchmarks/bench_exporters.py"                    compare with baseline.json
+#   python "Benchmarks/bench_exporters.py" --update-baseline  store this machine's numbers
+#   python "Benchmarks/bench_exporters.py" --quick            small scenes only
+#
+# runs outside blender on the stand-in bpy in fake_bpy/, the exit code is
+# 1 when a case is slower or uses more memory than the baseline allows.
+# ========================================================================
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+import synthetic
+
+BASELINE = os.path.join(synthetic.HERE, "baseline.json")
+
+# (case name, exporter, scene parameters)
+CASES = [
+    ("mesh-binary/10k-tris/4-mats",    "mesh-binary", {"triangles": 10000,  "materials": 4}),
+    ("mesh-binary/200k-tris/64-mats",  "mesh-binary", {"triangles": 200000, "materials": 64}),
+    ("mesh-text/10k-tris/4-mats",      "mesh-text",   {"triangles": 10000,  "materials": 4}),
+    ("mesh-text/100k-tris/16-mats",    "mesh-text",   {"triangles": 100000, "materials": 16}),
+    ("anim-binary/1k-keys",            "anim-binary", {"keyframes": 1000}),
+    ("anim-binary/50k-keys",           "anim-binary", {"keyframes": 50000}),
+    ("anim-binary/200-bones/500-keys", "anim-binary", {"keyframes": 500, "bones": 200}),
+    ("anim-text/1k-keys",              "anim-text",   {"keyframes": 1000}),
+    ("anim-text/50k-keys",             "anim-text",   {"keyframes": 50000}),
+]
+
+QUICK = {"mesh-binary/10k-tris/4-mats", "mesh-text/10k-tris/4-mats", "anim-binary/1k-keys", "anim-text/1k-keys"}
+
+def make_export(exporter, parameters):
+    module = synthetic.load_exporter(exporter)
+    if exporter.startswith("mesh"):
+        obj = synthetic.make_mesh_object(parameters["triangles"], parameters["materials"])
+        def export(context, filepath):
+            synthetic.select(obj)
+            return module.write(context, filepath)
+        return export, parameters["triangles"], "tris"
+
+    if "bones" in parameters:
+        obj = synthetic.make_armature_object(parameters["bones"], parameters["keyframes"])
+    else:
+        obj = synthetic.make_animated_object(parameters["keyframes"])
+    def export(context, filepath):
+        synthetic.select(obj)
+        return module.write_kanim_data(context, filepath)
+    return export, parameters["keyframes"], "keys"
+
+def run_case(exporter, parameters, repeat):
+    import bpy
+
+    export, elements, unit = make_export(exporter, parameters)
+    directory = tempfile.mkdtemp()
+    filepath  = os.path.join(directory, "bench" + (".kmesh" if exporter.startswith("mesh") else ".kanim"))
+
+    seconds = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        export(bpy.context, filepath)
+        seconds = min(seconds, time.perf_counter() - start)
+
+    # memory is measured in its own run, tracemalloc slows everything down.
+    tracemalloc.start()
+    export(bpy.context, filepath)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    size = os.path.getsize(filepath)
+    os.remove(filepath)
+    os.rmdir(directory)
+    return {
+        "seconds":    seconds,
+        "throughput": elements / seconds,
+        "unit":       unit + "/s",
+        "peak_bytes": peak,
+        "file_bytes": size,
+    }
+
+def compare(name, result, baseline, tolerance):
+    problems = []
+    if baseline is None:
+        return problems
+    if result["throughput"] < baseline["throughput"] * (1 - tolerance):
+        problems.append("%s: throughput %.0f %s is below the baseline %.0f by more than %i%%"
+                        % (name, result["throughput"], result["unit"], baseline["throughput"], tolerance * 100))
+    if result["peak_bytes"] > baseline["peak_bytes"] * (1 + tolerance):
+        problems.append("%s: peak memory %.1f MB is above the baseline %.1f MB by more than %i%%"
+                        % (name, result["peak_bytes"] / 1e6, baseline["peak_bytes"] / 1e6, tolerance * 100))
+    return problems
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Benchmark the Kat exporters on synthetic scenes.")
+    parser.add_argument("--quick",           action = "store_true", help = "small scenes only")
+    parser.add_argument("--repeat",          type = int,   default = 3, help = "best of this many runs")
+    parser.add_argument("--tolerance",       type = float, default = 0.25, help = "allowed regression against the baseline")
+    parser.add_argument("--baseline",        default = BASELINE)
+    parser.add_argument("--update-baseline", action = "store_true")
+    parser.add_argument("--output",          help = "write the results to this json file")
+    parser.add_argument("--filter",          default = "", help = "only run cases whose name contains this")
+    args = parser.parse_args(argv)
+
+    synthetic.use_fake_bpy()
+    if not synthetic.is_fake_bpy():
+        parser.error("run with a plain python, the synthetic scenes need the stand-in bpy")
+
+    baseline = {}
+    if os.path.isfile(args.baseline) and not args.update_baseline:
+        with open(args.baseline, encoding = 'utf-8') as f:
+            baseline = json.load(f)
+
+    results  = {}
+    problems = []
+    print("%-32s %10s %16s %12s %12s" % ("case", "seconds", "throughput", "peak MB", "file MB"))
+    for name, exporter, parameters in CASES:
+        if (args.quick and name not in QUICK) or args.filter not in name:
+            continue
+        result = run_case(exporter, parameters, args.repeat)
+        results[name] = result
+        print("%-32s %10.3f %11.0f %-6s %10.1f %12.1f" % (name, result["seconds"], result["throughput"], result["unit"],
+                                                       result["peak_bytes"] / 1e6, result["file_bytes"] / 1e6))
+        problems += compare(name, result, baseline.get(name), args.tolerance)
+
+    if args.output:
+        with open(args.output, 'w', encoding = 'utf-8') as f:
+            json.dump(results, f, indent = 2, sort_keys = True)
+
+    if args.update_baseline:
+        merged = {}
+        if os.path.isfile(args.baseline):
+            with open(args.baseline, encoding = 'utf-8') as f:
+                merged = json.load(f)
+        merged.update(results)
+        with open(args.baseline, 'w', encoding = 'utf-8') as f:
+            json.dump(merged, f, indent = 2, sort_keys = True)
+        print("\nbaseline written to %s" % args.baseline)
+        return 0
+
+    for problem in problems:
+        print(problem)
+    return 1 if problems else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
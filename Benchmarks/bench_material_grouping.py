@@ -0,0 +1,62 @@
+# ========================================================================
+# Material grouping benchmark for the Kat Mesh exporters.
+# run with: blender -b -P "Benchmarks/bench_material_grouping.py"
+#       or: python "Benchmarks/bench_material_grouping.py" (stand-in bpy)
+# ========================================================================
+
+import os
+import sys
+import time
+import numpy as np
+
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import synthetic
+
+# the previous exporter: rescan every polygon for each new material name.
+def legacy_grouping(materials, material_index):
+    material_names = []
+    order = []
+    for face in material_index:
+        current_name = materials[face].name
+        unique = True
+        for material in material_names:
+            if (material == current_name):
+                unique = False
+                break
+        if(unique == True):
+            for surface, slot in enumerate(material_index):
+                if (materials[slot].name == current_name):
+                    order.append(surface)
+            material_names.append(current_name)
+    return order
+
+def best_of(repeat, fn, *args):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    synthetic.use_fake_bpy()
+    kmesh = synthetic.load_exporter("mesh-binary")
+    rng   = np.random.default_rng(0)
+
+    face_count    = 1000000
+    legacy_count  = 20000
+    print("faces: %i (legacy: %i)" % (face_count, legacy_count))
+    print("materials  grouping (ms)  legacy (ms)")
+
+    for material_count in (1, 2, 4, 8, 16, 32, 64, 128, 256):
+        materials      = [SimpleNamespace(name = "Material_%i" % i, diffuse_color = (0.8, 0.8, 0.8, 1.0)) for i in range(material_count)]
+        material_index = rng.integers(0, material_count, face_count).astype(np.int32)
+
+        grouping = best_of(5, kmesh.group_by_material, materials, material_index)
+        legacy   = best_of(1, legacy_grouping, materials, material_index[:legacy_count].tolist())
+        print("%9i  %13.2f  %11.2f" % (material_count, grouping * 1000, legacy * 1000))
+
+if __name__ == "__main__":
+    main()
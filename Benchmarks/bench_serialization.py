@@ -0,0 +1,80 @@
+# ========================================================================
+# Serialization benchmark for the binary Kat Mesh / Kat Animation writers.
+# run with: python "Benchmarks/bench_serialization.py" (no blender needed)
+# ========================================================================
+
+import os
+import sys
+import time
+import struct
+import tempfile
+import numpy as np
+
+from array import array
+
+# the previous writers: one f.write(struct.pack(...)) per float.
+def per_float_mesh(f, vertices, uvs):
+    for vertex in vertices:
+        f.write(struct.pack('f',  vertex[1]))
+        f.write(struct.pack('f',  vertex[2]))
+        f.write(struct.pack('f', -vertex[0]))
+    for uv in uvs:
+        f.write(struct.pack('f', uv[0]))
+        f.write(struct.pack('f', uv[1]))
+
+def per_float_anim(f, keyframes):
+    for keyframe in keyframes:
+        for value in keyframe:
+            f.write(struct.pack('f', value))
+
+# the current writers: one contiguous buffer per section.
+def bulk_mesh(f, vertices, uvs):
+    converted = vertices[:, (1, 2, 0)]
+    converted[:, 2] = -converted[:, 2]
+    f.write(converted.astype('<f4').tobytes())
+    f.write(uvs.astype('<f4').tobytes())
+
+def bulk_anim(f, keyframes):
+    buffer = array('f')
+    for keyframe in keyframes:
+        buffer.extend(keyframe)
+    if sys.byteorder == 'big':
+        buffer.byteswap()
+    f.write(buffer.tobytes())
+
+def timed(fn, path, *args):
+    start = time.perf_counter()
+    with open(path, 'wb') as f:
+        fn(f, *args)
+    elapsed = time.perf_counter() - start
+    with open(path, 'rb') as f:
+        return elapsed, f.read()
+
+def main():
+    rng = np.random.default_rng(0)
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'bench.bin')
+
+    print("section     elements   per-float (s)   bulk (s)   speed-up")
+    for vertex_count in (10000, 100000, 1000000):
+        vertices = rng.random((vertex_count, 3), dtype = np.float32)
+        uvs      = rng.random((vertex_count, 2), dtype = np.float32)
+
+        slow, expected = timed(per_float_mesh, path, vertices.tolist(), uvs.tolist())
+        fast, written  = timed(bulk_mesh, path, vertices, uvs)
+        assert written == expected
+        print("mesh    %12i   %13.3f   %8.3f   %7.1fx" % (vertex_count, slow, fast, slow / fast))
+
+    for keyframe_count in (1000, 100000):
+        keyframes = rng.random((keyframe_count, 10), dtype = np.float32).tolist()
+
+        slow, expected = timed(per_float_anim, path, keyframes)
+        fast, written  = timed(bulk_anim, path, keyframes)
+        assert written == expected
+        print("anim    %12i   %13.3f   %8.3f   %7.1fx" % (keyframe_count, slow, fast, slow / fast))
+
+    os.remove(path)
+    os.rmdir(directory)
+
+if __name__ == "__main__":
+    main()
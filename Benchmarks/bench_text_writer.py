@@ -0,0 +1,136 @@
+# ========================================================================
+# Text .kmesh writer benchmark: chunked, batched formatting against the
+# previous per-value writes.
+# run with: python "Benchmarks/bench_text_writer.py" [--triangles 100000]
+# ========================================================================
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import synthetic
+
+# the previous writer: one '%f ' % x, rjust and f.write per value.
+def legacy_write_kmesh(kmesh, f, obj, data, materials):
+    # vertices orginised based on material
+    lists = kmesh.group_by_material(materials, data['material_index'])
+    
+    material_names   = lists['names']   # list of material names
+    material_counts  = lists['counts']  # list of no. of vertices that make up a particular material in order of material names
+    material_offsets = lists['offsets'] # list of material indentations in order of material names
+    material_colours = lists['colours'] # list of material colours in order of material names
+    material_count   = len(material_names)
+    
+    #calculate vertex, normal & uv count
+    vertex_count = 3 * len(data['material_index'])
+    
+    vertices, normals, bitangents, tangents, uvs = kmesh.gather_lists(data, lists)
+        
+    #calculate rotation
+    # (+) anti-clockwise (-) clockwise
+    rotation_x =  obj.rotation_euler.y # must be positive radians
+    rotation_y =  obj.rotation_euler.z # must be positive radians
+    rotation_z = -obj.rotation_euler.x # must be positive radians
+    
+    if(rotation_x < 0): rotation_x = -rotation_x
+    else:               rotation_x = (2*kmesh.pi) - rotation_x    
+    if(rotation_y < 0): rotation_y = -rotation_y
+    else:               rotation_y = (2*kmesh.pi) - rotation_y
+    if(rotation_z < 0): rotation_z = -rotation_z
+    else:               rotation_z = (2*kmesh.pi) - rotation_z
+        
+    #writing    
+    f.write("name: " + (obj.name).split('.')[0] + "\n")
+    f.write('vertex   count: %i\n'   % (vertex_count)) 
+    f.write('material count: %i\n\n' % (material_count))    
+    
+    count = 0  
+    for mat in material_names:
+        f.write('(%s offset:%i count:%i colour:%f %f %f %f)\n' % (material_names[count], material_offsets[count], material_counts[count], material_colours[count][0], material_colours[count][1], material_colours[count][2], material_colours[count][3]))
+        count = count + 1
+
+    f.write('\nposition: %f %f %f\n' % (obj.location.y      , obj.location.z      , -obj.location.x))
+    f.write('rotation: %f %f %f\n'   % (rotation_x, rotation_y, rotation_z))
+    f.write('scale:    %f %f %f\n\n' % (obj.scale.y         , obj.scale.z         ,  obj.scale.x))
+               
+    f.write("vertex:\n")
+    for vertex in kmesh.to_kat_axes(vertices).tolist():
+        f.write(('%f '  % (vertex[0])).rjust(10, "\0"));
+        f.write(('%f '  % (vertex[1])).rjust(10, "\0"));
+        f.write(('%f\n' % (vertex[2])).rjust(10, "\0"));
+    f.write("\n")  
+    
+    f.write("uv:\n")
+    for uv in uvs.tolist():
+        f.write('%f %f\n' % (uv[0], uv[1]))
+    f.write("\n")  
+    
+    f.write("normal:\n")
+    for normal in kmesh.to_kat_axes(normals).tolist():
+        f.write(('%f '  % (normal[0])).rjust(10, "\0"));
+        f.write(('%f '  % (normal[1])).rjust(10, "\0"));
+        f.write(('%f\n' % (normal[2])).rjust(10,  "\0"));
+    f.write("\n")  
+    
+    f.write("binormal:\n")
+    for bitangent in kmesh.to_kat_axes(bitangents).tolist():
+        f.write(('%f '  % (bitangent[0])).rjust(10, "\0"));
+        f.write(('%f '  % (bitangent[1])).rjust(10, "\0"));
+        f.write(('%f\n' % (bitangent[2])).rjust(10, "\0"));
+    f.write("\n")
+    
+    f.write("tangent:\n")
+    for tangent in kmesh.to_kat_axes(tangents).tolist():
+        f.write(('%f '  % (tangent[0])).rjust(10, "\0"));
+        f.write(('%f '  % (tangent[1])).rjust(10, "\0"));
+        f.write(('%f\n' % (tangent[2])).rjust(10, "\0"));
+    f.write("\n")
+
+def run(write, path):
+    with open(path, 'w', encoding = 'utf-8') as f:
+        start = time.perf_counter()
+        write(f)
+        seconds = time.perf_counter() - start
+
+    # memory in its own run, tracemalloc slows everything down.
+    with open(path, 'w', encoding = 'utf-8') as f:
+        tracemalloc.start()
+        write(f)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    with open(path, encoding = 'utf-8') as f:
+        return f.read(), seconds, peak
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Benchmark the text .kmesh writer.")
+    parser.add_argument("--triangles", type = int, default = 100000)
+    parser.add_argument("--materials", type = int, default = 8)
+    args = parser.parse_args(argv)
+
+    synthetic.use_fake_bpy()
+    kmesh     = synthetic.load_exporter("mesh-text")
+    obj       = synthetic.make_mesh_object(args.triangles, args.materials)
+    data      = kmesh.extract_mesh_data(obj.data)
+    materials = [slot.material for slot in obj.material_slots]
+    path      = os.path.join(tempfile.mkdtemp(), "bench.kmesh")
+
+    legacy   = run(lambda f: legacy_write_kmesh(kmesh, f, obj, data, materials), path)
+    streamed = run(lambda f: kmesh.write_kmesh(f, obj, data, materials), path)
+    os.remove(path)
+    os.rmdir(os.path.dirname(path))
+    assert legacy[0] == streamed[0], "streamed output differs from the legacy writer"
+
+    megabytes = len(streamed[0]) / 1e6
+    print("triangles: %i, output: %.1f MB (identical)" % (args.triangles, megabytes))
+    print("writer      seconds    MB/s     tris/s   peak MB")
+    for name, (_, seconds, peak) in (("legacy", legacy), ("streamed", streamed)):
+        print("%-8s %10.3f %7.1f %10.0f %9.1f" % (name, seconds, megabytes / seconds, args.triangles / seconds, peak / 1e6))
+    print("speedup: %.1fx" % (legacy[1] / streamed[1]))
+
+if __name__ == "__main__":
+    main()
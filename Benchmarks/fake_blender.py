@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# ========================================================================
+# Stand-in for the blender executable, for running the batch export CLI
+# where blender is not installed:
+#
+#   python "Batch Export/kat_batch_export.py" "assets/*.blend" -f kmesh-binary kanim-binary \
+#       --blender Benchmarks/fake_blender.py
+#
+# takes blender's "[--factory-startup] -b file.blend -P script.py -- ..."
+# command line, puts fake_bpy on the path and runs the script as blender
+# would. fake_bpy cannot read .blend files, any file stands in for one:
+# the scene is a synthetic mesh, an animated object and an armature,
+# seeded by the file name so every file exports different data.
+# ========================================================================
+
+import os
+import sys
+import zlib
+import runpy
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def build_scene(blend):
+    import bpy
+    import synthetic
+
+    seed    = zlib.crc32(os.path.basename(blend).encode('utf-8'))
+    objects = [synthetic.make_mesh_object(int(os.environ.get("KAT_FAKE_TRIANGLES", 2000)), 3, seed, "Prop"),
+               synthetic.make_animated_object(120, seed, "Crate"),
+               synthetic.make_armature_object(8, 120, seed, "Rig")]
+    bpy.context.view_layer.objects.extend(objects)
+    bpy.data.objects.extend(objects)
+
+def main(argv):
+    own, script_args = (argv[:argv.index("--")], argv[argv.index("--"):]) if "--" in argv else (argv, [])
+    blend  = own[own.index("-b") + 1] if "-b" in own else None
+    script = own[own.index("-P") + 1] if "-P" in own else None
+
+    sys.path.insert(0, HERE)
+    import synthetic
+    synthetic.use_fake_bpy()
+
+    if blend is not None:
+        if not os.path.isfile(blend):
+            sys.stderr.write("Error: Cannot read file \"%s\": No such file or directory\n" % blend)
+            return 1
+        build_scene(blend)
+    if script is not None:
+        # scripts read their own arguments after "--", as they would in blender.
+        sys.argv = [sys.argv[0]] + own + script_args
+        runpy.run_path(script, run_name = "__main__")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
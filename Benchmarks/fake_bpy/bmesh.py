@@ -0,0 +1,22 @@
+# ========================================================================
+# Stand-in for Blender's bmesh, the generated meshes are already triangles.
+# ========================================================================
+
+import types as _types
+
+class BMesh:
+    faces = ()
+
+    def from_mesh(self, mesh):
+        pass
+
+    def to_mesh(self, mesh):
+        pass
+
+    def free(self):
+        pass
+
+def new():
+    return BMesh()
+
+ops = _types.SimpleNamespace(triangulate = lambda bm, faces = (): {})
@@ -0,0 +1,372 @@
+# ========================================================================
+# Stand-in for Blender's bpy module, just enough for the Kat exporters.
+#
+# data lives in numpy arrays, collections support foreach_get/foreach_set
+# and per-element access like bpy_prop_collection, so both the bulk and
+# the element-by-element exporter paths can be timed outside blender.
+# ========================================================================
+
+import types as _types
+import numpy as np
+
+from mathutils import Vector, Euler, Quaternion, Matrix
+from . import props, types, utils
+
+# one element of a Collection, attributes read through to the arrays.
+class Element:
+    __slots__ = ('_collection', '_index')
+
+    def __init__(self, collection, index):
+        object.__setattr__(self, '_collection', collection)
+        object.__setattr__(self, '_index', index)
+
+    def __getattr__(self, name):
+        value = self._collection.fields[name][self._index]
+        if isinstance(value, np.ndarray):
+            if value.dtype.kind == 'f':
+                return Vector(value.tolist())
+            return [int(x) for x in value]
+        return value.item()
+
+    def __eq__(self, other):
+        return isinstance(other, Element) and other._collection is self._collection and other._index == self._index
+
+    def __hash__(self):
+        return hash((id(self._collection), self._index))
+
+# bpy_prop_collection backed by one array per attribute.
+class Collection:
+    def __init__(self, **fields):
+        self.fields = {name: np.asarray(values) for name, values in fields.items()}
+
+    def __len__(self):
+        return len(next(iter(self.fields.values()))) if self.fields else 0
+
+    def __getitem__(self, index):
+        if index < 0:
+            index = index + len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError(index)
+        return Element(self, index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield Element(self, index)
+
+    def foreach_get(self, name, buffer):
+        values = self.fields[name].reshape(-1)
+        if isinstance(buffer, np.ndarray):
+            buffer[...] = values.astype(buffer.dtype)
+        elif isinstance(buffer, list):
+            buffer[:] = values.tolist()
+        else:
+            view = np.asarray(memoryview(buffer))
+            view[...] = values.astype(view.dtype)
+
+    def foreach_set(self, name, buffer):
+        field = self.fields[name]
+        field[...] = np.asarray(buffer, dtype = field.dtype).reshape(field.shape)
+
+    def copy(self):
+        return type(self)(**{name: values.copy() for name, values in self.fields.items()})
+
+class UVLayers(list):
+    @property
+    def active(self):
+        return self[0] if self else None
+
+class UVLayer:
+    def __init__(self, uvs, name = 'UVMap'):
+        self.name = name
+        self.data = Collection(uv = np.asarray(uvs, np.float32))
+
+def _normalized(vectors):
+    return vectors / np.maximum(np.linalg.norm(vectors, axis = -1, keepdims = True), 1e-12)
+
+class Mesh:
+    """Triangle mesh laid out like a bpy Mesh: vertices, loops, polygons, uv layers."""
+
+    def __init__(self, name, positions, triangles, uvs, material_index, use_smooth = None):
+        positions = np.asarray(positions, np.float32)
+        triangles = np.asarray(triangles, np.int32).reshape(-1, 3)
+        count     = len(triangles)
+        corners   = positions[triangles]
+
+        face_normals  = _normalized(np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0]))
+        point_normals = np.zeros_like(positions)
+        np.add.at(point_normals, triangles.ravel(), np.repeat(face_normals, 3, axis = 0))
+        point_normals = _normalized(point_normals)
+        if use_smooth is None:
+            use_smooth = np.ones(count, bool)
+
+        self.name      = name
+        self.vertices  = Collection(co = positions, normal = point_normals.astype(np.float32))
+        self.polygons  = Collection(vertices       = triangles,
+                                    normal         = face_normals.astype(np.float32),
+                                    use_smooth     = np.asarray(use_smooth, bool),
+                                    material_index = np.asarray(material_index, np.int32),
+                                    loop_start     = np.arange(0, 3 * count, 3, dtype = np.int32),
+                                    loop_total     = np.full(count, 3, np.int32))
+        self.loops     = Collection(vertex_index   = triangles.ravel().copy(),
+                                    normal         = np.repeat(face_normals, 3, axis = 0).astype(np.float32),
+                                    tangent        = np.zeros((3 * count, 3), np.float32),
+                                    bitangent      = np.zeros((3 * count, 3), np.float32),
+                                    bitangent_sign = np.zeros(3 * count, np.float32))
+        self.uv_layers = UVLayers([UVLayer(uvs)])
+        self.loop_triangles = Collection()
+        self.materials = []
+
+    # per-face uv tangents, orthogonalized against the loop normals.
+    def calc_tangents(self, uvmap = ''):
+        triangles = self.polygons.fields['vertices']
+        corners   = self.vertices.fields['co'][triangles]
+        uvs       = self.uv_layers.active.data.fields['uv'].reshape(-1, 3, 2)
+        edge_1, edge_2 = corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0]
+        duv_1,  duv_2  = uvs[:, 1] - uvs[:, 0], uvs[:, 2] - uvs[:, 0]
+        determinant = duv_1[:, 0] * duv_2[:, 1] - duv_2[:, 0] * duv_1[:, 1]
+        determinant = np.where(np.abs(determinant) < 1e-12, 1.0, determinant)
+        tangents = (edge_1 * duv_2[:, 1:2] - edge_2 * duv_1[:, 1:2]) / determinant[:, None]
+
+        normals  = self.loops.fields['normal'].reshape(-1, 3, 3)
+        tangents = np.repeat(tangents, 3, axis = 0).reshape(-1, 3, 3)
+        tangents = _normalized(tangents - normals * np.sum(normals * tangents, axis = 2, keepdims = True))
+        self.loops.fields['tangent'][...]        = tangents.reshape(-1, 3)
+        self.loops.fields['bitangent'][...]      = np.cross(normals, tangents).reshape(-1, 3)
+        self.loops.fields['bitangent_sign'][...] = 1.0
+
+    def free_tangents(self):
+        self.loops.fields['tangent'][...]   = 0.0
+        self.loops.fields['bitangent'][...] = 0.0
+
+    def calc_loop_triangles(self):
+        polygons = self.polygons.fields
+        count    = len(polygons['vertices'])
+        self.loop_triangles = Collection(loops          = np.arange(3 * count, dtype = np.int32).reshape(-1, 3),
+                                         vertices       = polygons['vertices'].copy(),
+                                         material_index = polygons['material_index'].copy(),
+                                         polygon_index  = np.arange(count, dtype = np.int32),
+                                         normal         = polygons['normal'].copy(),
+                                         split_normals  = np.repeat(polygons['normal'], 3, axis = 0).reshape(-1, 9))
+
+    def transform(self, matrix):
+        matrix = np.asarray(matrix.values)
+        co     = self.vertices.fields['co']
+        co[...] = (co @ matrix[:3, :3].T + matrix[:3, 3]).astype(np.float32)
+
+    # stand-in for the decimate modifier: an even subset of the triangles.
+    def decimated(self, ratio):
+        triangles = self.polygons.fields['vertices']
+        keep      = np.unique(np.linspace(0, len(triangles) - 1, max(1, int(round(len(triangles) * ratio)))).astype(np.int64))
+        corners   = (3 * keep[:, None] + np.arange(3)).ravel()
+        other = Mesh(self.name, self.vertices.fields['co'], triangles[keep], self.uv_layers.active.data.fields['uv'][corners],
+                     self.polygons.fields['material_index'][keep], self.polygons.fields['use_smooth'][keep])
+        for name in ('tangent', 'bitangent', 'bitangent_sign'):
+            other.loops.fields[name][...] = self.loops.fields[name][corners]
+        return other
+
+    def copy(self):
+        other = object.__new__(Mesh)
+        other.__dict__.update(self.__dict__)
+        other.vertices  = self.vertices.copy()
+        other.loops     = self.loops.copy()
+        other.polygons  = self.polygons.copy()
+        other.uv_layers = UVLayers([UVLayer(layer.data.fields['uv'].copy(), layer.name) for layer in self.uv_layers])
+        other.loop_triangles = self.loop_triangles.copy()
+        return other
+
+class Material:
+    def __init__(self, name, colour = (0.8, 0.8, 0.8, 1.0)):
+        self.name          = name
+        self.diffuse_color = Vector(colour)
+        self.use_nodes     = False
+        self.node_tree     = None
+
+class MaterialSlot:
+    def __init__(self, material):
+        self.material = material
+
+    @property
+    def name(self):
+        return self.material.name if self.material else ''
+
+class FCurve:
+    """Linearly interpolated fcurve, keyframe_points.co is (frame, value).
+
+    handles sit on the keys and interpolation/easing read back as blender's
+    enum indices (1 LINEAR, 0 AUTO) through foreach_get, they are not evaluated."""
+
+    def __init__(self, data_path, array_index, frames, values):
+        self.data_path     = data_path
+        self.array_index   = array_index
+        self.extrapolation = 'CONSTANT'
+        self.modifiers     = []
+        co = np.stack([np.asarray(frames, np.float32), np.asarray(values, np.float32)], axis = 1)
+        self.keyframe_points = Collection(co = co, handle_left = co.copy(), handle_right = co.copy(),
+                                          interpolation = np.ones(len(co), dtype = np.int32),
+                                          easing = np.zeros(len(co), dtype = np.int32))
+
+    def evaluate(self, frame):
+        co = self.keyframe_points.fields['co']
+        return float(np.interp(frame, co[:, 0], co[:, 1]))
+
+    def range(self):
+        co = self.keyframe_points.fields['co']
+        return Vector((co[0, 0], co[-1, 0]))
+
+class FCurves(list):
+    def find(self, data_path, index = 0):
+        for curve in self:
+            if curve.data_path == data_path and curve.array_index == index:
+                return curve
+        return None
+
+class Action:
+    def __init__(self, name, fcurves):
+        self.name    = name
+        self.fcurves = FCurves(fcurves)
+
+    @property
+    def frame_range(self):
+        frames = np.concatenate([curve.keyframe_points.fields['co'][:, 0] for curve in self.fcurves])
+        return Vector((frames.min(), frames.max()))
+
+class AnimData:
+    def __init__(self, action):
+        self.action = action
+
+class Bone:
+    def __init__(self, name, parent = None, matrix_local = None):
+        self.name         = name
+        self.parent       = parent
+        self.matrix_local = Matrix(matrix_local)
+
+class Armature:
+    def __init__(self, name, bones):
+        self.name  = name
+        self.bones = list(bones)
+
+class PoseBone:
+    def __init__(self, bone):
+        self.name  = bone.name
+        self.bone  = bone
+        self.rotation_mode       = 'QUATERNION'
+        self.location            = Vector()
+        self.rotation_quaternion = Quaternion()
+        self.rotation_euler      = Euler()
+        self.rotation_axis_angle = Vector((0.0, 0.0, 1.0, 0.0))
+        self.scale               = Vector((1.0, 1.0, 1.0))
+
+class Pose:
+    def __init__(self, bones):
+        self.bones = [PoseBone(bone) for bone in bones]
+
+# bl_rna lists the settings as blender's does, for the export cache key.
+class Modifier:
+    def __init__(self, name, type):
+        self.name          = name
+        self.type          = type
+        self.show_viewport = True
+        self.ratio         = 1.0
+
+    @property
+    def bl_rna(self):
+        properties = [_types.SimpleNamespace(identifier = identifier, type = kind, is_array = False)
+                      for identifier, kind in (('name', 'STRING'), ('type', 'ENUM'), ('show_viewport', 'BOOLEAN'), ('ratio', 'FLOAT'))]
+        return _types.SimpleNamespace(properties = properties)
+
+class Modifiers(list):
+    def new(self, name, type):
+        modifier = Modifier(name, type)
+        self.append(modifier)
+        return modifier
+
+class Object:
+    def __init__(self, name, data = None, materials = (), location = (0, 0, 0), rotation = (0, 0, 0), scale = (1, 1, 1)):
+        self.name           = name
+        self.data           = data
+        self.type           = 'MESH' if isinstance(data, Mesh) else 'ARMATURE' if isinstance(data, Armature) else 'EMPTY'
+        self.material_slots = [MaterialSlot(material) for material in materials]
+        self.location       = Vector(location)
+        self.rotation_euler = Euler(rotation)
+        self.rotation_mode  = 'XYZ'
+        self.scale          = Vector(scale)
+        self.animation_data = None
+        self.pose           = Pose(data.bones) if isinstance(data, Armature) else None
+        self.modifiers      = Modifiers()
+
+    @property
+    def matrix_world(self):
+        basis = np.asarray(self.rotation_euler.to_matrix().values) * np.asarray(list(self.scale))[None, :]
+        world = np.identity(4)
+        world[:3, :3] = basis
+        world[:3, 3]  = list(self.location)
+        return Matrix(world)
+
+    def evaluated_get(self, depsgraph):
+        return self
+
+    def to_mesh(self, **keywords):
+        mesh = self.data.copy()
+        for modifier in self.modifiers:
+            if modifier.type == 'DECIMATE' and modifier.show_viewport:
+                mesh = mesh.decimated(modifier.ratio)
+        return mesh
+
+    def to_mesh_clear(self):
+        pass
+
+    def select_get(self):
+        return self in context.selected_objects
+
+    def select_set(self, state):
+        selected = [obj for obj in context.selected_objects if obj is not self]
+        context.selected_objects = selected + [self] if state else selected
+
+class Render:
+    def __init__(self):
+        self.fps      = 30
+        self.fps_base = 1.0
+
+class Scene:
+    def __init__(self):
+        self.render        = Render()
+        self.frame_current = 1
+        self.frame_start   = 1
+        self.frame_end     = 250
+
+    def frame_set(self, frame, subframe = 0.0):
+        self.frame_current = frame
+
+class Depsgraph:
+    def update(self):
+        pass
+
+class ViewLayerObjects(list):
+    @property
+    def active(self):
+        return context.active_object
+
+    @active.setter
+    def active(self, obj):
+        context.active_object = obj
+
+class Context:
+    def __init__(self):
+        self.scene            = Scene()
+        self.selected_objects = []
+        self.active_object    = None
+        self.window_manager   = None
+        self.view_layer       = _types.SimpleNamespace(objects = ViewLayerObjects())
+
+    def evaluated_depsgraph_get(self):
+        return Depsgraph()
+
+context = Context()
+
+def _finished(*args, **keywords):
+    return {'FINISHED'}
+
+# the join path's operators leave the selection as it is, the generated meshes are already one object.
+ops  = _types.SimpleNamespace(object = _types.SimpleNamespace(duplicate = _finished, join = _finished, delete = _finished))
+data = _types.SimpleNamespace(objects = [], meshes = [], materials = [], actions = [])
+app  = _types.SimpleNamespace(version = (4, 5, 2), background = True)
@@ -0,0 +1,6 @@
+# stand-in for bpy.props, a property annotation evaluates to its default.
+
+def _property(**keywords):
+    return keywords.get('default')
+
+StringProperty = BoolProperty = EnumProperty = IntProperty = FloatProperty = FloatVectorProperty = _property
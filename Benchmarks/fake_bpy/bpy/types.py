@@ -0,0 +1,29 @@
+# stand-in for bpy.types, operators read their annotated properties' defaults.
+
+class Operator:
+    def __getattr__(self, name):
+        for klass in type(self).__mro__:
+            annotations = klass.__dict__.get('__annotations__', {})
+            if name in annotations:
+                return annotations[name]
+        raise AttributeError(name)
+
+    def report(self, level, message):
+        self.__dict__.setdefault('reports', []).append((tuple(sorted(level)), message))
+
+    def as_keywords(self, ignore = ()):
+        keywords = {}
+        for klass in reversed(type(self).__mro__):
+            for name in klass.__dict__.get('__annotations__', {}):
+                if name not in ignore:
+                    keywords[name] = getattr(self, name)
+        return keywords
+
+class _Menu:
+    def append(self, function):
+        pass
+
+    def remove(self, function):
+        pass
+
+TOPBAR_MT_file_export = _Menu()
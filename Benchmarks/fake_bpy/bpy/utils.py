@@ -0,0 +1,10 @@
+# stand-in for bpy.utils, registration is a no-op.
+
+def register_class(cls):
+    pass
+
+def unregister_class(cls):
+    pass
+
+def escape_identifier(string):
+    return string.replace('\\', '\\\\').replace('"', '\\"')
@@ -0,0 +1,2 @@
+# stand-in for bpy_extras.
+from . import io_utils
@@ -0,0 +1,5 @@
+# stand-in for bpy_extras.io_utils.
+
+class ExportHelper:
+    filepath = ''
+    check_existing = True
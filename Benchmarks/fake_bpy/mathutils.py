@@ -0,0 +1,140 @@
+# ========================================================================
+# Stand-in for Blender's mathutils: Vector, Euler, Quaternion, Matrix.
+# ========================================================================
+
+import math
+import numpy as np
+
+class Vector:
+    __slots__ = ('_values',)
+
+    def __init__(self, values = (0.0, 0.0, 0.0)):
+        self._values = [float(value) for value in values]
+
+    x = property(lambda self: self._values[0], lambda self, value: self._values.__setitem__(0, float(value)))
+    y = property(lambda self: self._values[1], lambda self, value: self._values.__setitem__(1, float(value)))
+    z = property(lambda self: self._values[2], lambda self, value: self._values.__setitem__(2, float(value)))
+    w = property(lambda self: self._values[3], lambda self, value: self._values.__setitem__(3, float(value)))
+
+    def __getitem__(self, index):
+        return self._values[index]
+
+    def __setitem__(self, index, value):
+        self._values[index] = float(value)
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __repr__(self):
+        return '%s(%r)' % (type(self).__name__, tuple(self._values))
+
+    def copy(self):
+        return type(self)(self._values)
+
+class Euler(Vector):
+    __slots__ = ('order',)
+
+    def __init__(self, values = (0.0, 0.0, 0.0), order = 'XYZ'):
+        Vector.__init__(self, values)
+        self.order = order
+
+    def to_matrix(self):
+        x, y, z = self._values
+        rotate_x = np.array([[1, 0, 0], [0, math.cos(x), -math.sin(x)], [0, math.sin(x), math.cos(x)]])
+        rotate_y = np.array([[math.cos(y), 0, math.sin(y)], [0, 1, 0], [-math.sin(y), 0, math.cos(y)]])
+        rotate_z = np.array([[math.cos(z), -math.sin(z), 0], [math.sin(z), math.cos(z), 0], [0, 0, 1]])
+        return Matrix(rotate_z @ rotate_y @ rotate_x)
+
+    def to_quaternion(self):
+        x, y, z = (value / 2 for value in self._values)
+        cx, sx = math.cos(x), math.sin(x)
+        cy, sy = math.cos(y), math.sin(y)
+        cz, sz = math.cos(z), math.sin(z)
+        return Quaternion((cx * cy * cz + sx * sy * sz,
+                           sx * cy * cz - cx * sy * sz,
+                           cx * sy * cz + sx * cy * sz,
+                           cx * cy * sz - sx * sy * cz))
+
+class Quaternion(Vector):
+    __slots__ = ()
+
+    def __init__(self, values = (1.0, 0.0, 0.0, 0.0)):
+        Vector.__init__(self, values)
+
+    w = property(lambda self: self._values[0])
+    x = property(lambda self: self._values[1])
+    y = property(lambda self: self._values[2])
+    z = property(lambda self: self._values[3])
+
+    def to_euler(self, order = 'XYZ'):
+        w, x, y, z = self._values
+        return Euler((math.atan2(2 * (w * x + y * z), 1 - 2 * (x * x + y * y)),
+                      math.asin(max(-1.0, min(1.0, 2 * (w * y - z * x)))),
+                      math.atan2(2 * (w * z + x * y), 1 - 2 * (y * y + z * z))), order)
+
+class Matrix:
+    def __init__(self, rows = None):
+        self.values = np.identity(4) if rows is None else np.array(rows, dtype = float)
+
+    @classmethod
+    def Identity(cls, size):
+        return cls(np.identity(size))
+
+    @classmethod
+    def Translation(cls, vector):
+        values = np.identity(4)
+        values[:3, 3] = list(vector)[:3]
+        return cls(values)
+
+    def __matmul__(self, other):
+        if isinstance(other, Matrix):
+            return Matrix(self.values @ other.values)
+        vector = np.array(list(other) + [1.0])[:len(self.values)]
+        return Vector((self.values @ vector)[:3])
+
+    def __getitem__(self, index):
+        return Vector(self.values[index])
+
+    def __iter__(self):
+        return (Vector(row) for row in self.values)
+
+    def __len__(self):
+        return len(self.values)
+
+    def inverted(self):
+        return Matrix(np.linalg.inv(self.values))
+
+    def transposed(self):
+        return Matrix(self.values.T)
+
+    def to_3x3(self):
+        return Matrix(self.values[:3, :3])
+
+    def copy(self):
+        return Matrix(self.values.copy())
+
+    @property
+    def is_negative(self):
+        return bool(np.linalg.det(self.values[:3, :3]) < 0)
+
+    def to_quaternion(self):
+        m     = self.values[:3, :3] / np.linalg.norm(self.values[:3, :3], axis = 0)
+        trace = m[0, 0] + m[1, 1] + m[2, 2]
+        if trace > 0:
+            s = math.sqrt(trace + 1.0) * 2
+            return Quaternion((s / 4, (m[2, 1] - m[1, 2]) / s, (m[0, 2] - m[2, 0]) / s, (m[1, 0] - m[0, 1]) / s))
+        if m[0, 0] > m[1, 1] and m[0, 0] > m[2, 2]:
+            s = math.sqrt(1.0 + m[0, 0] - m[1, 1] - m[2, 2]) * 2
+            return Quaternion(((m[2, 1] - m[1, 2]) / s, s / 4, (m[0, 1] + m[1, 0]) / s, (m[0, 2] + m[2, 0]) / s))
+        if m[1, 1] > m[2, 2]:
+            s = math.sqrt(1.0 + m[1, 1] - m[0, 0] - m[2, 2]) * 2
+            return Quaternion(((m[0, 2] - m[2, 0]) / s, (m[0, 1] + m[1, 0]) / s, s / 4, (m[1, 2] + m[2, 1]) / s))
+        s = math.sqrt(1.0 + m[2, 2] - m[0, 0] - m[1, 1]) * 2
+        return Quaternion(((m[1, 0] - m[0, 1]) / s, (m[0, 2] + m[2, 0]) / s, (m[1, 2] + m[2, 1]) / s, s / 4))
+
+    def decompose(self):
+        return (Vector(self.values[:3, 3]), self.to_quaternion(),
+                Vector(np.linalg.norm(self.values[:3, :3], axis = 0)))
@@ -0,0 +1,118 @@
+# ========================================================================
+# Synthetic scenes for the exporter benchmarks.
+#
+# use_fake_bpy() puts the stand-in bpy/bmesh/mathutils from fake_bpy on
+# the path when the benchmarks run outside blender.
+# ========================================================================
+
+import os
+import sys
+import importlib.util
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+EXPORTERS = {
+    "mesh-binary": "Mesh Data Exporter/Kat Mesh - Exporter (binary).py",
+    "mesh-text":   "Mesh Data Exporter/Kat Mesh - Exporter (text).py",
+    "anim-binary": "Animation Data Exporter/Kat Animation - Exporter (binary).py",
+    "anim-text":   "Animation Data Exporter/Kat Animation - Exporter (text).py",
+}
+
+def use_fake_bpy():
+    try:
+        import bpy
+    except ImportError:
+        sys.path.insert(0, os.path.join(HERE, "fake_bpy"))
+        import bpy
+    return bpy
+
+def is_fake_bpy():
+    import bpy
+    return hasattr(bpy, "Element")
+
+def load_exporter(kind):
+    path   = os.path.join(ROOT, EXPORTERS[kind])
+    spec   = importlib.util.spec_from_file_location("kat_" + kind.replace("-", "_"), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def make_mesh_object(triangle_count, material_count, seed = 0, name = "Prop"):
+    """A bumpy grid of triangle_count triangles spread over material_count materials."""
+    import numpy as np
+    import bpy
+
+    rng     = np.random.default_rng(seed)
+    quads   = max(1, (triangle_count + 1) // 2)
+    columns = int(np.ceil(np.sqrt(quads)))
+
+    xs, ys    = np.meshgrid(np.arange(columns + 1), np.arange(columns + 1))
+    heights   = rng.random(xs.shape) * 0.3
+    positions = np.stack([xs.ravel(), ys.ravel(), heights.ravel()], axis = 1).astype(np.float32) - columns / 2
+
+    grid = np.arange((columns + 1) ** 2).reshape(columns + 1, columns + 1)
+    a, b = grid[:-1, :-1].ravel(), grid[:-1, 1:].ravel()
+    c, d = grid[1:, 1:].ravel(),   grid[1:, :-1].ravel()
+    triangles = np.concatenate([np.stack([a, b, c], axis = 1), np.stack([a, c, d], axis = 1)])[:triangle_count]
+
+    count          = len(triangles)
+    uvs            = (positions[triangles.ravel(), :2] / max(columns, 1)).astype(np.float32)
+    material_index = (np.arange(count) * material_count) // max(count, 1)
+    use_smooth     = rng.random(count) > 0.25
+
+    mesh      = bpy.Mesh(name, positions, triangles, uvs, material_index, use_smooth)
+    materials = [bpy.Material("Material_%03i" % i, (i / max(material_count, 1), 0.5, 0.25, 1.0)) for i in range(material_count)]
+    mesh.calc_tangents()
+    return bpy.Object(name, mesh, materials, location = (1.0, -2.0, 0.5), rotation = (0.3, -0.2, 1.1))
+
+def make_animated_object(keyframe_count, seed = 0, name = "Prop"):
+    """An object whose location/rotation/scale fcurves share keyframe_count keys."""
+    import numpy as np
+    import bpy
+
+    rng    = np.random.default_rng(seed)
+    frames = np.arange(1, keyframe_count + 1, dtype = np.float32)
+    curves = []
+    for data_path, offset, spread in (("location", 0.0, 3.0), ("rotation_euler", 0.0, 3.0), ("scale", 1.0, 0.2)):
+        for index in range(3):
+            values = offset + np.cumsum(rng.normal(size = keyframe_count)) * spread / np.sqrt(keyframe_count)
+            curves.append(bpy.FCurve(data_path, index, frames, values))
+
+    obj = bpy.Object(name)
+    obj.animation_data = bpy.AnimData(bpy.Action(name + "Action", curves))
+    return obj
+
+def make_armature_object(bone_count, keyframe_count, seed = 0, name = "Rig"):
+    """A binary tree of bone_count bones, every bone keyed on keyframe_count frames."""
+    import numpy as np
+    import bpy
+
+    rng   = np.random.default_rng(seed)
+    bones = []
+    for index in range(bone_count):
+        parent = bones[(index - 1) // 2] if index else None
+        matrix = np.identity(4)
+        matrix[:3, 3] = (0.0, float(index.bit_length()), 0.1 * (index % 3))
+        bones.append(bpy.Bone("Bone_%03i" % index, parent, matrix))
+
+    obj    = bpy.Object(name, bpy.Armature(name, bones))
+    frames = np.arange(1, keyframe_count + 1, dtype = np.float32)
+    curves = []
+    for index, pose_bone in enumerate(obj.pose.bones):
+        # mostly quaternions, a few euler orders.
+        pose_bone.rotation_mode = ('QUATERNION', 'QUATERNION', 'XYZ', 'ZXY')[index % 4]
+        rotation = ('rotation_quaternion', 4) if pose_bone.rotation_mode == 'QUATERNION' else ('rotation_euler', 3)
+        for data_path, size, offset, spread in (("location", 3, 0.0, 0.5), rotation + (0.0, 1.0), ("scale", 3, 1.0, 0.1)):
+            for component in range(size):
+                start  = 1.0 if data_path == 'rotation_quaternion' and component == 0 else offset
+                values = start + np.cumsum(rng.normal(size = keyframe_count)) * spread / np.sqrt(keyframe_count)
+                curves.append(bpy.FCurve('pose.bones["%s"].%s' % (pose_bone.name, data_path), component, frames, values))
+
+    obj.animation_data = bpy.AnimData(bpy.Action(name + "Action", curves))
+    return obj
+
+def select(*objects):
+    import bpy
+    bpy.context.selected_objects = list(objects)
+    bpy.context.view_layer.objects.active = objects[0]
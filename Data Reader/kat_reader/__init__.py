@@ -0,0 +1,37 @@
+# ========================================================================
+# Readers for the Kat Mesh (.kmesh) and Kat Animation (.kanim) formats.
+#
+# binary files are memory-mapped and every stream is a zero-copy numpy
+# view into the map, text files are parsed line by line.
+#
+#   from kat_reader import open_kmesh, open_kanim
+#   with open_kmesh("Test[binary].kmesh") as mesh:
+#       print(mesh.name, mesh.vertex_count, mesh.vertices[:4])
+#
+# .kpack archives map once and open their entries as sections of that map.
+# section compressed files are decompressed into memory, in parallel, first.
+# ========================================================================
+
+from .kmesh import KMesh, VertexList, LOD, open_kmesh, is_binary_kmesh
+from .kanim import KAnim, KAnimCompact, KAnimSkeleton, Bone, KEYFRAME_DTYPE, open_kanim, is_binary_kanim, is_compact_kanim, is_skeleton_kanim
+from .kpack import KPack, PackEntry, open_kpack, is_kpack
+from .compressed import DecompressedFile, is_compressed
+from .text  import KMeshText, KAnimText, read_kmesh_text, read_kanim_text, iter_kmesh_text, iter_kanim_text
+
+def open_any(path):
+    """Open a .kmesh, .kanim or .kpack file, binary or text."""
+    if path.lower().endswith(".kpack"):
+        return open_kpack(path)
+    if path.lower().endswith(".kanim"):
+        return open_kanim(path) if is_binary_kanim(path) else read_kanim_text(path)
+    return open_kmesh(path) if is_binary_kmesh(path) else read_kmesh_text(path)
+
+__all__ = [
+    "open_any",
+    "KMesh", "VertexList", "LOD", "open_kmesh", "is_binary_kmesh",
+    "KAnim", "KAnimCompact", "KAnimSkeleton", "Bone", "KEYFRAME_DTYPE",
+    "open_kanim", "is_binary_kanim", "is_compact_kanim", "is_skeleton_kanim",
+    "KPack", "PackEntry", "open_kpack", "is_kpack",
+    "DecompressedFile", "is_compressed",
+    "KMeshText", "KAnimText", "read_kmesh_text", "read_kanim_text", "iter_kmesh_text", "iter_kanim_text",
+]
@@ -0,0 +1,132 @@
+# ========================================================================
+# python -m kat_reader info FILE...
+# python -m kat_reader diff A B [--tolerance 1e-5]
+# ========================================================================
+
+import sys
+import argparse
+import numpy as np
+
+from . import open_any
+
+MESH_STREAMS = ("vertices", "normals", "binormals", "tangents", "uvs")
+ANIM_FIELDS  = ("times", "positions", "quaternions", "scales")
+
+def is_mesh(data):
+    return hasattr(data, "vertices")
+
+def is_pack(data):
+    return hasattr(data, "toc")
+
+def mesh_streams(data):
+    # indexed meshes are compared in their expanded form.
+    if getattr(data, "indexed", False):
+        return {name: data.expanded(name) for name in MESH_STREAMS}
+    return {name: getattr(data, name) for name in MESH_STREAMS}
+
+def info(path):
+    data = open_any(path)
+    print(path)
+    if is_pack(data):
+        print("  entries:   %i, %i bytes" % (len(data), data.header["size"]))
+        for name in data.names:
+            entry = data.entry(name)
+            print("  %-40s offset %10i size %10i position %s" % (name, entry.offset, entry.size, entry.position.tolist()))
+    elif is_mesh(data):
+        print("  name:      %s" % data.name)
+        print("  vertices:  %i%s%s" % (data.vertex_count, "  (indexed, %i indices)" % data.index_count if getattr(data, "indexed", False) else "",
+                                   "  (compact)" if getattr(data, "compact", False) else ""))
+        print("  transform: position %s rotation %s scale %s" % (data.position.tolist(), data.rotation.tolist(), data.scale.tolist()))
+        if getattr(data, "layout", None) is not None:
+            print("  layout:    stride %i, %s" % (data.layout["stride"], ", ".join("%s %s x%i at %i" % attribute for attribute in data.attributes)))
+        for level, lod in enumerate(getattr(data, "lods", [])[1:], 1):
+            print("  lod %i:     lists %i-%i, screen size %.3f" % (level, lod.first_list, lod.first_list + lod.list_count - 1, lod.screen_size))
+        for entry in data.lists:
+            print("  list %-32s offset %8i count %8i colour %.3f %.3f %.3f %.3f" % ((entry.name, entry.first_vertex, entry.vertex_count) + tuple(entry.colour)))
+        if len(getattr(data, "meshlets", [])):
+            print("  meshlets:  %i, %.1f triangles each" % (len(data.meshlets), data.meshlets["triangle_count"].mean()))
+        if getattr(data, "bounds", None) is not None:
+            print("  bounds:    %s - %s, sphere %s radius %g" % (data.bounds["min"].tolist(), data.bounds["max"].tolist(),
+                                                             data.bounds["centre"].tolist(), data.bounds["radius"]))
+        elif data.vertex_count and data.vertices is not None:
+            print("  bounds:    %s - %s" % (data.vertices.min(axis = 0).tolist(), data.vertices.max(axis = 0).tolist()))
+    else:
+        print("  keyframes: %i at %i fps%s%s" % (data.keyframe_count, data.frames_per_second, "  (compact)" if hasattr(data, "packed_rotations") else "",
+                                             "  (%i bones)" % data.bone_count if hasattr(data, "bone_count") else ""))
+        if data.keyframe_count:
+            print("  frames:    %g - %g" % (data.times[0], data.times[-1]))
+
+def diff(path_a, path_b, tolerance):
+    return diff_data(open_any(path_a), open_any(path_b), path_a, path_b, tolerance)
+
+def diff_data(a, b, path_a, path_b, tolerance):
+    failures = []
+    if is_mesh(a) != is_mesh(b) or is_pack(a) != is_pack(b):
+        return ["%s and %s are different kinds of file" % (path_a, path_b)]
+
+    if is_pack(a):
+        # entries are compared one by one, along with their transforms.
+        if a.names != b.names:
+            return ["entries: %s != %s" % (a.names, b.names)]
+        for name in a.names:
+            entry_a, entry_b = a.entry(name), b.entry(name)
+            for field in ("position", "rotation", "scale"):
+                error = float(np.max(np.abs(getattr(entry_a, field) - getattr(entry_b, field))))
+                if error > tolerance:
+                    failures.append("%s %s: max difference %g" % (name, field, error))
+            failures += ["%s %s" % (name, failure) for failure in diff_data(a.open(name), b.open(name), name, name, tolerance)]
+        return failures
+
+    if is_mesh(a):
+        if a.name != b.name:
+            failures.append("name: %r != %r" % (a.name, b.name))
+        lists_a = [(entry.name, entry.vertex_count if not getattr(a, "indexed", False) else entry.index_count) for entry in a.lists]
+        lists_b = [(entry.name, entry.vertex_count if not getattr(b, "indexed", False) else entry.index_count) for entry in b.lists]
+        if lists_a != lists_b:
+            failures.append("vertex lists: %s != %s" % (lists_a, lists_b))
+        pairs = [("position", a.position, b.position), ("rotation", a.rotation, b.rotation), ("scale", a.scale, b.scale)]
+        streams_a, streams_b = mesh_streams(a), mesh_streams(b)
+        pairs += [(name, streams_a[name], streams_b[name]) for name in MESH_STREAMS]
+    else:
+        # rotations are compared as quaternions so compact files diff against float ones.
+        pairs = [(name, getattr(a, name), getattr(b, name)) for name in ANIM_FIELDS]
+        if len(pairs[2][1]) == len(pairs[2][2]):
+            # q and -q are the same rotation.
+            sign  = np.where(np.sum(pairs[2][1] * pairs[2][2], axis = -1) < 0, -1.0, 1.0)
+            pairs[2] = ("quaternions", pairs[2][1] * sign[..., None], pairs[2][2])
+
+    for name, value_a, value_b in pairs:
+        if np.shape(value_a) != np.shape(value_b):
+            failures.append("%s: shape %s != %s" % (name, np.shape(value_a), np.shape(value_b)))
+            continue
+        if np.size(value_a):
+            error = float(np.max(np.abs(np.asarray(value_a, np.float64) - np.asarray(value_b, np.float64))))
+            if error > tolerance:
+                failures.append("%s: max difference %g" % (name, error))
+    return failures
+
+def main(argv = None):
+    parser   = argparse.ArgumentParser(prog = "python -m kat_reader")
+    commands = parser.add_subparsers(dest = "command")
+    info_parser = commands.add_parser("info", help = "print a summary of .kmesh/.kanim/.kpack files")
+    info_parser.add_argument("paths", nargs = "+")
+    diff_parser = commands.add_parser("diff", help = "compare two files, binary or text")
+    diff_parser.add_argument("a")
+    diff_parser.add_argument("b")
+    diff_parser.add_argument("--tolerance", type = float, default = 1e-5)
+    args = parser.parse_args(argv)
+
+    if args.command == "info":
+        for path in args.paths:
+            info(path)
+        return 0
+    if args.command == "diff":
+        failures = diff(args.a, args.b, args.tolerance)
+        for failure in failures:
+            print(failure)
+        return 1 if failures else 0
+    parser.print_help()
+    return 2
+
+if __name__ == "__main__":
+    sys.exit(main())
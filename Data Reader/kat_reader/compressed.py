@@ -0,0 +1,94 @@
+# ========================================================================
+# Section compressed .kmesh/.kanim files, see README.md for the layout.
+# ========================================================================
+
+import lzma
+import zlib
+import concurrent.futures
+
+import numpy as np
+
+from .mapped import MappedFile
+
+MAGIC = b"KATZ"
+
+# section codecs and filters.
+NONE    = 0
+ZLIB    = 1
+LZMA    = 2
+SHUFFLE = 1
+DELTA   = 2
+
+HEADER_DTYPE = np.dtype([
+    ("magic",              "S4"),
+    ("version",            "<u4"),
+    ("section_count",      "<u4"),
+    ("table_offset",       "<u4"),
+    ("size",               "<u8"),
+    ("reserved",           "V8"),
+])
+
+SECTION_DTYPE = np.dtype([
+    ("offset",             "<u8"),
+    ("size",               "<u8"),
+    ("packed_offset",      "<u8"),
+    ("packed_size",        "<u8"),
+    ("codec",              "u1"),
+    ("filter",             "u1"),
+    ("padding",            "V6"),
+])
+
+def is_compressed(path):
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+def unfilter_section(data, section_filter):
+    words = np.ascontiguousarray(np.frombuffer(data, dtype = np.uint8).reshape(4, -1).T).view('<u4').ravel()
+    if section_filter == DELTA:
+        words = np.cumsum(words, dtype = np.uint32)
+    return words
+
+def decompress_section(packed, codec, section_filter):
+    data = packed
+    if codec == ZLIB:
+        data = zlib.decompress(packed)
+    elif codec == LZMA:
+        data = lzma.decompress(packed)
+    if section_filter != NONE:
+        data = unfilter_section(data, section_filter)
+    return data
+
+class DecompressedFile(MappedFile):
+    """A compressed file decompressed into memory, its sections on parallel threads, read like a MappedFile."""
+
+    def __init__(self, path, workers = None):
+        self.path = path
+        packed    = MappedFile(path)
+        try:
+            header = packed.array(HEADER_DTYPE, 1, 0)[0]
+            if header["magic"] != MAGIC or header["version"] != 1:
+                raise ValueError("%s: not a version 1 compressed file" % path)
+            table = packed.array(SECTION_DTYPE, int(header["section_count"]), int(header["table_offset"]))
+            self._map = bytearray(int(header["size"]))
+            self.buffer = memoryview(self._map)
+
+            def decompress(entry):
+                start, size = int(entry["offset"]), int(entry["size"])
+                source = packed.buffer[int(entry["packed_offset"]):int(entry["packed_offset"]) + int(entry["packed_size"])]
+                data   = decompress_section(source, int(entry["codec"]), int(entry["filter"]))
+                if len(memoryview(data).cast('B')) != size:
+                    raise ValueError("%s: section at %i decompressed to the wrong size" % (path, start))
+                self.buffer[start:start + size] = memoryview(data).cast('B')
+
+            with concurrent.futures.ThreadPoolExecutor(max_workers = workers) as pool:
+                list(pool.map(decompress, table))
+        finally:
+            table = header = None
+            packed.close()
+
+    def close(self):
+        self.buffer.release()
+
+def open_mapped(path):
+    """The file's MappedFile, or its DecompressedFile when it is section compressed."""
+    return DecompressedFile(path) if is_compressed(path) else MappedFile(path)
@@ -0,0 +1,326 @@
+# ========================================================================
+# Binary Kat Animation (.kanim) reader, see README.md for the layout.
+# ========================================================================
+
+from collections import namedtuple
+
+import numpy as np
+
+from .compressed import open_mapped
+
+HEADER_SIZE = 8
+
+HEADER_DTYPE = np.dtype([
+    ("keyframe_count",     "<u4"),
+    ("frames_per_second",  "<u4"),
+])
+
+KEYFRAME_DTYPE = np.dtype([
+    ("time",               "<f4"),
+    ("position",           "<f4", 3),
+    ("rotation",           "<f4", 3),
+    ("scale",              "<f4", 3),
+])
+
+# compact .kanim, written by the binary exporter's "Compact" option.
+COMPACT_MAGIC = b"KANQ"
+
+COMPACT_HEADER_DTYPE = np.dtype([
+    ("magic",              "S4"),
+    ("version",            "<u4"),
+    ("keyframe_count",     "<u4"),
+    ("frames_per_second",  "<u4"),
+    ("flags",              "<u4"),
+    ("first_frame",        "<i4"),
+    ("time_index_count",   "<u4"),
+    ("first_time",         "<f4"),
+    ("time_step",          "<f4"),
+    ("position_min",       "<f4", 3),
+    ("position_step",      "<f4", 3),
+    ("scale_min",          "<f4", 3),
+    ("scale_step",         "<f4", 3),
+])
+
+CONSTANT_POSITION = 1 << 0
+CONSTANT_SCALE    = 1 << 1
+UNIFORM_TIMES     = 1 << 2
+
+# skeletal .kanim, written by the binary exporter for armatures.
+SKELETON_MAGIC = b"KANS"
+
+SKELETON_HEADER_DTYPE = np.dtype([
+    ("magic",              "S4"),
+    ("version",            "<u4"),
+    ("bone_count",         "<u4"),
+    ("keyframe_count",     "<u4"),
+    ("frames_per_second",  "<u4"),
+    ("bones_offset",       "<u4"),
+    ("times_offset",       "<u4"),
+    ("tracks_offset",      "<u4"),
+])
+
+BONE_DTYPE = np.dtype([
+    ("name",               "S32"),
+    ("parent",             "<i4"),
+    ("position",           "<f4", 3),
+    ("rotation",           "<f4", 4),
+    ("scale",              "<f4", 3),
+    ("padding",            "V4"),
+])
+
+Bone = namedtuple("Bone", "name parent position rotation scale")
+
+SQRT1_2 = 0.7071067811865476
+
+def euler_quaternions(rotations):
+    """Kat euler rotations as unit quaternions (x,y,z,w) in kat axes, like the compact format."""
+    # the exporter stores blender's (y,z,x) angles as positive radians, i.e. negated mod 2 pi.
+    rotations  = -np.asarray(rotations, dtype = np.float64)[:, [2, 0, 1]]
+    cx, cy, cz = np.cos(rotations * 0.5).T
+    sx, sy, sz = np.sin(rotations * 0.5).T
+    w = cx*cy*cz + sx*sy*sz
+    x = sx*cy*cz - cx*sy*sz
+    y = cx*sy*cz + sx*cy*sz
+    z = cx*cy*sz - sx*sy*cz
+    return np.stack([-y, -z, x, w], axis = 1)
+
+def unpack_quaternions(packed):
+    """Smallest-three 2+10+10+10 bit quaternions -> (n, 4) x,y,z,w."""
+    packed  = np.asarray(packed, dtype = np.uint32)
+    rows    = np.arange(len(packed))
+    largest = (packed >> 30).astype(np.intp)
+    bits    = np.stack([(packed >> 20) & 1023, (packed >> 10) & 1023, packed & 1023], axis = 1)
+    rest    = bits * ((2 * SQRT1_2) / 1023) - SQRT1_2
+
+    quaternions = np.empty((len(packed), 4), dtype = np.float64)
+    others = np.ones(quaternions.shape, dtype = bool)
+    others[rows, largest] = False
+    quaternions[others] = rest.ravel()
+    quaternions[rows, largest] = np.sqrt(np.maximum(0.0, 1.0 - np.sum(rest * rest, axis = 1)))
+    return quaternions
+
+def decode_name(raw):
+    return raw.split(b"\0", 1)[0].decode('utf-8')
+
+def is_compact_kanim(path):
+    with open(path, 'rb') as f:
+        return f.read(len(COMPACT_MAGIC)) == COMPACT_MAGIC
+
+def is_skeleton_kanim(path):
+    with open(path, 'rb') as f:
+        return f.read(len(SKELETON_MAGIC)) == SKELETON_MAGIC
+
+def is_binary_kanim(path):
+    with open(path, 'rb') as f:
+        start = f.read(len(b"keyframes"))
+    return start != b"keyframes"
+
+class KAnim:
+    """Memory-mapped binary .kanim, the keyframes are a zero-copy structured view."""
+
+    def __init__(self, path, mapped = None):
+        self._map = mapped if mapped is not None else open_mapped(path)
+        try:
+            header = self._map.array(HEADER_DTYPE, 1, 0)[0]
+            self.keyframe_count    = int(header["keyframe_count"])
+            self.frames_per_second = int(header["frames_per_second"])
+            self.keyframes = self._map.array(KEYFRAME_DTYPE, self.keyframe_count, HEADER_SIZE)
+        except Exception:
+            self._map.close()
+            raise
+
+    @property
+    def times(self):
+        return self.keyframes["time"]
+
+    @property
+    def positions(self):
+        return self.keyframes["position"]
+
+    @property
+    def rotations(self):
+        return self.keyframes["rotation"]
+
+    @property
+    def scales(self):
+        return self.keyframes["scale"]
+
+    @property
+    def quaternions(self):
+        return euler_quaternions(self.rotations)
+
+    def close(self):
+        self.__dict__.pop("keyframes", None)
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class KAnimCompact:
+    """Memory-mapped compact .kanim, times and the time index are zero-copy, channels decode on access."""
+
+    def __init__(self, path, mapped = None):
+        self._map = mapped if mapped is not None else open_mapped(path)
+        try:
+            header = self._map.array(COMPACT_HEADER_DTYPE, 1, 0)[0]
+            if header["magic"] != COMPACT_MAGIC or header["version"] != 1:
+                raise ValueError("%s: not a version 1 compact .kanim" % path)
+            self.header            = header
+            self.keyframe_count    = count = int(header["keyframe_count"])
+            self.frames_per_second = int(header["frames_per_second"])
+            self.flags             = int(header["flags"])
+            self.first_frame       = int(header["first_frame"])
+
+            offset = COMPACT_HEADER_DTYPE.itemsize
+            self.packed_rotations = self._map.array("<u4", count, offset)
+            offset += 4 * count
+            if self.flags & UNIFORM_TIMES:
+                self.times      = (header["first_time"] + header["time_step"] * np.arange(count)).astype(np.float32)
+                self.time_index = None
+            else:
+                self.times      = self._map.array("<f4", count, offset)
+                offset += 4 * count
+                index_dtype     = "<u2" if count <= 65536 else "<u4"
+                self.time_index = self._map.array(index_dtype, int(header["time_index_count"]), offset)
+                offset += self.time_index.nbytes
+            self.packed_positions = None
+            if not self.flags & CONSTANT_POSITION:
+                self.packed_positions = self._map.array("<u2", count * 3, offset, (count, 3))
+                offset += 6 * count
+            self.packed_scales = None
+            if not self.flags & CONSTANT_SCALE:
+                self.packed_scales = self._map.array("<u2", count * 3, offset, (count, 3))
+        except Exception:
+            self._map.close()
+            raise
+
+    def _dequantize(self, packed, name):
+        minimum, step = self.header[name + "_min"], self.header[name + "_step"]
+        if packed is None:
+            return np.tile(minimum, (self.keyframe_count, 1))
+        return (minimum + packed * step).astype(np.float32)
+
+    @property
+    def positions(self):
+        return self._dequantize(self.packed_positions, "position")
+
+    @property
+    def scales(self):
+        return self._dequantize(self.packed_scales, "scale")
+
+    @property
+    def quaternions(self):
+        return unpack_quaternions(self.packed_rotations)
+
+    def seek(self, time):
+        """Index of the last keyframe at or before time."""
+        if self.keyframe_count == 0:
+            return 0
+        if self.time_index is None:
+            step = float(self.header["time_step"])
+            key  = int(np.floor((time - float(self.header["first_time"])) / step + 1e-6)) if step > 0 else 0
+            return min(max(key, 0), self.keyframe_count - 1)
+        frame = int(np.floor(time)) - self.first_frame
+        if frame < 0:
+            return 0
+        key = int(self.time_index[min(frame, len(self.time_index) - 1)])
+        # baked keys can fall between whole frames.
+        while key + 1 < self.keyframe_count and self.times[key + 1] <= time:
+            key += 1
+        return key
+
+    def close(self):
+        for name in ("times", "time_index", "packed_rotations", "packed_positions", "packed_scales", "header"):
+            self.__dict__.pop(name, None)
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class KAnimSkeleton:
+    """Memory-mapped skeletal .kanim, each keyframe holds every bone's position, rotation and scale as zero-copy views."""
+
+    def __init__(self, path, mapped = None):
+        self._map = mapped if mapped is not None else open_mapped(path)
+        try:
+            header = self._map.array(SKELETON_HEADER_DTYPE, 1, 0)[0]
+            if header["magic"] != SKELETON_MAGIC or header["version"] != 1:
+                raise ValueError("%s: not a version 1 skeletal .kanim" % path)
+            self.header            = header
+            self.bone_count        = bones = int(header["bone_count"])
+            self.keyframe_count    = count = int(header["keyframe_count"])
+            self.frames_per_second = int(header["frames_per_second"])
+            self.bone_table = self._map.array(BONE_DTYPE, bones, int(header["bones_offset"]))
+            self.times      = self._map.array("<f4", count, int(header["times_offset"]))
+
+            # one record per keyframe: positions, rotations and scales of all bones.
+            keyframe    = np.dtype([("positions", "<f4", (bones, 3)), ("rotations", "<f4", (bones, 4)), ("scales", "<f4", (bones, 3))])
+            self.tracks = self._map.array(keyframe, count, int(header["tracks_offset"]))
+        except Exception:
+            self._map.close()
+            raise
+
+    @property
+    def bones(self):
+        return [Bone(decode_name(entry["name"]), int(entry["parent"]), entry["position"], entry["rotation"], entry["scale"])
+                for entry in self.bone_table]
+
+    @property
+    def parents(self):
+        return self.bone_table["parent"]
+
+    def bone_index(self, name):
+        return [bone.name for bone in self.bones].index(name)
+
+    @property
+    def positions(self):
+        return self.tracks["positions"]
+
+    @property
+    def quaternions(self):
+        return self.tracks["rotations"]
+
+    @property
+    def scales(self):
+        return self.tracks["scales"]
+
+    def sample(self, time):
+        """Every bone at time: positions, rotations (normalized lerp) and scales, from two contiguous keyframes."""
+        if self.keyframe_count == 0:
+            raise ValueError("no keyframes to sample")
+        key = min(max(int(np.searchsorted(self.times, time, side = 'right')) - 1, 0), self.keyframe_count - 1)
+        nxt = min(key + 1, self.keyframe_count - 1)
+        span = float(self.times[nxt] - self.times[key])
+        t    = min(max((time - float(self.times[key])) / span, 0.0), 1.0) if span > 0 else 0.0
+        a, b = self.tracks[key], self.tracks[nxt]
+
+        rotations = a["rotations"] + t * (b["rotations"] - a["rotations"])
+        rotations = rotations / np.linalg.norm(rotations, axis = 1, keepdims = True)
+        return (a["positions"] + t * (b["positions"] - a["positions"]), rotations,
+                a["scales"] + t * (b["scales"] - a["scales"]))
+
+    def close(self):
+        for name in ("header", "bone_table", "times", "tracks"):
+            self.__dict__.pop(name, None)
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def open_kanim(path):
+    mapped = open_mapped(path)
+    magic  = bytes(mapped.buffer[:4])
+    if magic == COMPACT_MAGIC:
+        return KAnimCompact(path, mapped)
+    if magic == SKELETON_MAGIC:
+        return KAnimSkeleton(path, mapped)
+    return KAnim(path, mapped)
@@ -0,0 +1,357 @@
+# ========================================================================
+# Binary Kat Mesh (.kmesh) reader, see README.md for the layout.
+# ========================================================================
+
+from collections import namedtuple
+
+import numpy as np
+
+from .compressed import open_mapped
+
+HEADER_SIZE = 72
+
+# extended header flags.
+KMESH_INDEXED             = 1 << 0
+KMESH_COMPACT             = 1 << 1
+KMESH_QUANTIZED_POSITIONS = 1 << 2
+KMESH_LODS                = 1 << 3
+KMESH_BOUNDS              = 1 << 4
+KMESH_MESHLETS            = 1 << 5
+KMESH_INTERLEAVED         = 1 << 6
+
+HEADER_DTYPE = np.dtype([
+    ("name",               "S32"),
+    ("size",               "<u4"),
+    ("vertex_count",       "<u4"),
+    ("list_count",         "<u4"),
+    ("transform_offset",   "<u4"),
+    ("vertices_offset",    "<u4"),
+    ("normals_offset",     "<u4"),
+    ("binormals_offset",   "<u4"),
+    ("tangents_offset",    "<u4"),
+    ("uvs_offset",         "<u4"),
+    ("lists_offset",       "<u4"),
+])
+
+EXTENDED_HEADER_DTYPE = np.dtype([
+    ("flags",              "<u4"),
+    ("index_count",        "<u4"),
+    ("index_size",         "<u4"),
+    ("indices_offset",     "<u4"),
+])
+
+# follows the extended header with KMESH_QUANTIZED_POSITIONS.
+QUANTIZATION_DTYPE = np.dtype([
+    ("position_min",       "<f4", 3),
+    ("position_step",      "<f4", 3),
+])
+
+# with KMESH_LODS, a count and then one entry per level of detail.
+LOD_DTYPE = np.dtype([
+    ("first_list",         "<u4"),
+    ("list_count",         "<u4"),
+    ("screen_size",        "<f4"),
+])
+
+# with KMESH_BOUNDS, once for the whole mesh after the lod table and at the end of each list entry.
+BOUNDS_DTYPE = np.dtype([
+    ("min",                "<f4", 3),
+    ("max",                "<f4", 3),
+    ("centre",             "<f4", 3),
+    ("radius",             "<f4"),
+])
+
+# with KMESH_MESHLETS, the count and offset of the table follow the mesh bounds.
+MESHLET_DTYPE = np.dtype([
+    ("list",               "<u4"),
+    ("first_triangle",     "<u4"),
+    ("triangle_count",     "<u4"),
+    ("padding",            "V4"),
+] + BOUNDS_DTYPE.descr)
+
+# with KMESH_INTERLEAVED, after the meshlet table location, followed by one
+# attribute descriptor per attribute in the vertex.
+LAYOUT_DTYPE = np.dtype([
+    ("stride",             "<u4"),
+    ("attribute_count",    "<u4"),
+    ("buffer_offset",      "<u4"),
+    ("buffer_size",        "<u4"),
+])
+
+ATTRIBUTE_DTYPE = np.dtype([
+    ("attribute",          "u1"),
+    ("format",             "u1"),
+    ("components",         "u1"),
+    ("offset",             "u1"),
+])
+
+VERTEX_ATTRIBUTES = ("position", "normal", "binormal", "tangent", "uv")
+VERTEX_FORMATS    = ("<f4", "<f2", "<i2", "<u2")   # float32, float16, snorm16, unorm16.
+
+TRANSFORM_DTYPE = np.dtype([
+    ("position",           "<f4", 3),
+    ("rotation",           "<f4", 3),
+    ("scale",              "<f4", 3),
+])
+
+LIST_DTYPE = np.dtype([
+    ("name",               "S32"),
+    ("first_vertex",       "<u4"),
+    ("vertex_count",       "<u4"),
+    ("colour",             "<f4", 4),
+])
+
+INDEXED_LIST_DTYPE = np.dtype(LIST_DTYPE.descr + [
+    ("first_index",        "<u4"),
+    ("index_count",        "<u4"),
+])
+
+def list_dtype(flags):
+    descr = (INDEXED_LIST_DTYPE if flags & KMESH_INDEXED else LIST_DTYPE).descr
+    if flags & KMESH_BOUNDS:
+        descr = descr + BOUNDS_DTYPE.descr
+    return np.dtype(descr)
+
+VertexAttribute = namedtuple("VertexAttribute", "name format components offset")
+VertexList = namedtuple("VertexList", "name first_vertex vertex_count colour first_index index_count")
+LOD        = namedtuple("LOD", "first_list list_count screen_size")
+
+def decode_name(raw):
+    return raw.split(b"\0", 1)[0].decode('ascii')
+
+# zero vectors, the tangents left out by the exporter's Normal Mapped Tangents Only.
+OCTAHEDRAL_ZERO = -32768
+
+def decode_octahedral(packed):
+    """2 x snorm16 octahedral coordinates -> unit vectors, the reserved -32768, -32768 -> zero."""
+    packed  = np.asarray(packed)
+    folded  = packed.astype(np.float32) / 32767
+    z       = 1.0 - np.abs(folded[:, 0]) - np.abs(folded[:, 1])
+    t       = np.maximum(-z, 0.0)
+    x       = folded[:, 0] - np.where(folded[:, 0] >= 0, t, -t)
+    y       = folded[:, 1] - np.where(folded[:, 1] >= 0, t, -t)
+    vectors = np.stack([x, y, z], axis = 1)
+    vectors = vectors / np.linalg.norm(vectors, axis = 1, keepdims = True)
+    vectors[packed[:, 0] == OCTAHEDRAL_ZERO] = 0.0
+    return vectors
+
+def is_binary_kmesh(path):
+    with open(path, 'rb') as f:
+        start = f.read(256)
+    # a text .kmesh starts with its name line followed by the vertex count line.
+    return not (start.startswith(b"name: ") and b"vertex   count:" in start)
+
+class KMesh:
+    """Memory-mapped binary .kmesh, every stream is a zero-copy view (compact streams are decoded)."""
+
+    def __init__(self, path, mapped = None):
+        self._map = mapped if mapped is not None else open_mapped(path)
+        try:
+            self._parse()
+        except Exception:
+            self._map.close()
+            raise
+
+    def _parse(self):
+        header = self._map.array(HEADER_DTYPE, 1, 0)[0]
+        self.header = header
+        self.name   = decode_name(header["name"])
+        self.size   = int(header["size"])
+        self.vertex_count = int(header["vertex_count"])
+        self.list_count   = int(header["list_count"])
+
+        # the extended header sits between the header and the mesh transform.
+        transform_offset = int(header["transform_offset"])
+        self.flags       = 0
+        self.index_count = 0
+        self.index_size  = 0
+        indices_offset   = 0
+        if transform_offset >= HEADER_SIZE + EXTENDED_HEADER_DTYPE.itemsize:
+            extended = self._map.array(EXTENDED_HEADER_DTYPE, 1, HEADER_SIZE)[0]
+            self.extended_header = extended
+            self.flags       = int(extended["flags"])
+            self.index_count = int(extended["index_count"])
+            self.index_size  = int(extended["index_size"])
+            indices_offset   = int(extended["indices_offset"])
+
+        # the lod table, the mesh bounds and the meshlet table location follow the
+        # extended header and the quantization block, in that order.
+        offset = HEADER_SIZE + EXTENDED_HEADER_DTYPE.itemsize
+        if self.flags & KMESH_QUANTIZED_POSITIONS:
+            offset += QUANTIZATION_DTYPE.itemsize
+        self.lods = [LOD(0, self.list_count, 1.0)]
+        if self.flags & KMESH_LODS:
+            count     = int(self._map.array("<u4", 1, offset)[0])
+            self.lods = [LOD(int(entry["first_list"]), int(entry["list_count"]), float(entry["screen_size"]))
+                         for entry in self._map.array(LOD_DTYPE, count, offset + 4)]
+            offset   += 4 + count * LOD_DTYPE.itemsize
+        self.bounds = None
+        if self.flags & KMESH_BOUNDS:
+            self.bounds = self._map.array(BOUNDS_DTYPE, 1, offset)[0]
+            offset     += BOUNDS_DTYPE.itemsize
+        self.meshlets = np.zeros(0, dtype = MESHLET_DTYPE)
+        if self.flags & KMESH_MESHLETS:
+            count, meshlets_offset = (int(value) for value in self._map.array("<u4", 2, offset))
+            self.meshlets = self._map.array(MESHLET_DTYPE, count, meshlets_offset)
+            offset       += 8
+        self.layout = None
+        if self.flags & KMESH_INTERLEAVED:
+            self.layout     = self._map.array(LAYOUT_DTYPE, 1, offset)[0]
+            self.attributes = [VertexAttribute(VERTEX_ATTRIBUTES[entry["attribute"]], VERTEX_FORMATS[entry["format"]],
+                                               int(entry["components"]), int(entry["offset"]))
+                               for entry in self._map.array(ATTRIBUTE_DTYPE, int(self.layout["attribute_count"]),
+                                                            offset + LAYOUT_DTYPE.itemsize)]
+
+        transform = self._map.array(TRANSFORM_DTYPE, 1, transform_offset)[0]
+        self.position = transform["position"]
+        self.rotation = transform["rotation"]
+        self.scale    = transform["scale"]
+
+        self.list_table = self._map.array(list_dtype(self.flags), self.list_count, int(header["lists_offset"]))
+
+        count = self.vertex_count
+        if self.interleaved:
+            self._parse_interleaved(count)
+        elif self.compact:
+            self._parse_compact(header, count)
+        else:
+            self.vertices  = self._map.array("<f4", count * 3, int(header["vertices_offset"]),  (count, 3))
+            self.normals   = self._map.array("<f4", count * 3, int(header["normals_offset"]),   (count, 3))
+            self.binormals = self._map.array("<f4", count * 3, int(header["binormals_offset"]), (count, 3))
+            self.tangents  = self._map.array("<f4", count * 3, int(header["tangents_offset"]),  (count, 3))
+            self.uvs       = self._map.array("<f4", count * 2, int(header["uvs_offset"]),       (count, 2))
+
+        self.indices = None
+        if self.indexed:
+            index_dtype  = {2: "<u2", 4: "<u4"}[self.index_size]
+            self.indices = self._map.array(index_dtype, self.index_count, indices_offset)
+
+    def _parse_compact(self, header, count):
+        # the packed streams are zero-copy views, the float streams are decoded copies.
+        if self.flags & KMESH_QUANTIZED_POSITIONS:
+            quantization = self._map.array(QUANTIZATION_DTYPE, 1, HEADER_SIZE + EXTENDED_HEADER_DTYPE.itemsize)[0]
+            self.packed_vertices = self._map.array("<u2", count * 3, int(header["vertices_offset"]), (count, 3))
+            self.vertices = (quantization["position_min"] + self.packed_vertices * quantization["position_step"]).astype(np.float32)
+        else:
+            self.packed_vertices = self.vertices = self._map.array("<f4", count * 3, int(header["vertices_offset"]), (count, 3))
+        self.packed_normals  = self._map.array("<i2", count * 2, int(header["normals_offset"]),  (count, 2))
+        self.packed_tangents = self._map.array("<i2", count * 2, int(header["tangents_offset"]), (count, 2))
+        self.binormal_signs  = self._map.array("<u1", (count + 7) // 8, int(header["binormals_offset"]))
+        self.packed_uvs      = self._map.array("<f2", count * 2, int(header["uvs_offset"]), (count, 2))
+
+        self.normals   = decode_octahedral(self.packed_normals)
+        self.tangents  = decode_octahedral(self.packed_tangents)
+        negative       = np.unpackbits(self.binormal_signs, count = count, bitorder = 'little').astype(bool)
+        self.binormals = np.cross(self.normals, self.tangents) * np.where(negative, -1.0, 1.0).astype(np.float32)[:, None]
+        self.uvs       = self.packed_uvs.astype(np.float32)
+
+    def _parse_interleaved(self, count):
+        # the vertex buffer is one zero-copy view, each attribute a strided view of it,
+        # packed attributes are decoded like compact streams. left out attributes are None.
+        dtype = np.dtype({"names":    [attribute.name for attribute in self.attributes],
+                          "formats":  [(attribute.format, attribute.components) for attribute in self.attributes],
+                          "offsets":  [attribute.offset for attribute in self.attributes],
+                          "itemsize": int(self.layout["stride"])})
+        self.vertex_buffer = self._map.array(dtype, count, int(self.layout["buffer_offset"]))
+        for name in ("vertices", "normals", "binormals", "tangents", "uvs"):
+            setattr(self, name, None)
+        
+        names = dict(zip(VERTEX_ATTRIBUTES, ("vertices", "normals", "binormals", "tangents", "uvs")))
+        for attribute in self.attributes:
+            values = self.vertex_buffer[attribute.name]
+            if attribute.format == "<u2":
+                quantization = self._map.array(QUANTIZATION_DTYPE, 1, HEADER_SIZE + EXTENDED_HEADER_DTYPE.itemsize)[0]
+                values = (quantization["position_min"] + values * quantization["position_step"]).astype(np.float32)
+            elif attribute.format == "<i2":
+                values = decode_octahedral(values)
+            elif attribute.format == "<f2":
+                values = values.astype(np.float32)
+            setattr(self, names[attribute.name], values)
+
+    @property
+    def indexed(self):
+        return bool(self.flags & KMESH_INDEXED)
+
+    @property
+    def compact(self):
+        return bool(self.flags & KMESH_COMPACT)
+
+    @property
+    def interleaved(self):
+        return bool(self.flags & KMESH_INTERLEAVED)
+
+    @property
+    def lists(self):
+        lists = []
+        for entry in self.list_table:
+            lists.append(VertexList(
+                decode_name(entry["name"]),
+                int(entry["first_vertex"]),
+                int(entry["vertex_count"]),
+                tuple(float(value) for value in entry["colour"]),
+                int(entry["first_index"]) if self.indexed else None,
+                int(entry["index_count"]) if self.indexed else None,
+            ))
+        return lists
+
+    @property
+    def list_bounds(self):
+        """Bounds of every vertex list (min, max, centre, radius), None without KMESH_BOUNDS."""
+        if not self.flags & KMESH_BOUNDS:
+            return None
+        return self.list_table[list(BOUNDS_DTYPE.names)]
+
+    def list_meshlets(self, index):
+        """The meshlets of one vertex list, first_triangle counts from the start of the list."""
+        return self.meshlets[self.meshlets["list"] == index]
+
+    def lod_for(self, screen_size):
+        """Level of detail to draw at screen_size, the last one whose screen size is at or above it."""
+        level = 0
+        for index, lod in enumerate(self.lods):
+            if screen_size <= lod.screen_size:
+                level = index
+        return level
+
+    def lod_lists(self, level):
+        """The vertex lists of one level of detail."""
+        lod = self.lods[level]
+        return self.lists[lod.first_list:lod.first_list + lod.list_count]
+
+    def list_streams(self, index):
+        """Views of one vertex list: vertices, normals, binormals, tangents, uvs (and indices)."""
+        entry = self.lists[index]
+        part  = slice(entry.first_vertex, entry.first_vertex + entry.vertex_count)
+        streams = {name: None if getattr(self, name) is None else getattr(self, name)[part]
+                   for name in ("vertices", "normals", "binormals", "tangents", "uvs")}
+        if self.indexed:
+            streams["indices"] = self.indices[entry.first_index:entry.first_index + entry.index_count]
+        return streams
+
+    def expanded(self, name):
+        """One stream with indexed lists expanded back to three vertices per triangle (a copy)."""
+        stream = getattr(self, name)
+        if stream is None:
+            return None
+        if not self.indexed:
+            return np.array(stream)
+        parts = [stream[entry.first_vertex:][self.indices[entry.first_index:entry.first_index + entry.index_count]]
+                 for entry in self.lists]
+        return np.concatenate(parts) if parts else stream[:0].copy()
+
+    def close(self):
+        for name in ("header", "extended_header", "list_table", "bounds", "meshlets", "layout", "vertex_buffer",
+                     "position", "rotation", "scale",
+                     "vertices", "normals", "binormals", "tangents", "uvs", "indices",
+                     "packed_vertices", "packed_normals", "packed_tangents", "binormal_signs", "packed_uvs"):
+            self.__dict__.pop(name, None)
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def open_kmesh(path):
+    return KMesh(path)
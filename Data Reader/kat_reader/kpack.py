@@ -0,0 +1,113 @@
+# ========================================================================
+# Kat Pack (.kpack) archive reader, see README.md for the layout.
+# ========================================================================
+
+from collections import namedtuple
+
+import numpy as np
+
+from .mapped import MappedFile
+from .kmesh  import KMesh
+from .kanim  import KAnim, KAnimCompact, KAnimSkeleton, COMPACT_MAGIC, SKELETON_MAGIC
+
+MAGIC     = b"KPAK"
+ALIGNMENT = 16
+
+# entry types.
+KMESH = 0
+KANIM = 1
+
+HEADER_DTYPE = np.dtype([
+    ("magic",              "S4"),
+    ("version",            "<u4"),
+    ("entry_count",        "<u4"),
+    ("toc_offset",         "<u4"),
+    ("size",               "<u8"),
+    ("reserved",           "V8"),
+])
+
+ENTRY_DTYPE = np.dtype([
+    ("name",               "S96"),
+    ("type",               "<u4"),
+    ("flags",              "<u4"),
+    ("offset",             "<u8"),
+    ("size",               "<u8"),
+    ("position",           "<f4", 3),
+    ("rotation",           "<f4", 3),
+    ("scale",              "<f4", 3),
+    ("padding",            "V4"),
+])
+
+PackEntry = namedtuple("PackEntry", "name type offset size position rotation scale")
+
+def is_kpack(path):
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+class KPack:
+    """Memory-mapped .kpack, entries are found by binary search and opened as zero-copy sections."""
+
+    def __init__(self, path):
+        self._map = MappedFile(path)
+        try:
+            header = self._map.array(HEADER_DTYPE, 1, 0)[0]
+            if header["magic"] != MAGIC or header["version"] != 1:
+                raise ValueError("%s: not a version 1 .kpack" % path)
+            self.header = header
+            self.toc    = self._map.array(ENTRY_DTYPE, int(header["entry_count"]), int(header["toc_offset"]))
+        except Exception:
+            self._map.close()
+            raise
+
+    def __len__(self):
+        return len(self.toc)
+
+    @property
+    def names(self):
+        return [name.decode('utf-8') for name in self.toc["name"]]
+
+    def find(self, name):
+        """Index of an entry by name, None when absent, the table is sorted so this is a binary search."""
+        key   = name.encode('utf-8')
+        index = int(np.searchsorted(self.toc["name"], key))
+        if index < len(self.toc) and self.toc["name"][index] == key:
+            return index
+        return None
+
+    def entry(self, name):
+        index = self.find(name)
+        if index is None:
+            raise KeyError(name)
+        entry = self.toc[index]
+        return PackEntry(name, int(entry["type"]), int(entry["offset"]), int(entry["size"]),
+                         entry["position"], entry["rotation"], entry["scale"])
+
+    def open(self, name):
+        """The entry's KMesh, KAnim, KAnimCompact or KAnimSkeleton, reading straight from the pack's map."""
+        entry   = self.entry(name)
+        section = self._map.section(entry.offset, entry.size)
+        if entry.type == KMESH:
+            return KMesh(section.path, section)
+        magic = bytes(section.buffer[:4])
+        if magic == COMPACT_MAGIC:
+            return KAnimCompact(section.path, section)
+        if magic == SKELETON_MAGIC:
+            return KAnimSkeleton(section.path, section)
+        return KAnim(section.path, section)
+
+    def __contains__(self, name):
+        return self.find(name) is not None
+
+    def close(self):
+        self.__dict__.pop("header", None)
+        self.__dict__.pop("toc", None)
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def open_kpack(path):
+    return KPack(path)
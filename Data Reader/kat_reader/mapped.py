@@ -0,0 +1,57 @@
+# ========================================================================
+# Read-only memory map shared by the binary readers.
+# ========================================================================
+
+import mmap
+import numpy as np
+
+class MappedFile:
+    """Read-only memory map of a file, closed with the reader."""
+
+    def __init__(self, path):
+        self.path  = path
+        self._file = open(path, 'rb')
+        try:
+            # mmap refuses empty files, those are read as an empty buffer.
+            self._map = mmap.mmap(self._file.fileno(), 0, access = mmap.ACCESS_READ)
+        except ValueError:
+            self._map = b""
+        self.buffer = memoryview(self._map)
+
+    def __len__(self):
+        return len(self.buffer)
+
+    def array(self, dtype, count, offset, shape = None):
+        dtype = np.dtype(dtype)
+        if offset + count * dtype.itemsize > len(self.buffer):
+            raise ValueError("%s: %i x %s at offset %i runs past the end of the file (%i bytes)"
+                             % (self.path, count, dtype, offset, len(self.buffer)))
+        view = np.frombuffer(self.buffer, dtype = dtype, count = count, offset = offset)
+        return view if shape is None else view.reshape(shape)
+
+    def section(self, offset, size):
+        """A part of the map read as a file of its own, offsets start at the section."""
+        return MappedSection(self, offset, size)
+
+    def close(self):
+        # numpy views keep the map alive until they are released.
+        self.buffer.release()
+        if isinstance(self._map, mmap.mmap):
+            try:
+                self._map.close()
+            except BufferError:
+                pass
+        self._file.close()
+
+class MappedSection(MappedFile):
+    """Zero-copy slice of a MappedFile, the parent owns the map."""
+
+    def __init__(self, parent, offset, size):
+        if offset + size > len(parent.buffer):
+            raise ValueError("%s: %i bytes at offset %i run past the end of the file (%i bytes)"
+                             % (parent.path, size, offset, len(parent.buffer)))
+        self.path   = "%s@%i" % (parent.path, offset)
+        self.buffer = parent.buffer[offset:offset + size]
+
+    def close(self):
+        self.buffer.release()
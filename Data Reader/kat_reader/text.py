@@ -0,0 +1,169 @@
+# ========================================================================
+# Streaming parsers for the text Kat Mesh / Kat Animation formats.
+#
+# the files are read line by line and the streams are filled in chunks,
+# memory stays at the size of the parsed arrays.
+# ========================================================================
+
+import re
+import numpy as np
+
+from .kanim import KEYFRAME_DTYPE, euler_quaternions
+from .kmesh import VertexList
+
+LIST_LINE  = re.compile(r"^\((.*) offset:(\d+) count:(\d+) colour:(\S+) (\S+) (\S+) (\S+)\)$")
+VALUE_LINE = re.compile(r"^\[(.*)\] (\S+), (\S+), (\S+)$")
+
+MESH_SECTIONS = {"vertex": ("vertices", 3), "uv": ("uvs", 2), "normal": ("normals", 3),
+                 "binormal": ("binormals", 3), "tangent": ("tangents", 3)}
+
+def read_lines(path):
+    with open(path, 'r', encoding = 'utf-8') as f:
+        for line in f:
+            # vertex components are left padded with NUL characters.
+            yield line.replace("\0", "").strip()
+
+def parse_floats(text):
+    return [float(value) for value in text.split()]
+
+def iter_kmesh_text(path, chunk_rows = 65536):
+    """Yield ("header", dict) then (stream name, float32 chunk) pairs in file order."""
+    lines  = read_lines(path)
+    header = {"lists": []}
+
+    for line in lines:
+        if line.startswith("name:"):
+            header["name"] = line[len("name:"):].strip()
+        elif line.startswith("vertex   count:"):
+            header["vertex_count"] = int(line.split(":")[1])
+        elif line.startswith("material count:"):
+            header["list_count"] = int(line.split(":")[1])
+        elif line.startswith("("):
+            match = LIST_LINE.match(line)
+            if match is None:
+                raise ValueError("%s: bad vertex list line %r" % (path, line))
+            name, offset, count = match.group(1), int(match.group(2)), int(match.group(3))
+            colour = tuple(float(match.group(i)) for i in range(4, 8))
+            header["lists"].append(VertexList(name, offset, count, colour, None, None))
+        elif line.startswith("position:"):
+            header["position"] = parse_floats(line[len("position:"):])
+        elif line.startswith("rotation:"):
+            header["rotation"] = parse_floats(line[len("rotation:"):])
+        elif line.startswith("scale:"):
+            header["scale"] = parse_floats(line[len("scale:"):])
+        elif line.rstrip(":") in MESH_SECTIONS:
+            break
+        elif line:
+            raise ValueError("%s: unexpected line %r" % (path, line))
+    else:
+        yield "header", header
+        return
+
+    yield "header", header
+    section = line.rstrip(":")
+    while section is not None:
+        name, width = MESH_SECTIONS[section]
+        rows  = []
+        next_section = None
+        for line in lines:
+            if not line:
+                continue
+            if line.rstrip(":") in MESH_SECTIONS:
+                next_section = line.rstrip(":")
+                break
+            rows.append(line)
+            if len(rows) == chunk_rows:
+                yield name, np.array(" ".join(rows).split(), dtype = np.float32).reshape(-1, width)
+                rows = []
+        if rows:
+            yield name, np.array(" ".join(rows).split(), dtype = np.float32).reshape(-1, width)
+        section = next_section
+
+class KMeshText:
+    """Text .kmesh parsed into the same attributes as the binary reader."""
+
+    def __init__(self, path, chunk_rows = 65536):
+        chunks = iter_kmesh_text(path, chunk_rows)
+        _, header = next(chunks)
+        self.name         = header.get("name", "")
+        self.vertex_count = header.get("vertex_count", 0)
+        self.list_count   = header.get("list_count", len(header["lists"]))
+        self.lists        = header["lists"]
+        self.position     = np.array(header.get("position", (0, 0, 0)), dtype = np.float32)
+        self.rotation     = np.array(header.get("rotation", (0, 0, 0)), dtype = np.float32)
+        self.scale        = np.array(header.get("scale",    (1, 1, 1)), dtype = np.float32)
+
+        filled = {}
+        for name, width in MESH_SECTIONS.values():
+            setattr(self, name, np.zeros((self.vertex_count, width), dtype = np.float32))
+            filled[name] = 0
+        for name, chunk in chunks:
+            stream = getattr(self, name)
+            start  = filled[name]
+            if start + len(chunk) > len(stream):
+                raise ValueError("%s: more %s than the %i vertices in the header" % (path, name, self.vertex_count))
+            stream[start:start + len(chunk)] = chunk
+            filled[name] = start + len(chunk)
+
+def read_kmesh_text(path, chunk_rows = 65536):
+    return KMeshText(path, chunk_rows)
+
+def iter_kanim_text(path):
+    """Yield ("header", dict) then one KEYFRAME_DTYPE record per frame."""
+    lines  = read_lines(path)
+    header = {}
+    record = None
+    for line in lines:
+        if not line:
+            continue
+        if line.startswith("keyframes ["):
+            header["keyframe_count"] = int(line[len("keyframes ["):-1])
+        elif line.startswith("frames per sec ["):
+            header["frames_per_second"] = int(line[len("frames per sec ["):-1])
+            yield "header", header
+        elif line.startswith("frame ["):
+            if record is not None:
+                yield "keyframe", record
+            record = np.zeros((), dtype = KEYFRAME_DTYPE)
+            record["time"] = float(line[len("frame ["):-1])
+        else:
+            match = VALUE_LINE.match(line)
+            if match is None or record is None:
+                raise ValueError("%s: unexpected line %r" % (path, line))
+            values = [float(match.group(i)) for i in range(2, 5)]
+            channel = match.group(1)
+            if channel == "location":
+                record["position"] = values
+            elif channel.startswith("rotation"):
+                record["rotation"] = values
+            elif channel == "scale":
+                record["scale"] = values
+            else:
+                raise ValueError("%s: unknown channel %r" % (path, channel))
+    if record is not None:
+        yield "keyframe", record
+
+class KAnimText:
+    """Text .kanim parsed into the same keyframe records as the binary reader."""
+
+    def __init__(self, path):
+        events = iter_kanim_text(path)
+        header = {}
+        keyframes = []
+        for kind, value in events:
+            if kind == "header":
+                header = value
+            else:
+                keyframes.append(value)
+        self.keyframe_count    = header.get("keyframe_count", len(keyframes))
+        self.frames_per_second = header.get("frames_per_second", 0)
+        self.keyframes = np.array(keyframes, dtype = KEYFRAME_DTYPE)
+
+    times     = property(lambda self: self.keyframes["time"])
+    positions = property(lambda self: self.keyframes["position"])
+    rotations = property(lambda self: self.keyframes["rotation"])
+    scales    = property(lambda self: self.keyframes["scale"])
+    quaternions = property(lambda self: euler_quaternions(self.rotations))
+
+def read_kanim_text(path):
+    return KAnimText(path)
@@ -0,0 +1,557 @@
+# ========================================================================
+# Creator: Kat Mwenesongole
+# Notice: (C) Copyright 2025 by Kat Mwenesongole. All Rights Reserved.
+# ========================================================================
+
+# helpers shared by the kat exporters: tangents, mesh gathering, animation keys, the export
+# profile and cache, background export and compressed sections. not an add-on, each exporter
+# loads it from this folder (see load_common in the exporters) so there is one copy of each.
+
+import io
+import os
+import sys
+import csv
+import json
+import stat
+import time
+import zlib
+import lzma
+import shutil
+import struct
+import hashlib
+import datetime
+import tempfile
+import contextlib
+import threading
+import concurrent.futures
+import numpy as np
+
+from array import array
+from collections import namedtuple, OrderedDict
+
+# ------------------------------------------------------------------------
+# tangents
+# ------------------------------------------------------------------------
+
+# tangent space from the extracted arrays, MikkTSpace style: each triangle's uv tangent is
+# projected onto the corner normal and summed, weighted by the corner angle, over corners
+# that share position, normal, uv and uv winding. the binormal is sign * cross(normal, tangent)
+# like blender's loop bitangent, with the sign negative on mirrored uvs.
+def compute_tangents(positions, normals, uvs):
+    weighted, preserve = weighted_tangents(positions, normals, uvs)
+    inverse, tangents  = merge_tangents(positions, normals, uvs, preserve, weighted)
+    tangents  = tangents[inverse]
+    signs     = np.where(preserve, 1.0, -1.0)[:, None]
+    binormals = signs * np.cross(np.asarray(normals, dtype = np.float64).reshape(-1, 3), tangents)
+    return tangents, binormals.astype(np.float32)
+
+def normalized(vectors):
+    length = np.linalg.norm(vectors, axis = -1, keepdims = True)
+    return np.divide(vectors, length, out = np.zeros_like(vectors), where = length > 1e-20)
+
+# true on triangles whose uvs wind counterclockwise, false on mirrored uvs.
+def uv_winding(uvs):
+    coords = np.asarray(uvs, dtype = np.float64).reshape(-1, 3, 2)
+    duv_1, duv_2 = coords[:, 1] - coords[:, 0], coords[:, 2] - coords[:, 0]
+    return duv_1[:, 0] * duv_2[:, 1] - duv_1[:, 1] * duv_2[:, 0] > 0
+
+# each corner's share of its triangle's uv tangent, projected onto the corner normal and
+# weighted by the corner angle, and the uv winding of every corner.
+def weighted_tangents(positions, normals, uvs):
+    points  = np.asarray(positions, dtype = np.float64).reshape(-1, 3, 3)
+    frames  = np.asarray(normals,   dtype = np.float64).reshape(-1, 3, 3)
+    coords  = np.asarray(uvs,       dtype = np.float64).reshape(-1, 3, 2)
+    
+    edge_1, edge_2 = points[:, 1] - points[:, 0], points[:, 2] - points[:, 0]
+    duv_1,  duv_2  = coords[:, 1] - coords[:, 0], coords[:, 2] - coords[:, 0]
+    preserve = uv_winding(uvs)
+    face_tangents = (edge_1 * duv_2[:, 1:2] - edge_2 * duv_1[:, 1:2]) * np.where(preserve, 1.0, -1.0)[:, None]
+    
+    # corner angles between the edges projected onto the corner's tangent plane.
+    def project(vectors):
+        return vectors - frames * np.sum(frames * vectors, axis = 2, keepdims = True)
+    following = normalized(project(np.roll(points, -1, axis = 1) - points))
+    preceding = normalized(project(np.roll(points,  1, axis = 1) - points))
+    angles    = np.arccos(np.clip(np.sum(following * preceding, axis = 2), -1.0, 1.0))
+    weighted  = normalized(project(np.repeat(face_tangents[:, None], 3, axis = 1))) * angles[..., None]
+    return weighted.reshape(-1, 3), np.repeat(preserve, 3)
+
+# corners are merged as MikkTSpace merges vertices: identical position, normal, uv and winding.
+# returns the merged vertex of every corner and the tangent of every merged vertex, its summed
+# shares orthonormalized against its normal.
+def merge_tangents(positions, normals, uvs, preserve, weighted):
+    keys = np.concatenate([np.asarray(positions, dtype = '<f4').reshape(-1, 3), np.asarray(normals, dtype = '<f4').reshape(-1, 3),
+                           np.asarray(uvs, dtype = '<f4').reshape(-1, 2), preserve[:, None].astype('<f4')], axis = 1)
+    records = np.ascontiguousarray(keys).view(np.dtype((np.void, keys.shape[1] * 4))).ravel()
+    _, first, inverse = np.unique(records, return_index = True, return_inverse = True)
+    inverse = inverse.ravel()
+    sums    = np.stack([np.bincount(inverse, weights = weighted[:, axis], minlength = len(first)) for axis in range(3)], axis = 1)
+    
+    vertex_normals = np.asarray(normals, dtype = np.float64).reshape(-1, 3)[first]
+    tangents = normalized(sums - vertex_normals * np.sum(vertex_normals * sums, axis = 1, keepdims = True))
+    
+    # vertices without a uv gradient get any tangent perpendicular to their normal.
+    missing = ~np.any(tangents, axis = 1)
+    if np.any(missing):
+        axis  = np.where(np.abs(vertex_normals[missing, 0:1]) < 0.9, [[1.0, 0.0, 0.0]], [[0.0, 1.0, 0.0]])
+        tangents[missing] = normalized(np.cross(vertex_normals[missing], axis))
+    return inverse, tangents.astype(np.float32)
+
+# tangents of recent exports by a hash of their positions, normals and uvs, dropped least
+# recently used first once together they pass the byte limit ("Tangent Cache Size", in MB).
+TANGENT_CACHE      = OrderedDict()
+TANGENT_CACHE_SIZE = 256
+
+def trim_tangent_cache(max_bytes):
+    size = sum(tangents.nbytes + binormals.nbytes for tangents, binormals in TANGENT_CACHE.values())
+    while TANGENT_CACHE and size > max_bytes:
+        tangents, binormals = TANGENT_CACHE.popitem(last = False)[1]
+        size = size - tangents.nbytes - binormals.nbytes
+
+def read_only(array):
+    view = array.view()
+    view.setflags(write = False)
+    return view
+
+# cached arrays are shared by every export that hits the cache, callers get read-only views.
+# max_bytes None computes without the cache, 0 also empties it.
+def cached_tangents(positions, normals, uvs, max_bytes = TANGENT_CACHE_SIZE << 20):
+    if not max_bytes:
+        if max_bytes is not None:
+            TANGENT_CACHE.clear()
+        return compute_tangents(positions, normals, uvs)
+    
+    digest = hashlib.blake2b(digest_size = 20)
+    for array in (positions, normals, uvs):
+        digest.update(np.ascontiguousarray(array, dtype = np.float32))
+    key = digest.digest()
+    if key in TANGENT_CACHE:
+        TANGENT_CACHE.move_to_end(key)
+    else:
+        TANGENT_CACHE[key] = compute_tangents(positions, normals, uvs)
+    tangents, binormals = TANGENT_CACHE[key]
+    trim_tangent_cache(max_bytes)
+    return read_only(tangents), read_only(binormals)
+
+# material slots whose material has a Normal Map node, the only ones that need tangents.
+def normal_mapped_slots(materials):
+    mapped = []
+    for material in materials:
+        tree = getattr(material, "node_tree", None) if getattr(material, "use_nodes", False) else None
+        mapped.append(tree is not None and any(node.type == 'NORMAL_MAP' for node in tree.nodes))
+    return np.array(mapped, dtype = bool)
+
+# faces whose material slot has a normal map.
+def mapped_faces(material_index, mapped):
+    if not len(mapped):
+        return np.zeros(len(material_index), dtype = bool)
+    return mapped[np.minimum(material_index, len(mapped) - 1)]
+
+# tangents and binormals of every corner, mapped (per material slot) leaves the
+# faces of materials without a normal map at zero.
+def tangent_space(positions, normals, uvs, material_index, mapped = None, cache_bytes = TANGENT_CACHE_SIZE << 20):
+    if mapped is None:
+        return cached_tangents(positions, normals, uvs, cache_bytes)
+    faces = mapped_faces(material_index, mapped)
+    tangents  = np.zeros((len(positions), 3), dtype = np.float32)
+    binormals = np.zeros((len(positions), 3), dtype = np.float32)
+    if np.any(faces):
+        corners = np.repeat(faces, 3)
+        tangents[corners], binormals[corners] = cached_tangents(positions[corners], normals[corners], uvs[corners], cache_bytes)
+    return tangents, binormals
+
+# ------------------------------------------------------------------------
+# mesh gathering
+# ------------------------------------------------------------------------
+
+# order faces by material in one stable pass.
+# slots sharing a material are exported as one list, in order of first use.
+def group_by_material(materials, material_index):
+    face_count = len(material_index)
+    slot_count = max(len(materials), int(material_index.max(initial = 0)) + 1)
+    
+    first_use = np.full(slot_count, face_count, dtype = np.int64)
+    np.minimum.at(first_use, material_index, np.arange(face_count))
+    used_slots = np.flatnonzero(first_use < face_count)
+    
+    names        = []
+    colours      = []
+    slot_lists   = np.zeros(slot_count, dtype = np.int64)
+    list_of_name = {}
+    for slot in used_slots[np.argsort(first_use[used_slots])]:
+        material = materials[slot]
+        if material.name not in list_of_name:
+            list_of_name[material.name] = len(names)
+            names.append(material.name)
+            colours.append(material.diffuse_color)
+        slot_lists[slot] = list_of_name[material.name]
+    
+    face_lists = slot_lists[material_index]
+    # radix sort when the list ids fit in 16 bits.
+    if len(names) <= 0xFFFF: face_lists = face_lists.astype(np.uint16)
+    face_order = np.argsort(face_lists, kind = 'stable')
+    
+    face_counts  = np.bincount(face_lists, minlength = len(names))
+    face_offsets = np.concatenate(([0], np.cumsum(face_counts)[:-1])).astype(np.int64)
+    
+    return {
+        'names':       names,
+        'colours':     colours,
+        'counts':      [3 * int(count)  for count  in face_counts],
+        'offsets':     [3 * int(offset) for offset in face_offsets],
+        'face_order':  face_order,
+        'face_counts': face_counts,
+        'first_faces': face_order[face_offsets[:len(names)]],
+    }
+
+# expand the material ordered faces into per-vertex streams.
+def gather_lists(data, lists):
+    face_order = lists['face_order']
+    corners    = (3 * face_order[:, None] + np.arange(3)).ravel()
+    
+    # the whole list is shaded like its first face.
+    face_smooth = np.repeat(data['use_smooth'][lists['first_faces']], lists['face_counts'])
+    
+    vertices  = data['positions'][corners]
+    normals   = np.where(np.repeat(face_smooth, 3)[:, None],
+                         data['point_normals'][corners],
+                         np.repeat(data['face_normals'][face_order], 3, axis = 0))
+    binormals = data['binormals'][corners]
+    tangents  = data['tangents'] [corners]
+    uvs       = data['uvs']      [corners]
+    
+    return vertices, normals, binormals, tangents, uvs
+
+# blender (x, y, z) -> kat (y, z, -x): y-up, left handed.
+def to_kat_axes(vectors):
+    converted = vectors[:, (1, 2, 0)]
+    converted[:, 2] = -converted[:, 2]
+    return converted
+
+# progress callbacks get the finished fraction, a background export cancels by raising from one.
+def advance(progress, fraction):
+    if progress is not None:
+        progress(fraction)
+
+# copies of what write_kmesh reads from the object and its materials, safe to use off the main thread.
+ObjectSnapshot   = namedtuple("ObjectSnapshot", "name location rotation_euler scale")
+MaterialSnapshot = namedtuple("MaterialSnapshot", "name diffuse_color")
+
+def snapshot_object(obj):
+    return ObjectSnapshot(obj.name, obj.location.copy(), obj.rotation_euler.copy(), obj.scale.copy())
+
+def snapshot_materials(materials):
+    return [None if material is None else MaterialSnapshot(material.name, tuple(material.diffuse_color))
+            for material in materials]
+
+# ------------------------------------------------------------------------
+# animation keys
+# ------------------------------------------------------------------------
+
+# kat channel order: location, rotation_euler, scale, each x,y,z in blender axes.
+CHANNELS = [(data_path, index) for data_path in ("location", "rotation_euler", "scale") for index in range(3)]
+
+# joint douglas-peucker over all channels: a key is dropped when linear interpolation
+# of its neighbours rebuilds every channel within that channel's tolerance.
+def simplify_keys(times, values, tolerances):
+    keep = np.zeros(len(times), dtype = bool)
+    if len(times) == 0:
+        return keep
+    keep[[0, -1]] = True
+    tolerances = np.maximum(tolerances, 1e-12)
+    
+    segments = [(0, len(times) - 1)]
+    while segments:
+        first, last = segments.pop()
+        if last - first < 2:
+            continue
+        t     = (times[first + 1:last] - times[first]) / (times[last] - times[first])
+        line  = values[first] + t[:, None] * (values[last] - values[first])
+        error = np.max(np.abs(values[first + 1:last] - line) / tolerances, axis = 1)
+        worst = int(np.argmax(error))
+        if error[worst] > 1.0:
+            split = first + 1 + worst
+            keep[split] = True
+            segments += [(first, split), (split, last)]
+    
+    return keep
+
+# blender (x,y,z) -> kat (y,z,-x) for position and scale order, rotation as positive radians.
+def to_kat_keyframes(times, values):
+    rotation  = values[:, 3:6]
+    rotation  = np.where(rotation < 0, -rotation, (2*3.14159) - rotation)
+    keyframes = np.empty((len(times), 10), dtype = np.float64)
+    keyframes[:, 0]    = times
+    keyframes[:, 1:4]  = values[:, [1, 2, 0]] * (1, 1, -1)
+    keyframes[:, 4:7]  = rotation[:, [1, 2, 0]]
+    keyframes[:, 7:10] = values[:, [7, 8, 6]]
+    return keyframes
+
+# hash an fcurve's keys and everything evaluate() reads between them: the handles,
+# interpolation and easing of every key, the extrapolation and the modifiers.
+def hash_fcurve(digest, curve):
+    count     = len(curve.keyframe_points)
+    modifiers = [(modifier.type, modifier.mute) for modifier in curve.modifiers]
+    digest.update(('%s[%i] %s %i %r' % (curve.data_path, curve.array_index, curve.extrapolation, len(modifiers), modifiers)).encode('utf-8'))
+    for name in ('co', 'handle_left', 'handle_right'):
+        values = array('f', bytes(8 * count))
+        curve.keyframe_points.foreach_get(name, values)
+        digest.update(values.tobytes())
+    for name in ('interpolation', 'easing'):
+        values = array('i', bytes(4 * count)) # enum indices.
+        curve.keyframe_points.foreach_get(name, values)
+        digest.update(values.tobytes())
+
+# ------------------------------------------------------------------------
+# export profile
+# ------------------------------------------------------------------------
+
+# per-phase wall time, element counts, bytes written and peak memory of one export.
+PROFILE_OPTIONS = ("use_profile", "profile_log")
+
+# the process' peak resident memory in bytes, tracemalloc would slow the export down
+# several times over. 0 where the resource module is missing (windows).
+def peak_memory():
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+class ExportProfile:
+    def __init__(self, exporter):
+        self.exporter = exporter
+        self.phases   = {}
+        self.counters = {}
+        self.peak     = 0
+        self.start    = time.perf_counter()
+        self.seconds  = 0.0
+    
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+    
+    def count(self, name, value):
+        self.counters[name] = self.counters.get(name, 0) + int(value)
+    
+    def finish(self, filepath):
+        self.seconds = time.perf_counter() - self.start
+        self.peak    = peak_memory()
+        self.count("bytes", os.path.getsize(filepath))
+    
+    def summary(self):
+        phases   = ", ".join("%s %.3f s" % (name, seconds) for name, seconds in self.phases.items())
+        counters = ", ".join("%s %i" % (name, value) for name, value in self.counters.items())
+        return ["Export took %.3f s: %s" % (self.seconds, phases),
+                "Exported %s, process peak memory %.1f MB" % (counters, self.peak / 1e6)]
+    
+    # a .csv log gets one row per phase and counter, anything else one json object per line.
+    def write_log(self, path, filepath):
+        stamp = datetime.datetime.now().isoformat(timespec = 'seconds')
+        if path.lower().endswith(".csv"):
+            rows = [("phase", name, "%.6f" % seconds) for name, seconds in self.phases.items()]
+            rows = rows + [("counter", name, value) for name, value in self.counters.items()]
+            rows = rows + [("total", "seconds", "%.6f" % self.seconds), ("total", "peak_memory", self.peak)]
+            new  = not os.path.isfile(path) or os.path.getsize(path) == 0
+            with open(path, 'a', newline = '', encoding = 'utf-8') as log:
+                writer = csv.writer(log)
+                if new:
+                    writer.writerow(("time", "exporter", "file", "kind", "name", "value"))
+                writer.writerows((stamp, self.exporter, filepath) + row for row in rows)
+        else:
+            record = {"time": stamp, "exporter": self.exporter, "file": filepath, "seconds": self.seconds,
+                      "phases": self.phases, "counters": self.counters, "peak_memory": self.peak}
+            with open(path, 'a', encoding = 'utf-8') as log:
+                log.write(json.dumps(record) + "\n")
+
+def profiled(profile, name):
+    return profile.phase(name) if profile is not None else contextlib.nullcontext()
+
+def finish_profile(profile, filepath, profile_log, report):
+    if profile is None:
+        return
+    profile.finish(filepath)
+    if report is not None:
+        for line in profile.summary():
+            report({'INFO'}, line)
+    if profile_log:
+        profile.write_log(profile_log, filepath)
+
+# ------------------------------------------------------------------------
+# export cache
+# ------------------------------------------------------------------------
+
+# content-hash export cache, entries are evicted least recently used first.
+CACHE_DIRECTORY = os.environ.get("KAT_EXPORT_CACHE", os.path.join(tempfile.gettempdir(), "kat_export_cache"))
+
+def cache_fetch(key, filepath, extension):
+    entry = os.path.join(CACHE_DIRECTORY, key + extension)
+    if not os.path.isfile(entry):
+        return False
+    shutil.copyfile(entry, filepath)
+    os.utime(entry) # mark as recently used.
+    return True
+
+def cache_store(key, filepath, extension, max_bytes):
+    os.makedirs(CACHE_DIRECTORY, exist_ok = True)
+    entry = os.path.join(CACHE_DIRECTORY, key + extension)
+    temp  = entry + ".%i.tmp" % os.getpid()
+    shutil.copyfile(filepath, temp)
+    os.replace(temp, entry)
+    
+    entries = []
+    for name in os.listdir(CACHE_DIRECTORY):
+        path = os.path.join(CACHE_DIRECTORY, name)
+        if name.endswith(".tmp"):
+            continue
+        stat = os.stat(path)
+        entries.append((stat.st_mtime, stat.st_size, path))
+    
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes or path == entry:
+            continue
+        try:
+            os.remove(path)
+            total = total - size
+        except OSError:
+            pass
+
+# ------------------------------------------------------------------------
+# background export
+# ------------------------------------------------------------------------
+
+class ExportCancelled(Exception):
+    pass
+
+# the mode of the file being replaced, or the mode open() gives a new file.
+def target_mode(filepath):
+    try:
+        return stat.S_IMODE(os.stat(filepath).st_mode)
+    except OSError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+# encodes and writes on a worker thread into a temporary file next to filepath, which
+# replaces filepath once complete, so a cancelled or failed export leaves the old file.
+class BackgroundExport:
+    def __init__(self, filepath, encode, mode):
+        directory, name = os.path.split(os.path.abspath(filepath))
+        self.filepath  = filepath
+        self.handle, self.temp = tempfile.mkstemp(prefix = name + ".", suffix = ".tmp", dir = directory)
+        # mkstemp files are owner-only, the export gets the target's mode. the umask is read on this (main) thread.
+        self.mode_bits = target_mode(filepath)
+        self.encode    = encode
+        self.mode      = mode
+        self.progress  = 0.0
+        self.messages  = [] # reports are replayed on the main thread.
+        self.cancelled = threading.Event()
+        self.executor  = concurrent.futures.ThreadPoolExecutor(max_workers = 1)
+        self.future    = self.executor.submit(self.run)
+        self.executor.shutdown(wait = False)
+    
+    def update(self, fraction):
+        if self.cancelled.is_set():
+            raise ExportCancelled()
+        self.progress = fraction
+    
+    def report(self, kind, message):
+        self.messages.append((kind, message))
+    
+    def run(self):
+        try:
+            with os.fdopen(self.handle, self.mode, **({} if 'b' in self.mode else {'encoding': 'utf-8'})) as f:
+                self.encode(f, self.report, self.update)
+            self.update(1.0)
+            os.chmod(self.temp, self.mode_bits)
+            os.replace(self.temp, self.filepath)
+        except BaseException:
+            try:
+                os.remove(self.temp)
+            except OSError:
+                pass
+            raise
+
+# ------------------------------------------------------------------------
+# compressed sections
+# ------------------------------------------------------------------------
+
+# per-section compression, see README.md. every write is a section, runs of small writes
+# are merged and large ones split, each section is filtered and compressed on its own.
+KATZ_MAGIC          = b"KATZ"
+KATZ_VERSION        = 1
+KATZ_HEADER_FORMAT  = '<4s3IQ8x'   # 32 bytes.
+KATZ_SECTION_FORMAT = '<4Q2B6x'    # 40 bytes.
+KATZ_MIN_SECTION    = 4096
+KATZ_MAX_SECTION    = 1 << 22
+
+SECTION_CODECS  = {'NONE': 0, 'ZLIB': 1, 'LZMA': 2}
+SECTION_FILTERS = {'NONE': 0, 'SHUFFLE': 1, 'DELTA': 2}
+
+class SectionRecorder(io.BytesIO):
+    """In-memory file that keeps the offset of every write."""
+    
+    def __init__(self):
+        super().__init__()
+        self.starts = {0}
+    
+    def write(self, data):
+        self.starts.add(self.tell())
+        return super().write(data)
+
+def split_sections(size, starts):
+    bounds   = sorted(start for start in starts if start < size) + [size]
+    sections = []
+    for begin, end in zip(bounds, bounds[1:]):
+        if sections and end - begin < KATZ_MIN_SECTION and sections[-1][1] - sections[-1][0] < KATZ_MIN_SECTION:
+            sections[-1][1] = end
+        else:
+            sections.extend([start, min(start + KATZ_MAX_SECTION, end)] for start in range(begin, end, KATZ_MAX_SECTION))
+    return sections
+
+# byte shuffle groups the n-th byte of every 32-bit word, delta first stores each word minus the previous one.
+def filter_section(data, section_filter):
+    words = np.frombuffer(data, dtype = '<u4')
+    if section_filter == SECTION_FILTERS['DELTA']:
+        words = np.diff(words, prepend = np.uint32(0))
+    return words.view(np.uint8).reshape(-1, 4).T.tobytes()
+
+def compress_section(data, codec, section_filter):
+    # sections that are not whole words are not filtered, ones that do not shrink are stored.
+    if len(data) % 4:
+        section_filter = SECTION_FILTERS['NONE']
+    if section_filter != SECTION_FILTERS['NONE']:
+        data = filter_section(data, section_filter)
+    packed = zlib.compress(data, 6) if codec == SECTION_CODECS['ZLIB'] else lzma.compress(data)
+    if len(packed) >= len(data):
+        return data, SECTION_CODECS['NONE'], section_filter
+    return packed, codec, section_filter
+
+def write_sections(f, raw, starts, compression, section_filter):
+    codec    = SECTION_CODECS[compression]
+    sections = split_sections(len(raw), starts)
+    view     = memoryview(raw)
+    with concurrent.futures.ThreadPoolExecutor() as pool:
+        packed = list(pool.map(lambda section: compress_section(view[section[0]:section[1]], codec,
+                                                                SECTION_FILTERS[section_filter]), sections))
+    
+    header_size = struct.calcsize(KATZ_HEADER_FORMAT)
+    entry_size  = struct.calcsize(KATZ_SECTION_FORMAT)
+    offset      = header_size + len(sections) * entry_size
+    table       = bytearray(len(sections) * entry_size)
+    for index, ((begin, end), (data, used_codec, used_filter)) in enumerate(zip(sections, packed)):
+        struct.pack_into(KATZ_SECTION_FORMAT, table, index * entry_size, begin, end - begin, offset, len(data),
+                         used_codec, used_filter)
+        offset = offset + len(data)
+    
+    f.write(struct.pack(KATZ_HEADER_FORMAT, KATZ_MAGIC, KATZ_VERSION, len(sections), header_size, len(raw)))
+    f.write(table)
+    for data, _, _ in packed:
+        f.write(data)
+    return len(raw), offset
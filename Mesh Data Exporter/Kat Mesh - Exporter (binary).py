@@ -15,15 +15,54 @@ bl_info = {
 
 import bpy
 import bmesh
+import os
+import sys
+import zlib
+import lzma
+import hashlib
+import contextlib
 import struct
 import concurrent.futures
+import importlib.util
+import numpy as np
 
 from bpy_extras.io_utils import ExportHelper
-from bpy.props import StringProperty, BoolProperty, EnumProperty
+from bpy.props import StringProperty, BoolProperty, EnumProperty, IntProperty
 from bpy.types import Operator
 from math      import sqrt, pi
 from mathutils import Matrix, Vector
 
+# helpers shared by the kat exporters have one copy, Exporter Common/kat_export_common.py next
+# to this exporter's folder. an importable kat_export_common (e.g. in blender's scripts/modules)
+# is used as is, so is one another exporter already loaded.
+def load_common():
+    try:
+        import kat_export_common
+        return kat_export_common
+    except ImportError:
+        root   = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        spec   = importlib.util.spec_from_file_location("kat_export_common", os.path.join(root, "Exporter Common", "kat_export_common.py"))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules["kat_export_common"] = module
+        spec.loader.exec_module(module)
+        return module
+
+kat_export_common = load_common()
+from kat_export_common import (uv_winding, weighted_tangents, merge_tangents, TANGENT_CACHE_SIZE,
+                               normal_mapped_slots, mapped_faces, tangent_space, group_by_material, gather_lists, to_kat_axes,
+                               advance, snapshot_object, snapshot_materials, PROFILE_OPTIONS, ExportProfile, profiled,
+                               finish_profile, cache_fetch, cache_store, ExportCancelled, BackgroundExport, SectionRecorder,
+                               write_sections)
+
+# extended header flags.
+KMESH_INDEXED             = 1 << 0
+KMESH_COMPACT             = 1 << 1
+KMESH_QUANTIZED_POSITIONS = 1 << 2
+KMESH_LODS                = 1 << 3
+KMESH_BOUNDS              = 1 << 4
+KMESH_MESHLETS            = 1 << 5
+KMESH_INTERLEAVED         = 1 << 6
+
 def triangulate_object(obj):
     me = obj.data
     bm = bmesh.new()
@@ -32,190 +71,1154 @@ def triangulate_object(obj):
     bm.to_mesh(me)
     bm.free()
 
-def write(context, filepath): 
+# read a triangulated mesh as bpy stores it: the points, the point of every corner, per-corner
+# uvs and per-face normals, smoothing and materials, nothing expanded per corner yet.
+# mapped are the normal mapped material slots, see tangent_space.
+def read_mesh_sources(mesh, mapped = None):
+    polygon_count = len(mesh.polygons)
+    corner_count  = len(mesh.loops) # 3 corners per polygon once triangulated.
+    point_count   = len(mesh.vertices)
+
+    corner_points = np.empty(corner_count, dtype = np.int32)
+    mesh.loops.foreach_get('vertex_index', corner_points)
+
+    points = np.empty(point_count * 3, dtype = np.float32)
+    mesh.vertices.foreach_get('co', points)
+    point_normals = np.empty(point_count * 3, dtype = np.float32)
+    mesh.vertices.foreach_get('normal', point_normals)
+
+    uvs       = np.empty(corner_count * 2, dtype = np.float32)
+    mesh.uv_layers.active.data.foreach_get('uv', uvs)
+
+    face_normals   = np.empty(polygon_count * 3, dtype = np.float32)
+    mesh.polygons.foreach_get('normal', face_normals)
+    use_smooth     = np.empty(polygon_count, dtype = bool)
+    mesh.polygons.foreach_get('use_smooth', use_smooth)
+    material_index = np.empty(polygon_count, dtype = np.int32)
+    mesh.polygons.foreach_get('material_index', material_index)
+
+    return {
+        'points':         points.reshape(-1, 3),
+        'point_normals':  point_normals.reshape(-1, 3),
+        'corner_points':  corner_points,
+        'corner_loops':   None, # the corners are the loops.
+        'uvs':            uvs.reshape(-1, 2),
+        'face_normals':   face_normals.reshape(-1, 3),
+        'use_smooth':     use_smooth,
+        'material_index': material_index,
+        'mapped':         mapped,
+    }
+
+# the same for an untriangulated mesh, through its loop triangles.
+def read_triangle_sources(mesh, mapped = None):
+    mesh.calc_loop_triangles()
     
-    # duplicate selected objects, then join them into one mesh.
-    bpy.ops.object.duplicate() 
-    bpy.ops.object.join()
+    triangle_count = len(mesh.loop_triangles)
+    corner_count   = len(mesh.loops)
+    point_count    = len(mesh.vertices)
+    polygon_count  = len(mesh.polygons)
     
-    f = open(filepath, 'wb') 
+    triangle_loops = np.empty(triangle_count * 3, dtype = np.int32)
+    mesh.loop_triangles.foreach_get('loops', triangle_loops)
+    triangle_points = np.empty(triangle_count * 3, dtype = np.int32)
+    mesh.loop_triangles.foreach_get('vertices', triangle_points)
+    triangle_polygons = np.empty(triangle_count, dtype = np.int32)
+    mesh.loop_triangles.foreach_get('polygon_index', triangle_polygons)
+    
+    points = np.empty(point_count * 3, dtype = np.float32)
+    mesh.vertices.foreach_get('co', points)
+    point_normals = np.empty(point_count * 3, dtype = np.float32)
+    mesh.vertices.foreach_get('normal', point_normals)
+    
+    uvs       = np.empty(corner_count * 2, dtype = np.float32)
+    mesh.uv_layers.active.data.foreach_get('uv', uvs)
+    
+    face_normals   = np.empty(triangle_count * 3, dtype = np.float32)
+    mesh.loop_triangles.foreach_get('normal', face_normals)
+    material_index = np.empty(triangle_count, dtype = np.int32)
+    mesh.loop_triangles.foreach_get('material_index', material_index)
+    use_smooth     = np.empty(polygon_count, dtype = bool)
+    mesh.polygons.foreach_get('use_smooth', use_smooth)
+    
+    return {
+        'points':         points.reshape(-1, 3),
+        'point_normals':  point_normals.reshape(-1, 3),
+        'corner_points':  triangle_points,
+        'corner_loops':   triangle_loops,
+        'uvs':            uvs.reshape(-1, 2),
+        'face_normals':   face_normals.reshape(-1, 3),
+        'use_smooth':     use_smooth[triangle_polygons],
+        'material_index': material_index,
+        'mapped':         mapped,
+    }
+
+# sources of several meshes as one, point and loop indices continue from the previous mesh's.
+def join_sources(parts):
+    joined = {key: np.concatenate([part[key] for part in parts])
+              for key in ('points', 'point_normals', 'uvs', 'face_normals', 'use_smooth', 'material_index')}
+    corner_points = []
+    corner_loops  = []
+    points, loops = 0, 0
+    for part in parts:
+        own_loops = np.arange(len(part['corner_points']), dtype = np.int32) if part['corner_loops'] is None else part['corner_loops']
+        corner_points.append(part['corner_points'] + points)
+        corner_loops.append(own_loops + loops)
+        points = points + len(part['points'])
+        loops  = loops  + len(part['uvs'])
+    joined['corner_points'] = np.concatenate(corner_points)
+    joined['corner_loops']  = np.concatenate(corner_loops)
+    joined['mapped']        = None if parts[0]['mapped'] is None else np.concatenate([part['mapped'] for part in parts])
+    if 'corner_vertex' in parts[0]:
+        # merged vertices continue too, corners without tangents stay -1.
+        vertices = np.cumsum([0] + [len(part['vertex_tangents']) for part in parts[:-1]])
+        joined['corner_vertex']   = np.concatenate([np.where(part['corner_vertex'] < 0, -1, part['corner_vertex'] + offset).astype(np.int32)
+                                                    for part, offset in zip(parts, vertices)])
+        joined['vertex_tangents'] = np.concatenate([part['vertex_tangents'] for part in parts])
+    return joined
+
+# positions, point normals, loop normals and uvs of the given triangle corners.
+def expand_corners(sources, corners):
+    points = sources['corner_points'][corners]
+    loops  = corners if sources['corner_loops'] is None else sources['corner_loops'][corners]
+    faces  = corners // 3
+    
+    point_normals = sources['point_normals'][points]
+    # blender's loop normals without custom normals: smooth faces use the point normals.
+    normals = np.where(sources['use_smooth'][faces][:, None], point_normals, sources['face_normals'][faces])
+    return sources['points'][points], point_normals, normals, sources['uvs'][loops]
+
+# pull the per-corner attributes of the whole mesh into flat arrays, tangents are computed from them.
+def expand_sources(sources, cache_bytes = TANGENT_CACHE_SIZE << 20):
+    positions, point_normals, normals, uvs = expand_corners(sources, np.arange(len(sources['corner_points'])))
+    tangents, binormals = tangent_space(positions, normals, uvs, sources['material_index'], sources['mapped'], cache_bytes)
+    
+    return {
+        'positions':      positions,
+        'point_normals':  point_normals,
+        'face_normals':   sources['face_normals'],
+        'use_smooth':     sources['use_smooth'],
+        'binormals':      binormals,
+        'tangents':       tangents,
+        'uvs':            uvs,
+        'material_index': sources['material_index'],
+    }
+
+# pull the per-corner attributes of a triangulated mesh into flat arrays.
+def extract_mesh_data(mesh, mapped = None, cache_bytes = TANGENT_CACHE_SIZE << 20):
+    return expand_sources(read_mesh_sources(mesh, mapped), cache_bytes)
+
+# pull the per-corner attributes of an untriangulated mesh through its loop triangles.
+def extract_triangle_data(mesh, mapped = None, cache_bytes = TANGENT_CACHE_SIZE << 20):
+    return expand_sources(read_triangle_sources(mesh, mapped), cache_bytes)
+
+# weld identical corners inside each list, in order of first use.
+# indices are relative to the first vertex of their list.
+def weld_lists(streams, offsets, counts):
+    attributes = np.ascontiguousarray(np.concatenate(streams, axis = 1), dtype = '<f4')
+    records    = attributes.view(np.dtype((np.void, attributes.shape[1] * 4))).ravel()
+    
+    kept           = []
+    indices        = []
+    vertex_offsets = []
+    vertex_counts  = []
+    cumulative     = 0
+    for offset, count in zip(offsets, counts):
+        _, first, inverse = np.unique(records[offset:offset + count], return_index = True, return_inverse = True)
+        order = np.argsort(first)
+        rank  = np.empty(len(order), dtype = np.int64)
+        rank[order] = np.arange(len(order))
+        
+        kept.append(offset + first[order])
+        indices.append(rank[inverse.ravel()])
+        vertex_offsets.append(cumulative)
+        vertex_counts.append(len(order))
+        cumulative = cumulative + len(order)
+    
+    kept    = np.concatenate(kept    + [np.empty(0, dtype = np.int64)])
+    indices = np.concatenate(indices + [np.empty(0, dtype = np.int64)])
+    return [stream[kept] for stream in streams], indices, vertex_offsets, vertex_counts
+
+# post-transform vertex cache, fifo entries.
+VERTEX_CACHE_SIZE = 16
+
+# misses of a fifo vertex cache over an index list.
+def cache_misses(indices, cache_size = VERTEX_CACHE_SIZE):
+    cached = {}
+    misses = 0
+    for index in indices.tolist():
+        if cached.get(index, -cache_size) <= misses - cache_size:
+            cached[index] = misses
+            misses = misses + 1
+    return misses
+
+# tipsify (sander, nehab & barczak 2007): fan around the most recently used vertex
+# whose triangles still fit in the cache, restart from a dead-end vertex otherwise.
+def tipsify(triangles, vertex_count, cache_size = VERTEX_CACHE_SIZE):
+    triangle_count = len(triangles)
+    corners   = triangles.ravel()
+    order     = np.argsort(corners, kind = 'stable')
+    adjacent  = (order // 3).tolist()
+    starts    = np.concatenate([[0], np.cumsum(np.bincount(corners, minlength = vertex_count))]).tolist()
+    live      = np.bincount(corners, minlength = vertex_count).tolist()
+    stamps    = [0] * vertex_count
+    emitted   = [False] * triangle_count
+    vertices  = triangles.tolist()
+    dead_ends = []
+    output    = []
+    time      = cache_size + 1
+    cursor    = 0
+    fan       = int(corners[0]) if triangle_count else -1
+    
+    while fan >= 0:
+        candidates = []
+        for triangle in adjacent[starts[fan]:starts[fan + 1]]:
+            if emitted[triangle]:
+                continue
+            emitted[triangle] = True
+            output.append(triangle)
+            for vertex in vertices[triangle]:
+                dead_ends.append(vertex)
+                candidates.append(vertex)
+                live[vertex] = live[vertex] - 1
+                if time - stamps[vertex] > cache_size:
+                    stamps[vertex] = time
+                    time = time + 1
+        
+        # the candidate that will still be cached after emitting its remaining triangles.
+        fan  = -1
+        best = -1
+        for vertex in candidates:
+            if live[vertex] > 0:
+                priority = time - stamps[vertex] if time - stamps[vertex] + 2 * live[vertex] <= cache_size else 0
+                if priority > best:
+                    best = priority
+                    fan  = vertex
+        
+        if fan < 0:
+            while dead_ends:
+                vertex = dead_ends.pop()
+                if live[vertex] > 0:
+                    fan = vertex
+                    break
+        if fan < 0:
+            while cursor < vertex_count and live[cursor] == 0:
+                cursor = cursor + 1
+            fan = cursor if cursor < vertex_count else -1
+    
+    return np.array(output, dtype = np.int64)
+
+# reorder each indexed list's triangles for the vertex cache, then its vertices by first use.
+# with groups (triangle counts per list) triangles are only reordered inside each group.
+def optimize_vertex_cache(streams, indices, vertex_offsets, vertex_counts, index_offsets, index_counts, groups = None):
+    kept   = []
+    result = []
+    before = 0
+    after  = 0
+    for number, (vertex_offset, vertex_count, index_offset, index_count) in enumerate(zip(vertex_offsets, vertex_counts,
+                                                                                          index_offsets, index_counts)):
+        part  = indices[index_offset:index_offset + index_count]
+        parts = []
+        start = 0
+        for size in (groups[number] if groups is not None else [index_count // 3]):
+            group = part[start * 3:(start + size) * 3]
+            used, local = np.unique(group, return_inverse = True)
+            parts.append(group.reshape(-1, 3)[tipsify(local.reshape(-1, 3), len(used))])
+            start = start + size
+        triangles = np.concatenate(parts + [np.empty((0, 3), dtype = part.dtype)]).ravel()
+        
+        first = np.full(vertex_count, len(triangles), dtype = np.int64)
+        np.minimum.at(first, triangles, np.arange(len(triangles)))
+        order = np.argsort(first, kind = 'stable')
+        rank  = np.empty(vertex_count, dtype = np.int64)
+        rank[order] = np.arange(vertex_count)
+        
+        kept.append(vertex_offset + order)
+        result.append(rank[triangles])
+        before = before + cache_misses(part)
+        after  = after  + cache_misses(result[-1])
+    
+    kept    = np.concatenate(kept   + [np.empty(0, dtype = np.int64)])
+    indices = np.concatenate(result + [np.empty(0, dtype = np.int64)])
+    return [stream[kept] for stream in streams], indices, before, after
+
+# bounds of consecutive ranges that tile points: min, max, sphere centre and radius per range.
+# the sphere is centred on the box, its radius is the farthest point from that centre.
+def range_bounds(points, counts):
+    counts = np.asarray(counts, dtype = np.int64)
+    bounds = np.zeros((len(counts), 10))
+    if not len(counts) or not len(points):
+        return bounds
+    points = np.asarray(points, dtype = np.float64)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    low    = np.minimum.reduceat(points, starts, axis = 0)
+    high   = np.maximum.reduceat(points, starts, axis = 0)
+    centre = (low + high) / 2
+    distance = np.linalg.norm(points - np.repeat(centre, counts, axis = 0), axis = 1)
+    bounds[:, 0:3] = low
+    bounds[:, 3:6] = high
+    bounds[:, 6:9] = centre
+    bounds[:, 9]   = np.maximum.reduceat(distance, starts)
+    return bounds
+
+# grow bounds in place by a margin on each axis.
+def pad_bounds(bounds, margin):
+    bounds[:, 0:3] = bounds[:, 0:3] - margin
+    bounds[:, 3:6] = bounds[:, 3:6] + margin
+    bounds[:, 9]   = bounds[:, 9]   + np.linalg.norm(margin)
+
+MESHLET_TRIANGLES = 128
+
+# 30-bit morton codes of points already scaled to 0..1023 on each axis.
+def morton_codes(cells):
+    cells = np.clip(cells, 0, 1023).astype(np.uint64)
+    codes = np.zeros(len(cells), dtype = np.uint64)
+    for bit in range(10):
+        for axis in range(3):
+            codes = codes | (((cells[:, axis] >> np.uint64(bit)) & np.uint64(1)) << np.uint64(3 * bit + axis))
+    return codes
+
+# sort each list's triangles along a morton curve through their centroids, then cut
+# the list into near equal meshlets of at most size triangles, each a compact patch.
+# returns the corner order and the list, first triangle (in the list) and triangle
+# count of each meshlet.
+def build_meshlets(vertices, counts, size = MESHLET_TRIANGLES):
+    triangle_counts = np.asarray(counts, dtype = np.int64) // 3
+    centroids  = np.asarray(vertices, dtype = np.float64).reshape(-1, 3, 3).mean(axis = 1)
+    list_index = np.repeat(np.arange(len(triangle_counts)), triangle_counts)
+    
+    bounds = range_bounds(centroids, triangle_counts)
+    # one scale for all three axes, a thin axis would otherwise dominate the curve.
+    low    = bounds[list_index, 0:3]
+    extent = (bounds[list_index, 3:6] - low).max(axis = 1, keepdims = True)
+    cells  = (centroids - low) / np.where(extent > 0, extent, 1.0) * 1023
+    order  = np.lexsort((morton_codes(cells), list_index))
+    
+    meshlets = []
+    for number, count in enumerate(triangle_counts.tolist()):
+        chunks = -(-count // size)
+        cuts   = [(chunk * count) // chunks for chunk in range(chunks + 1)]
+        meshlets.extend((number, cuts[chunk], cuts[chunk + 1] - cuts[chunk]) for chunk in range(chunks))
+    
+    corners = (order[:, None] * 3 + np.arange(3)).ravel()
+    return corners, meshlets
+
+# unit vectors -> 2 x snorm16 octahedral coordinates. zero vectors (the tangents
+# Normal Mapped Tangents Only leaves out) get the reserved code -32768, -32768.
+OCTAHEDRAL_ZERO = -32768
+
+def encode_octahedral(vectors):
+    length  = np.sum(np.abs(vectors), axis = 1, keepdims = True)
+    folded  = vectors[:, :2] / np.where(length > 0, length, 1.0)
+    lower   = vectors[:, 2] < 0
+    # the lower hemisphere is folded over the diagonals.
+    folded[lower] = (1.0 - np.abs(folded[lower][:, ::-1])) * np.where(folded[lower] >= 0, 1.0, -1.0)
+    packed  = np.round(np.clip(folded, -1.0, 1.0) * 32767).astype('<i2')
+    packed[length[:, 0] == 0] = OCTAHEDRAL_ZERO
+    return packed
+
+def decode_octahedral(packed):
+    folded  = packed.astype(np.float64) / 32767
+    z       = 1.0 - np.abs(folded[:, 0]) - np.abs(folded[:, 1])
+    t       = np.maximum(-z, 0.0)
+    x       = folded[:, 0] - np.where(folded[:, 0] >= 0, t, -t)
+    y       = folded[:, 1] - np.where(folded[:, 1] >= 0, t, -t)
+    vectors = np.stack([x, y, z], axis = 1)
+    vectors = vectors / np.linalg.norm(vectors, axis = 1, keepdims = True)
+    vectors[packed[:, 0] == OCTAHEDRAL_ZERO] = 0.0
+    return vectors
+
+# largest angle in degrees between matching rows. rows that are zero on both sides match,
+# a row that is zero on one side only is 180 degrees off.
+def max_angle(a, b):
+    a_valid = np.linalg.norm(a, axis = 1) > 1e-12
+    b_valid = np.linalg.norm(b, axis = 1) > 1e-12
+    if np.any(a_valid != b_valid):
+        return 180.0
+    valid  = a_valid & b_valid
+    if not np.any(valid):
+        return 0.0
+    length = np.linalg.norm(a[valid], axis = 1) * np.linalg.norm(b[valid], axis = 1)
+    cosine = np.sum(a[valid] * b[valid], axis = 1) / length
+    return float(np.degrees(np.arccos(np.clip(cosine, -1.0, 1.0))).max())
+
+# compact streams: octahedral normals and tangents, one bitangent sign bit per vertex
+# (binormal = sign * cross(normal, tangent)), half-float uvs and optionally 16-bit
+# positions against the mesh bounds. returns the encoded streams, the position
+# minimum and step, and the largest reconstruction errors.
+def encode_compact_streams(streams, use_quantized_positions = False):
+    vertices, normals, binormals, tangents, uvs = [np.asarray(stream, dtype = np.float64) for stream in streams]
+    
+    packed_normals  = encode_octahedral(normals)
+    packed_tangents = encode_octahedral(tangents)
+    negative  = np.sum(np.cross(normals, tangents) * binormals, axis = 1) < 0
+    signs     = np.packbits(negative, bitorder = 'little')
+    signs     = np.concatenate([signs, np.zeros(-len(signs) % 4, dtype = np.uint8)]) # keeps the next stream aligned.
+    packed_uvs = uvs.astype('<f2')
+    
+    position_min  = vertices.min(axis = 0) if len(vertices) else np.zeros(3)
+    position_step = np.zeros(3)
+    packed_vertices = vertices.astype('<f4')
+    if use_quantized_positions:
+        position_step   = (vertices.max(axis = 0) - position_min) / 65535 if len(vertices) else np.zeros(3)
+        packed_vertices = np.round((vertices - position_min) / np.where(position_step > 0, position_step, 1.0)).astype('<u2')
+    
+    decoded_normals  = decode_octahedral(packed_normals)
+    decoded_tangents = decode_octahedral(packed_tangents)
+    decoded_binormals = np.cross(decoded_normals, decoded_tangents) * np.where(negative, -1.0, 1.0)[:, None]
+    errors = {
+        "position": float(np.abs(position_min + packed_vertices * position_step - vertices).max()) if use_quantized_positions and len(vertices) else 0.0,
+        "normal":   max_angle(decoded_normals, normals),
+        "binormal": max_angle(decoded_binormals, binormals),
+        "tangent":  max_angle(decoded_tangents, tangents),
+        "uv":       float(np.abs(packed_uvs.astype(np.float64) - uvs).max()) if len(uvs) else 0.0,
+    }
+    return [packed_vertices, packed_normals, signs, packed_tangents, packed_uvs], position_min, position_step, errors
+
+def report_compact_errors(report, errors):
+    if report is not None:
+        report({'INFO'}, "Compact vertices, max error: position %.6f normal %.4f deg binormal %.4f deg tangent %.4f deg uv %.6f"
+                         % (errors["position"], errors["normal"], errors["binormal"], errors["tangent"], errors["uv"]))
+
+# interleaved vertex attributes and their formats, as numbered in the layout descriptor.
+VERTEX_ATTRIBUTES = ("position", "normal", "binormal", "tangent", "uv")
+VERTEX_FORMATS    = {('f', 4): 0,  # float32
+                     ('f', 2): 1,  # float16
+                     ('i', 2): 2,  # snorm16, 2 components are octahedral unit vectors.
+                     ('u', 2): 3}  # unorm16, quantized positions.
+SECTION_ALIGNMENT = 16
+
+def align_section(offset):
+    return (offset + SECTION_ALIGNMENT - 1) // SECTION_ALIGNMENT * SECTION_ALIGNMENT
+
+def parse_vertex_layout(text):
+    names = text.replace(',', ' ').split()
+    for name in names:
+        if name not in VERTEX_ATTRIBUTES:
+            raise ValueError("Unknown vertex attribute %r, expected some of: %s" % (name, " ".join(VERTEX_ATTRIBUTES)))
+    if not names or len(set(names)) != len(names):
+        raise ValueError("A vertex layout names each attribute once, got %r" % text)
+    return names
+
+# one buffer of whole vertices, attributes in layout order each on a 4 byte boundary.
+# stride 0 rounds the vertex up to 16 bytes. returns the buffer, the stride and
+# (attribute, format, components, offset) for each attribute.
+def interleave_streams(streams, layout, stride = 0):
+    fields = []
+    size   = 0
+    for name in layout:
+        stream = streams[VERTEX_ATTRIBUTES.index(name)]
+        fields.append((name, stream, size))
+        size = size + (stream.dtype.itemsize * stream.shape[1] + 3) // 4 * 4
+    if stride == 0:
+        stride = align_section(size)
+    elif stride < size or stride % 4:
+        raise ValueError("Vertex stride %i is not a multiple of 4 of at least %i bytes, the size of the layout" % (stride, size))
+    
+    dtype  = np.dtype({'names':   [name for name, _, _ in fields],
+                       'formats': [(stream.dtype, stream.shape[1]) for _, stream, _ in fields],
+                       'offsets': [offset for _, _, offset in fields],
+                       'itemsize': stride})
+    buffer = np.zeros(len(streams[0]), dtype = dtype)
+    for name, stream, _ in fields:
+        buffer[name] = stream
+    descriptors = [(VERTEX_ATTRIBUTES.index(name), VERTEX_FORMATS[(stream.dtype.kind, stream.dtype.itemsize)], stream.shape[1], offset)
+                   for name, stream, offset in fields]
+    return buffer, stride, descriptors
+
+# streamed writes: triangles per chunk, each chunk's five streams are encoded at once.
+STREAM_CHUNK_TRIANGLES = 1 << 16
+
+# byte size of each vertex stream, known before any vertex is gathered.
+def streamed_sizes(vertex_count, use_compact):
+    if not use_compact:
+        return [12 * vertex_count, 12 * vertex_count, 12 * vertex_count, 12 * vertex_count, 8 * vertex_count]
+    signs = (vertex_count + 7) // 8
+    return [12 * vertex_count, 4 * vertex_count, signs + (-signs % 4), 4 * vertex_count, 4 * vertex_count]
+
+# tangents of mesh sources for streaming, corners are merged exactly as compute_tangents merges
+# them but a run of positions at a time: corners are sorted by the position of their point and
+# only the triangles of one run are expanded at once. adds the merged vertex of every corner
+# ('corner_vertex', -1 on faces without a normal map) and the merged vertices' tangents.
+def stream_tangents(sources, run_corners = 3 * STREAM_CHUNK_TRIANGLES):
+    points = np.ascontiguousarray(sources['points'], dtype = '<f4')
+    _, point_class = np.unique(points.view(np.dtype((np.void, 12))).ravel(), return_inverse = True)
+    corner_class   = point_class.ravel().astype(np.int32)[sources['corner_points']]
+    if sources['mapped'] is not None:
+        # corners without tangents sort after every position and are left out.
+        corner_class[~np.repeat(mapped_faces(sources['material_index'], sources['mapped']), 3)] = len(points)
+    # stable, so corners of a position keep their order and are summed as compute_tangents sums them.
+    order  = np.argsort(corner_class, kind = 'stable')
+    ends   = np.cumsum(np.bincount(corner_class, minlength = len(points) + 1)[:len(points)])
+    total  = int(ends[-1]) if len(ends) else 0
+    bounds = np.unique(np.concatenate([[0], ends[np.searchsorted(ends, np.arange(run_corners, total, run_corners))], [total]]))
+    del corner_class
+    
+    corner_vertex   = np.full(len(sources['corner_points']), -1, dtype = np.int32)
+    vertex_tangents = [np.zeros((0, 3), dtype = np.float32)]
+    vertex_count    = 0
+    for begin, end in zip(bounds[:-1], bounds[1:]):
+        run = order[begin:end]
+        # the whole triangle of every corner, its share of the tangent needs the other two.
+        positions, _, normals, uvs = expand_corners(sources, (3 * (run // 3)[:, None] + np.arange(3)).ravel())
+        weighted, preserve = weighted_tangents(positions, normals, uvs)
+        own = 3 * np.arange(len(run)) + run % 3
+        inverse, tangents = merge_tangents(positions[own], normals[own], uvs[own], preserve[own], weighted[own])
+        corner_vertex[run] = inverse + vertex_count
+        vertex_tangents.append(tangents)
+        vertex_count = vertex_count + len(tangents)
+    return dict(sources, corner_vertex = corner_vertex, vertex_tangents = np.concatenate(vertex_tangents))
+
+# the streams of a run of material ordered faces in kat axes, as gather_lists builds them for
+# the whole mesh. from mesh sources the corners are expanded here, their tangents looked up
+# from stream_tangents.
+def gather_chunk(data, faces, smooth):
+    corners = (3 * faces[:, None] + np.arange(3)).ravel()
+    if 'corner_points' in data:
+        vertices, point_normals, loop_normals, uvs = expand_corners(data, corners)
+        vertex    = data['corner_vertex'][corners]
+        mapped    = vertex >= 0
+        tangents  = np.zeros((len(corners), 3), dtype = np.float32)
+        binormals = np.zeros((len(corners), 3), dtype = np.float32)
+        tangents[mapped]  = data['vertex_tangents'][vertex[mapped]]
+        signs             = np.repeat(np.where(uv_winding(uvs), 1.0, -1.0), 3)[:, None]
+        binormals[mapped] = (signs * np.cross(np.asarray(loop_normals, dtype = np.float64), tangents))[mapped]
+    else:
+        vertices, point_normals = data['positions'][corners], data['point_normals'][corners]
+        binormals, tangents, uvs = data['binormals'][corners], data['tangents'][corners], data['uvs'][corners]
+    
+    # the whole list is shaded like its first face.
+    normals = np.where(np.repeat(smooth, 3)[:, None], point_normals, np.repeat(data['face_normals'][faces], 3, axis = 0))
+    return [to_kat_axes(vertices), to_kat_axes(normals), to_kat_axes(binormals), to_kat_axes(tangents), uvs]
+
+# one stream of a gathered run, encoded as write_kmesh would, and its largest compact error
+# as encode_compact_streams measures it. compact binormals come back as their sign bits, unpacked.
+def encode_chunk(streams, index, use_compact):
+    stream = streams[index]
+    if not use_compact or index == 0:
+        return stream.astype('<f4'), 0.0
+    stream = np.asarray(stream, dtype = np.float64)
+    if index == 2:
+        normals  = np.asarray(streams[1], dtype = np.float64)
+        tangents = np.asarray(streams[3], dtype = np.float64)
+        negative = np.sum(np.cross(normals, tangents) * stream, axis = 1) < 0
+        decoded  = np.cross(decode_octahedral(encode_octahedral(normals)), decode_octahedral(encode_octahedral(tangents)))
+        return negative, max_angle(decoded * np.where(negative, -1.0, 1.0)[:, None], stream)
+    if index in (1, 3):
+        packed = encode_octahedral(stream)
+        return packed, max_angle(decode_octahedral(packed), stream)
+    packed = stream.astype('<f2')
+    return packed, float(np.abs(packed.astype(np.float64) - stream).max()) if len(stream) else 0.0
+
+def file_descriptor(f):
+    try:
+        return f.fileno() if hasattr(os, 'pwrite') else None
+    except (AttributeError, OSError):
+        return None
+
+def write_at(f, fd, offset, data):
+    view = memoryview(data).cast('B')
+    if fd is None:
+        f.seek(offset)
+        f.write(view)
+        return
+    while len(view):
+        count  = os.pwrite(fd, view, offset)
+        view   = view[count:]
+        offset = offset + count
+
+# writes the vertex streams of every (data, lists) part chunk by chunk at their offsets from the
+# start of the mesh, so only one chunk of gathered vertices is held at a time. data is the
+# mesh sources (see read_mesh_sources) or, already whole, their expansion.
+# offsets are the five stream offsets and the end of the last stream. returns the largest
+# compact error of each stream, as encode_compact_streams does.
+def write_streamed(f, parts, offsets, use_compact, progress = None):
+    base = f.tell() - offsets[0]
+    f.flush()
+    fd = file_descriptor(f)
+    
+    written = [0] * 5
+    errors  = [0.0] * 5
+    carry   = np.zeros(0, dtype = bool)
+    total   = max(sum(len(lists['face_order']) for _, lists in parts), 1)
+    done    = 0
+    with concurrent.futures.ThreadPoolExecutor(max_workers = 5) as pool:
+        for data, lists in parts:
+            smooth     = np.repeat(data['use_smooth'][lists['first_faces']], lists['face_counts'])
+            face_order = lists['face_order']
+            for start in range(0, len(face_order), STREAM_CHUNK_TRIANGLES):
+                part    = slice(start, start + STREAM_CHUNK_TRIANGLES)
+                streams = gather_chunk(data, face_order[part], smooth[part])
+                tasks   = [pool.submit(encode_chunk, streams, index, use_compact) for index in range(5)]
+                for index, task in enumerate(tasks):
+                    chunk, error  = task.result()
+                    errors[index] = max(errors[index], error)
+                    if use_compact and index == 2:
+                        # sign bits are packed 8 to a byte, the remainder waits for the next chunk.
+                        bits  = np.concatenate([carry, chunk])
+                        whole = len(bits) // 8 * 8
+                        carry = bits[whole:]
+                        chunk = np.packbits(bits[:whole], bitorder = 'little')
+                    write_at(f, fd, base + offsets[index] + written[index], np.ascontiguousarray(chunk))
+                    written[index] = written[index] + chunk.nbytes
+                done = done + len(face_order[part])
+                advance(progress, 0.4 + 0.6 * done / total)
+    
+    # the last sign bits and the padding that keeps the next stream aligned.
+    if use_compact:
+        tail = np.packbits(carry, bitorder = 'little')
+        tail = np.concatenate([tail, np.zeros(offsets[3] - offsets[2] - written[2] - len(tail), dtype = np.uint8)])
+        write_at(f, fd, base + offsets[2] + written[2], tail)
+    f.seek(base + offsets[5])
+    return dict(zip(("position", "normal", "binormal", "tangent", "uv"), errors))
+
+# options that need the whole mesh at once, streaming opts out of them.
+def streaming_blocked(use_indexed = False, use_vertex_cache = False, use_quantized_positions = False, use_bounds = False,
+                      use_meshlets = False, use_interleaved = False):
+    return use_indexed or use_vertex_cache or use_quantized_positions or use_bounds or use_meshlets or use_interleaved
+
+# write one joined, triangulated mesh in .kmesh layout. data is the expanded mesh data
+# (see extract_mesh_data) or its sources (see read_mesh_sources), which streaming expands
+# one chunk at a time.
+def write_kmesh(f, obj, data, materials, use_indexed = False, use_compact = False, use_quantized_positions = False,
+                use_vertex_cache = False, lods = (), use_bounds = False, use_meshlets = False, report = None, profile = None,
+                progress = None, use_streaming = False, use_interleaved = False, vertex_layout = "position normal binormal tangent uv",
+                vertex_stride = 0, tangent_cache_size = TANGENT_CACHE_SIZE):
+    # streaming writes each list as it is gathered, options that need the whole mesh at once opt out.
+    if use_streaming and streaming_blocked(use_indexed, use_vertex_cache, use_quantized_positions, use_bounds, use_meshlets,
+                                           use_interleaved):
+        use_streaming = False
+        if report is not None:
+            report({'WARNING'}, "Streaming is not available with Indexed, Optimize Vertex Cache, Quantize Positions, "
+                                "Bounds, Meshlets or Interleaved, the mesh was written from memory")
+    layout = parse_vertex_layout(vertex_layout) if use_interleaved else None
+    
+    # vertices orginised based on material, each lod (data, screen size) appends its own lists.
+    material_names   = [] # list of material names.
+    material_counts  = [] # list of no. of vertices that make up a particular material in order of material names.
+    material_offsets = [] # list of material offsets in order of material names.
+    material_colours = [] # list of material colours in order of material names.
+    lod_table        = [] # first list, list count and screen size of each lod.
+    parts            = []
+    for lod_data, screen_size in [(data, 1.0)] + list(lods):
+        with profiled(profile, "grouping"):
+            lists = group_by_material(materials, lod_data['material_index'])
+        first = sum(material_counts)
+        lod_table.append((len(material_names), len(lists['names']), screen_size))
+        material_names   = material_names   + lists['names']
+        material_counts  = material_counts  + lists['counts']
+        material_offsets = material_offsets + [first + offset for offset in lists['offsets']]
+        material_colours = material_colours + lists['colours']
+        if use_streaming:
+            if 'corner_points' in lod_data and 'corner_vertex' not in lod_data:
+                with profiled(profile, "tangents"):
+                    lod_data = stream_tangents(lod_data)
+            parts.append((lod_data, lists))
+            continue
+        if 'corner_points' in lod_data:
+            with profiled(profile, "extract"):
+                lod_data = expand_sources(lod_data, tangent_cache_size << 20)
+        with profiled(profile, "gather"):
+            parts.append(gather_lists(lod_data, lists))
+    material_count = len(material_names)
+    
+    #vertex, normal, bitangent, tangent & uv count
+    vertex_count = sum(material_counts)
+    
+    streams = []
+    if not use_streaming:
+        with profiled(profile, "gather"):
+            vertices, normals, binormals, tangents, uvs = parts[0] if len(parts) == 1 else [np.concatenate(stream) for stream in zip(*parts)]
+            streams = [to_kat_axes(vertices), to_kat_axes(normals), to_kat_axes(binormals), to_kat_axes(tangents), uvs]
+        advance(progress, 0.2)
+    
+    # meshlets: each list's triangles in spatial order, cut into chunks of up to 128 triangles.
+    meshlets = []
+    if use_meshlets:
+        with profiled(profile, "meshlets"):
+            corners, meshlets = build_meshlets(streams[0], material_counts)
+            streams = [stream[corners] for stream in streams]
+    
+    # bounds of the whole mesh, each vertex list and each meshlet, from the unquantized positions.
+    if use_bounds or use_meshlets:
+        with profiled(profile, "bounds"):
+            mesh_bounds    = range_bounds(streams[0], [len(streams[0])])
+            list_bounds    = range_bounds(streams[0], material_counts)
+            meshlet_bounds = range_bounds(streams[0], [3 * count for _, _, count in meshlets])
+    advance(progress, 0.3)
+    
+    # indexed: unique vertices per list plus a 16/32-bit index buffer.
+    flags        = 0
+    index_count  = 0
+    index_size   = 0
+    index_offsets = material_offsets
+    index_counts  = material_counts
+    if use_indexed or use_vertex_cache:
+        with profiled(profile, "weld"):
+            streams, indices, material_offsets, material_counts = weld_lists(streams, index_offsets, index_counts)
+        flags        = flags | KMESH_INDEXED
+        vertex_count = len(streams[0])
+        index_count  = len(indices)
+        index_size   = 2 if max(material_counts, default = 0) <= 0x10000 else 4
+    advance(progress, 0.4)
+    
+    # vertex cache: triangles of each list reordered for post-transform cache hits.
+    if use_vertex_cache:
+        groups = None
+        if meshlets:
+            groups = [[] for _ in material_names]
+            for number, _, count in meshlets:
+                groups[number].append(count)
+        with profiled(profile, "vertex cache"):
+            streams, indices, before, after = optimize_vertex_cache(streams, indices, material_offsets, material_counts,
+                                                                    index_offsets, index_counts, groups)
+        advance(progress, 0.7)
+        if report is not None:
+            triangles = max(index_count // 3, 1)
+            report({'INFO'}, "Vertex cache (fifo %i): ACMR %.3f -> %.3f, ATVR %.3f -> %.3f"
+                             % (VERTEX_CACHE_SIZE, before / triangles, after / triangles,
+                                before / max(vertex_count, 1), after / max(vertex_count, 1)))
+    
+    if lods:
+        flags = flags | KMESH_LODS
+    if use_bounds or use_meshlets:
+        flags = flags | KMESH_BOUNDS
+    if meshlets:
+        flags = flags | KMESH_MESHLETS
+    
+    # compact: octahedral normals/tangents, bitangent signs, half uvs (and 16-bit positions).
+    position_min  = None
+    position_step = None
+    if use_streaming:
+        if use_compact:
+            flags = flags | KMESH_COMPACT
+    elif use_compact or use_quantized_positions:
+        binormals = streams[2]
+        with profiled(profile, "compact"):
+            streams, position_min, position_step, errors = encode_compact_streams(streams, use_quantized_positions)
+            # sign bits cannot be interleaved, the binormal is stored octahedral like the others.
+            if use_interleaved:
+                streams[2] = encode_octahedral(np.asarray(binormals, dtype = np.float64))
+        flags = flags | KMESH_COMPACT
+        if use_quantized_positions:
+            flags = flags | KMESH_QUANTIZED_POSITIONS
+        report_compact_errors(report, errors)
+    else:
+        streams = [stream.astype('<f4') for stream in streams]
+        advance(progress, 0.8)
+    
+    # interleaved: one vertex buffer in the given layout.
+    if use_interleaved:
+        with profiled(profile, "interleave"):
+            buffer, vertex_stride, descriptors = interleave_streams(streams, layout, vertex_stride)
+        streams = [buffer]
+        flags   = flags | KMESH_INTERLEAVED
+    
+    # quantized positions round up to half a step outside the bounds.
+    if use_quantized_positions and flags & KMESH_BOUNDS:
+        for bounds in (mesh_bounds, list_bounds, meshlet_bounds):
+            pad_bounds(bounds, position_step / 2)
+    
+    #calculate rotation
+    # (+) anti-clockwise (-) clockwise
+    rotation_x =  obj.rotation_euler.y # must be positive radians
+    rotation_y =  obj.rotation_euler.z # must be positive radians
+    rotation_z =  obj.rotation_euler.x # must be positive radians
+    if(rotation_x < 0): rotation_x = -rotation_x
+    else:               rotation_x = (2*pi) - rotation_x
+    if(rotation_y < 0): rotation_y = -rotation_y
+    else:               rotation_y = (2*pi) - rotation_y
+    if(rotation_z < 0): rotation_z = -rotation_z
+    else:               rotation_z = (2*pi) - rotation_z
+        
+    #offsets
+    header_size        = 32 + (10 * 4)
+    material_size      = 32 + 24
+    if flags:
+        header_size    = header_size   + (4 * 4)
+    if flags & KMESH_QUANTIZED_POSITIONS:
+        header_size    = header_size   + (6 * 4)
+    lod_offset         = header_size
+    if flags & KMESH_LODS:
+        header_size    = header_size   + 4 + (len(lod_table) * 3 * 4)
+    bounds_offset      = header_size
+    if flags & KMESH_BOUNDS:
+        header_size    = header_size   + (10 * 4)
+    if flags & KMESH_MESHLETS:
+        header_size    = header_size   + (2 * 4)
+    layout_offset      = header_size
+    if flags & KMESH_INTERLEAVED:
+        header_size    = header_size   + (4 * 4) + (len(descriptors) * 4)
+    if flags & KMESH_INDEXED:
+        material_size  = material_size + (2 * 4)
+    bounds_entry       = material_size
+    if flags & KMESH_BOUNDS:
+        material_size  = material_size + (10 * 4)
+    meshlet_size       = (4 * 4) + (10 * 4)
+    
+    orientation_offset = header_size
+    material_offset    = orientation_offset + (3 * 3 * 4) 
+    meshlet_offset     = material_offset    + (material_count * material_size)
+    vert_offset        = meshlet_offset     + (len(meshlets) * meshlet_size)
+    if flags & KMESH_INTERLEAVED:
+        # the buffers start on 16 byte boundaries, each stream offset points at
+        # its attribute in the first vertex, 0 when the layout leaves it out.
+        buffer_offset  = align_section(vert_offset)
+        offsets        = [0] * len(VERTEX_ATTRIBUTES)
+        for attribute, _, _, offset in descriptors:
+            offsets[attribute] = buffer_offset + offset
+        vert_offset, norm_offset, binorm_offset, tangent_offset, uv_offset = offsets
+        index_offset   = align_section(buffer_offset + buffer.nbytes)
+    else:
+        sizes          = streamed_sizes(vertex_count, use_compact) if use_streaming else [stream.nbytes for stream in streams]
+        norm_offset    = vert_offset        + sizes[0]
+        binorm_offset  = norm_offset        + sizes[1]
+        tangent_offset = binorm_offset      + sizes[2]
+        uv_offset      = tangent_offset     + sizes[3]
+        index_offset   = uv_offset          + sizes[4]
+      
+    size  = index_offset + (index_count * index_size)
+    
+    #writing
+    
+    #header
+    header = bytearray(header_size)
+    struct.pack_into('<32s10I', header, 0,
+                     (obj.name.split('.')[0]).ljust(32,"\0")[:32].encode('ascii'),
+                     size, vertex_count, material_count, orientation_offset, vert_offset,
+                     norm_offset, binorm_offset, tangent_offset, uv_offset, material_offset)
+    
+    #extended header
+    if flags:
+        struct.pack_into('<4I', header, 72, flags, index_count, index_size, index_offset)
+    if flags & KMESH_QUANTIZED_POSITIONS:
+        struct.pack_into('<6f', header, 88, *position_min, *position_step)
+    
+    #lod table
+    if flags & KMESH_LODS:
+        struct.pack_into('<I', header, lod_offset, len(lod_table))
+        for index, (first_list, list_count, screen_size) in enumerate(lod_table):
+            struct.pack_into('<2If', header, lod_offset + 4 + (index * 3 * 4), first_list, list_count, screen_size)
+    
+    #bounds and meshlet table
+    if flags & KMESH_BOUNDS:
+        struct.pack_into('<10f', header, bounds_offset, *mesh_bounds[0])
+    if flags & KMESH_MESHLETS:
+        struct.pack_into('<2I', header, bounds_offset + (10 * 4), len(meshlets), meshlet_offset)
+    
+    #vertex layout
+    if flags & KMESH_INTERLEAVED:
+        struct.pack_into('<4I', header, layout_offset, vertex_stride, len(descriptors), buffer_offset, buffer.nbytes)
+        for index, descriptor in enumerate(descriptors):
+            struct.pack_into('<4B', header, layout_offset + (4 * 4) + (index * 4), *descriptor)
+    
+    #orientation
+    orientation = struct.pack('<9f',
+                              obj.location.y, obj.location.z, -obj.location.x,
+                              rotation_x,     rotation_y,      rotation_z,
+                              obj.scale.y,    obj.scale.z,     obj.scale.x)
+    
+    #vertex list information
+    table = bytearray(material_count * material_size)
+    count = 0  
+    for mat in material_names:
+        struct.pack_into('<32s2I4f', table, count * material_size,
+                         material_names[count].ljust(32, "\0")[:32].encode('ascii'),
+                         material_offsets[count], material_counts[count],
+                         material_colours[count][0], material_colours[count][1],
+                         material_colours[count][2], material_colours[count][3])
+        if flags & KMESH_INDEXED:
+            struct.pack_into('<2I', table, count * material_size + 56, index_offsets[count], index_counts[count])
+        if flags & KMESH_BOUNDS:
+            struct.pack_into('<10f', table, count * material_size + bounds_entry, *list_bounds[count])
+        count = count + 1
+    
+    #meshlets
+    chunks = bytearray(len(meshlets) * meshlet_size)
+    for index, (number, first, count) in enumerate(meshlets):
+        struct.pack_into('<3I4x10f', chunks, index * meshlet_size, number, first, count, *meshlet_bounds[index])
+    
+    with profiled(profile, "write"):
+        f.write(header)
+        f.write(orientation)
+        f.write(table)
+        f.write(chunks)
+        
+        if use_streaming:
+            errors = write_streamed(f, parts, [vert_offset, norm_offset, binorm_offset, tangent_offset, uv_offset, index_offset],
+                                    use_compact, progress)
+            # streamed errors are only known once every chunk is written.
+            if use_compact:
+                report_compact_errors(report, errors)
+          
+        if flags & KMESH_INTERLEAVED:
+            f.write(bytes(buffer_offset - (meshlet_offset + len(chunks))))
+          
+        for index, stream in enumerate(streams):
+            f.write(stream.tobytes())
+            advance(progress, 0.8 + 0.2 * (index + 1) / len(streams))
+        
+        if flags & KMESH_INTERLEAVED:
+            f.write(bytes(index_offset - (buffer_offset + buffer.nbytes)))
+        if flags & KMESH_INDEXED:
+            f.write(indices.astype('<u2' if index_size == 2 else '<u4').tobytes())
+    
+    if profile is not None:
+        profile.count("triangles", sum(index_counts) // 3)
+        profile.count("vertex lists", material_count)
+        profile.count("vertices", vertex_count)
+        profile.count("indices", index_count)
+        profile.count("meshlets", len(meshlets))
+
+# read the selected meshes from the evaluated depsgraph without touching scene data.
+# meshes are placed in the active object's space, as bpy.ops.object.join() would.
+# streaming only reads the mesh sources, they are expanded as they are written.
+def gather_evaluated(context, use_mapped_tangents = False, cache_bytes = TANGENT_CACHE_SIZE << 20, use_streaming = False):
+    depsgraph = context.evaluated_depsgraph_get()
+    selected  = [obj for obj in context.selected_objects if obj.type == 'MESH']
+    active    = context.active_object if context.active_object in selected else selected[0]
+    to_active = active.matrix_world.inverted()
+    
+    parts     = []
+    materials = []
+    for obj in selected:
+        evaluated = obj.evaluated_get(depsgraph)
+        mesh      = evaluated.to_mesh()
+        if obj != active:
+            mesh.transform(to_active @ obj.matrix_world)
+        
+        slots  = [slot.material for slot in obj.material_slots]
+        mapped = normal_mapped_slots(slots) if use_mapped_tangents else None
+        # streamed tangents are merged per mesh before joining, as extracted ones are.
+        part   = stream_tangents(read_triangle_sources(mesh, mapped)) if use_streaming else extract_triangle_data(mesh, mapped, cache_bytes)
+        part['material_index'] = part['material_index'] + len(materials)
+        parts.append(part)
+        materials.extend(slots)
+        
+        evaluated.to_mesh_clear()
+    
+    if use_streaming:
+        return active, join_sources(parts), materials
+    data = {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+    return active, data, materials
+
+# "0.5 0.25, 0.125" -> [0.5, 0.25, 0.125], each a fraction of the full triangle count.
+def parse_lod_ratios(text):
+    ratios = [float(value) for value in text.replace(',', ' ').split()]
+    for ratio in ratios:
+        if not 0.0 < ratio < 1.0:
+            raise ValueError("LOD ratios must be between 0 and 1, got %g" % ratio)
+    return ratios
+
+# one decimated copy of the export per ratio, read by gather through the same bulk extraction.
+# the screen size of a lod is where its triangle density matches the full mesh at full screen.
+def gather_lods(objects, ratios, gather):
+    lods = []
+    for ratio in ratios:
+        modifiers = [(obj, obj.modifiers.new("Kat LOD", 'DECIMATE')) for obj in objects]
+        for obj, modifier in modifiers:
+            modifier.ratio = ratio
+        try:
+            lods.append((gather(), sqrt(ratio)))
+        finally:
+            for obj, modifier in modifiers:
+                obj.modifiers.remove(modifier)
+    return lods
+
+def evaluated_triangle_data(context, obj, mapped = None, cache_bytes = TANGENT_CACHE_SIZE << 20, use_streaming = False):
+    evaluated = obj.evaluated_get(context.evaluated_depsgraph_get())
+    mesh      = evaluated.to_mesh()
+    data      = read_triangle_sources(mesh, mapped) if use_streaming else extract_triangle_data(mesh, mapped, cache_bytes)
+    evaluated.to_mesh_clear()
+    return data
+
+# read the export out of bpy on the main thread: one (object, data, materials, lods) per written mesh.
+def gather_export(context, use_evaluated, ratios, profile = None, use_mapped_tangents = False,
+                  tangent_cache_size = TANGENT_CACHE_SIZE, use_streaming = False):
+    cache_bytes = tangent_cache_size << 20
+    if use_evaluated:
+        selected = [selected for selected in context.selected_objects if selected.type == 'MESH']
+        if profile is not None:
+            profile.count("objects",  len(selected))
+            profile.count("polygons", sum(len(selected.data.polygons) for selected in selected))
+            profile.count("corners",  sum(len(selected.data.loops)    for selected in selected))
+        with profiled(profile, "evaluate"):
+            obj, data, materials = gather_evaluated(context, use_mapped_tangents, cache_bytes, use_streaming)
+        with profiled(profile, "lods") if ratios else contextlib.nullcontext():
+            lods = gather_lods(selected, ratios, lambda: gather_evaluated(context, use_mapped_tangents, cache_bytes, use_streaming)[1])
+        if profile is not None:
+            profile.count("materials", len(materials))
+        return [(snapshot_object(obj), data, snapshot_materials(materials), lods)]
+    
+    # duplicate selected objects, then join them into one mesh.
+    with profiled(profile, "duplicate/join"):
+        bpy.ops.object.duplicate() 
+        bpy.ops.object.join()
     
     # there should be only one object in the array.
+    parts = []
     for selected in bpy.context.selected_objects:
         mesh = selected.data
         obj  = selected
+        if profile is not None:
+            profile.count("polygons",  len(mesh.polygons))
+            profile.count("corners",   len(mesh.loops))
+            profile.count("materials", len(obj.material_slots))
         
-        triangulate_object(obj)
-       
-        # vertices orginised based on material.
-        material_names   = [] # list of material names.
-        material_counts  = [] # list of no. of vertices that make up a particular material in order of material names.
-        material_offsets = [] # list of material offsets in order of material names.
-        material_colours = [] # list of material colours in order of material names.
-        
-        vertices  = [] 
-        uvs       = []
-        normals   = []
-        binormals = []
-        tangents  = []
-        
-        #vertex, normal, bitangent, tangent & uv count
-        vertex_count = 0
-        
-        for face in mesh.polygons:
-            vertex_count = vertex_count + 3
-            current_name = obj.material_slots[face.material_index].material.name
-            current_colour = obj.material_slots[face.material_index].material.diffuse_color
-            unique = True
-            
-            for material in material_names:
-                if (material == current_name):
-                    unique = False 
-                    break
-                
-            if(unique == True):
-                count = 0
-                num   = 0
-
-                for surface in mesh.polygons:          
-                    mat_surface  = obj.material_slots[surface.material_index].material
-
-                    if (mat_surface.name == current_name):
-                        vertices.append(mesh.vertices[surface.vertices[0]].co)
-                        vertices.append(mesh.vertices[surface.vertices[1]].co)
-                        vertices.append(mesh.vertices[surface.vertices[2]].co)
-                        
-                        if (face.use_smooth == True):
-                            normals.append(mesh.vertices[surface.vertices[0]].normal)
-                            normals.append(mesh.vertices[surface.vertices[1]].normal)
-                            normals.append(mesh.vertices[surface.vertices[2]].normal)
-                        else:
-                            normals.append(surface.normal)
-                            normals.append(surface.normal)
-                            normals.append(surface.normal)
-                            
-                        binormals.append(mesh.loops[num].bitangent)
-                        binormals.append(mesh.loops[num + 1].bitangent)
-                        binormals.append(mesh.loops[num + 2].bitangent)
-                        
-                        tangents.append(mesh.loops[num].tangent)
-                        tangents.append(mesh.loops[num + 1].tangent)
-                        tangents.append(mesh.loops[num + 2].tangent)     
-                            
-                        uvs.append(mesh.uv_layers.active.data[num].uv)
-                        uvs.append(mesh.uv_layers.active.data[num + 1].uv)
-                        uvs.append(mesh.uv_layers.active.data[num + 2].uv)
-                        
-                        num   = num   + 3;
-                        count = count + 3;
-                    else:
-                        num   = num + 3
-                                                     
-                material_counts.append(count)
-                material_names.append(current_name) 
-                material_colours.append(current_colour)
-        
-        #calculate material offsets
-        cumulative = 0
-        count      = 0
-        for mat in material_counts:
-            material_offsets.append(cumulative)
-            cumulative = cumulative + material_counts[count]
-            count = count + 1
-                           
-        #calculate material count         
-        material_count = 0
-        for mat in material_names:
-            material_count = material_count + 1
-            
-        #calculate rotation
-        # (+) anti-clockwise (-) clockwise
-        rotation_x =  obj.rotation_euler.y # must be positive radians
-        rotation_y =  obj.rotation_euler.z # must be positive radians
-        rotation_z =  obj.rotation_euler.x # must be positive radians
-        if(rotation_x < 0): rotation_x = -rotation_x
-        else:               rotation_x = (2*pi) - rotation_x
-        if(rotation_y < 0): rotation_y = -rotation_y
-        else:               rotation_y = (2*pi) - rotation_y
-        if(rotation_z < 0): rotation_z = -rotation_z
-        else:               rotation_z = (2*pi) - rotation_z
-            
-        #offsets
-        orientation_offset = 32 + (10 * 4)
-        material_offset    = orientation_offset + (3 * 3 * 4) 
-        vert_offset        = material_offset    + (material_count * (32 + 24))
-        norm_offset        = vert_offset        + (vertex_count   * 3  * 4)
-        binorm_offset      = norm_offset        + (vertex_count   * 3  * 4)
-        tangent_offset     = binorm_offset      + (vertex_count   * 3  * 4)
-        uv_offset          = tangent_offset     + (vertex_count   * 3  * 4)
-          
-        size  = uv_offset + (vertex_count * 2 * 4)
-        
-        #writing
-                 
-        #count
-        f.write((obj.name.split('.')[0]).ljust(32,"\0")[:32].encode('ascii'))
-        
-        f.write(          size.to_bytes(4, byteorder = 'little'))
-        f.write(  vertex_count.to_bytes(4, byteorder = 'little'))
-        f.write(material_count.to_bytes(4, byteorder = 'little'))    
-        f.write(orientation_offset.to_bytes(4, byteorder = 'little'))      
-        f.write(       vert_offset.to_bytes(4, byteorder = 'little'))
-        f.write(       norm_offset.to_bytes(4, byteorder = 'little'))
-        f.write(     binorm_offset.to_bytes(4, byteorder = 'little'))
-        f.write(    tangent_offset.to_bytes(4, byteorder = 'little'))
-        f.write(         uv_offset.to_bytes(4, byteorder = 'little'))
-        f.write(   material_offset.to_bytes(4, byteorder = 'little'))
-        
-        #orientation
-        f.write(struct.pack('f',  obj.location.y))
-        f.write(struct.pack('f',  obj.location.z))
-        f.write(struct.pack('f', -obj.location.x))  
-        f.write(struct.pack('f',  rotation_x))
-        f.write(struct.pack('f',  rotation_y))
-        f.write(struct.pack('f',  rotation_z))
-        f.write(struct.pack('f',  obj.scale.y))
-        f.write(struct.pack('f',  obj.scale.z))
-        f.write(struct.pack('f',  obj.scale.x))
-               
-        count = 0  
-        for mat in material_names:
-            f.write(material_names  [count].ljust(32, "\0")[:32].encode('ascii'))
-            f.write(material_offsets[count].to_bytes(4, byteorder = 'little'))
-            f.write(material_counts [count].to_bytes(4, byteorder = 'little'))
-            f.write(struct.pack('f', material_colours[count][0]))
-            f.write(struct.pack('f', material_colours[count][1]))
-            f.write(struct.pack('f', material_colours[count][2]))
-            f.write(struct.pack('f', material_colours[count][3]))
-            count = count + 1
-          
-        for vertex in vertices:
-            f.write(struct.pack('f',  vertex.y))
-            f.write(struct.pack('f',  vertex.z))
-            f.write(struct.pack('f', -vertex.x))   
-            
-        for normal in normals:
-            f.write(struct.pack('f',  normal.y))
-            f.write(struct.pack('f',  normal.z)) 
-            f.write(struct.pack('f', -normal.x))        
-        for binormal in binormals:
-            f.write(struct.pack('f',  binormal.y))
-            f.write(struct.pack('f',  binormal.z)) 
-            f.write(struct.pack('f', -binormal.x)) 
-        for tangent in tangents:
-            f.write(struct.pack('f',  tangent.y))
-            f.write(struct.pack('f',  tangent.z)) 
-            f.write(struct.pack('f', -tangent.x)) 
-            
-        for uv in uvs:
-            f.write(struct.pack('f', uv[0]))
-            f.write(struct.pack('f', uv[1]))
-        
-    bpy.ops.object.delete()
-                    
+        with profiled(profile, "triangulate"):
+            triangulate_object(obj)
+        
+        mapped = normal_mapped_slots(slot.material for slot in obj.material_slots) if use_mapped_tangents else None
+        with profiled(profile, "extract"):
+            data = read_mesh_sources(mesh, mapped) if use_streaming else extract_mesh_data(mesh, mapped, cache_bytes)
+        # the joined mesh is exported without its modifiers, the lods are decimated from it alone.
+        # the duplicate is deleted below, its modifiers are not turned back on.
+        for modifier in obj.modifiers:
+            modifier.show_viewport = False
+        with profiled(profile, "lods") if ratios else contextlib.nullcontext():
+            lods = gather_lods([obj], ratios, lambda: evaluated_triangle_data(context, obj, mapped, cache_bytes, use_streaming))
+        parts.append((snapshot_object(obj), data, snapshot_materials(slot.material for slot in obj.material_slots), lods))
+        
+    with profiled(profile, "delete"):
+        bpy.ops.object.delete()
+    return parts
+
+# gathers on the calling (main) thread and returns encode(f, report, progress), which only
+# touches the copies and can run on a worker thread.
+def prepare_export(context, use_indexed = False, use_evaluated = False, use_compact = False,
+                   use_quantized_positions = False, use_vertex_cache = False, use_lods = False, lod_ratios = "0.5 0.25 0.125",
+                   use_bounds = False, use_meshlets = False, use_streaming = False, use_interleaved = False,
+                   vertex_layout = "position normal binormal tangent uv", vertex_stride = 0, compression = 'NONE',
+                   section_filter = 'NONE', use_mapped_tangents = False, tangent_cache_size = TANGENT_CACHE_SIZE, profile = None):
+    ratios = parse_lod_ratios(lod_ratios) if use_lods else []
+    if use_interleaved:
+        parse_vertex_layout(vertex_layout)
+    # compressed files are encoded whole in memory before their sections are written, streaming opts out.
+    uncompressed = use_streaming and compression != 'NONE'
+    if uncompressed:
+        use_streaming = False
+    # streamed meshes are read as their sources, write_kmesh expands them chunk by chunk.
+    streamed = use_streaming and not streaming_blocked(use_indexed, use_vertex_cache, use_quantized_positions, use_bounds,
+                                                       use_meshlets, use_interleaved)
+    parts  = gather_export(context, use_evaluated, ratios, profile, use_mapped_tangents, tangent_cache_size, streamed)
+    
+    def encode(f, report = None, progress = None):
+        for index, (obj, data, materials, lods) in enumerate(parts):
+            step = None
+            if progress is not None:
+                step = lambda fraction, index = index: progress((index + fraction) / len(parts))
+            write_kmesh(f, obj, data, materials, use_indexed, use_compact, use_quantized_positions, use_vertex_cache, lods,
+                        use_bounds, use_meshlets, report, profile, step, use_streaming, use_interleaved, vertex_layout,
+                        vertex_stride)
+    if compression == 'NONE':
+        return encode
+    
+    # the raw file is encoded in memory, then written as compressed sections.
+    def encode_sections(f, report = None, progress = None):
+        if uncompressed and report is not None:
+            report({'WARNING'}, "Streaming is not available with Compression, the mesh was written from memory")
+        recorder = SectionRecorder()
+        encode(recorder, report, progress)
+        with profiled(profile, "compress"):
+            size, packed = write_sections(f, recorder.getbuffer(), recorder.starts, compression, section_filter)
+        if report is not None:
+            report({'INFO'}, "Compressed %i bytes to %i (%.1f:1) with %s" % (size, packed, size / max(packed, 1), compression.lower()))
+    return encode_sections
+
+def write(context, filepath, use_indexed = False, use_evaluated = False, use_compact = False,
+          use_quantized_positions = False, use_vertex_cache = False, use_lods = False, lod_ratios = "0.5 0.25 0.125",
+          use_bounds = False, use_meshlets = False, use_streaming = False, use_interleaved = False,
+          vertex_layout = "position normal binormal tangent uv", vertex_stride = 0, compression = 'NONE',
+          section_filter = 'NONE', use_mapped_tangents = False, tangent_cache_size = TANGENT_CACHE_SIZE, use_profile = False,
+          profile_log = "", report = None): 
+    
+    # there is nothing to join or evaluate, and no file is written.
+    if not any(obj.type == 'MESH' for obj in context.selected_objects):
+        if report is not None:
+            report({'ERROR'}, "No mesh objects selected")
+        return {'CANCELLED'}
+    
+    profile = ExportProfile("kmesh-binary") if use_profile or profile_log else None
+    encode  = prepare_export(context, use_indexed, use_evaluated, use_compact, use_quantized_positions, use_vertex_cache,
+                             use_lods, lod_ratios, use_bounds, use_meshlets, use_streaming, use_interleaved, vertex_layout,
+                             vertex_stride, compression, section_filter, use_mapped_tangents, tangent_cache_size, profile)
+    
+    f = open(filepath, 'wb') 
+    encode(f, report)
     f.close()
+    
+    finish_profile(profile, filepath, profile_log, report)
     return {'FINISHED'}
 
+# every setting of every modifier on obj as text, objects and other data blocks by name.
+def modifier_settings(obj):
+    settings = []
+    for modifier in obj.modifiers:
+        values = []
+        for prop in modifier.bl_rna.properties:
+            if prop.identifier == 'rna_type' or prop.type == 'COLLECTION':
+                continue
+            value = getattr(modifier, prop.identifier)
+            if prop.type == 'POINTER':
+                value = getattr(value, 'name', None)
+            elif getattr(prop, 'is_array', False):
+                value = tuple(value)
+            values.append((prop.identifier, value))
+        settings.append((modifier.type, values))
+    return repr(settings)
+
+# hash everything the export reads: geometry, uvs, materials, transforms and options.
+def hash_mesh_inputs(context, keywords):
+    digest = hashlib.blake2b(digest_size = 20)
+    for path in (__file__, kat_export_common.__file__):
+        with open(path, 'rb') as source:
+            digest.update(source.read())
+    digest.update(repr(sorted(item for item in keywords.items() if item[0] not in PROFILE_OPTIONS)).encode('utf-8'))
+    
+    use_evaluated = keywords.get('use_evaluated', False)
+    depsgraph     = context.evaluated_depsgraph_get() if use_evaluated else None
+    for obj in context.selected_objects:
+        if obj.type != 'MESH':
+            continue
+        evaluated = obj.evaluated_get(depsgraph) if use_evaluated else obj
+        mesh      = evaluated.to_mesh() if use_evaluated else obj.data
+        
+        digest.update(obj.name.encode('utf-8'))
+        digest.update(b'active' if obj == context.active_object else b'selected')
+        transform = [value for row in obj.matrix_world for value in row]
+        transform = transform + list(obj.location) + list(obj.rotation_euler) + list(obj.scale)
+        digest.update(np.array(transform, dtype = np.float64).tobytes())
+        
+        for collection, attribute, dtype, width in (
+                (mesh.vertices, 'co',             np.float32, 3),
+                (mesh.loops,    'vertex_index',   np.int32,   1),
+                (mesh.polygons, 'loop_start',     np.int32,   1),
+                (mesh.polygons, 'loop_total',     np.int32,   1),
+                (mesh.polygons, 'material_index', np.int32,   1),
+                (mesh.polygons, 'use_smooth',     bool,       1)):
+            values = np.empty(len(collection) * width, dtype = dtype)
+            collection.foreach_get(attribute, values)
+            digest.update(values.tobytes())
+        if mesh.uv_layers.active is not None:
+            uvs = np.empty(len(mesh.loops) * 2, dtype = np.float32)
+            mesh.uv_layers.active.data.foreach_get('uv', uvs)
+            digest.update(uvs.tobytes())
+        
+        for slot in obj.material_slots:
+            if slot.material is not None:
+                digest.update(slot.material.name.encode('utf-8'))
+                digest.update(np.array(slot.material.diffuse_color, dtype = np.float64).tobytes())
+        if keywords.get('use_mapped_tangents', False):
+            # which slots get tangents depends on the materials' node trees.
+            digest.update(normal_mapped_slots(slot.material for slot in obj.material_slots).tobytes())
+        if keywords.get('use_lods', False):
+            # lods are decimated through the modifier stack.
+            digest.update(modifier_settings(obj).encode('utf-8'))
+        
+        if use_evaluated:
+            evaluated.to_mesh_clear()
+    
+    return digest.hexdigest()
+
 
 class ExportMeshData(Operator, ExportHelper):
     """Export mesh data in Kat Mesh format [binary] (.kmesh)""" 
@@ -224,9 +1227,212 @@ class ExportMeshData(Operator, ExportHelper):
 
     filename_ext = ".kmesh"
     filter_glob: StringProperty(default="*.km", options = {'HIDDEN'}, maxlen=255)
+    
+    use_indexed: BoolProperty(
+        name="Indexed",
+        description="Weld identical vertices in each vertex list and write an index buffer",
+        default=False,
+        )
+    
+    use_evaluated: BoolProperty(
+        name="Evaluated Mesh",
+        description="Read the selected meshes from the evaluated depsgraph instead of duplicating and joining them, the scene is left untouched",
+        default=False,
+        )
+    
+    use_compact: BoolProperty(
+        name="Compact Vertices",
+        description="Octahedral 16-bit normals and tangents, a bitangent sign bit instead of binormals and half-float uvs",
+        default=False,
+        )
+    
+    use_quantized_positions: BoolProperty(
+        name="Quantize Positions",
+        description="Store positions as 16 bits against the mesh bounds, implies Compact Vertices",
+        default=False,
+        )
+
+    use_vertex_cache: BoolProperty(
+        name="Optimize Vertex Cache",
+        description="Reorder the triangles of each vertex list for the GPU's post-transform vertex cache, implies Indexed",
+        default=False,
+        )
+
+    use_lods: BoolProperty(
+        name="LODs",
+        description="Add decimated levels of detail to the file, one per LOD ratio, with an LOD table in the header",
+        default=False,
+        )
+    
+    lod_ratios: StringProperty(
+        name="LOD Ratios",
+        description="Fraction of the triangles kept by each LOD, separated by spaces or commas",
+        default="0.5 0.25 0.125",
+        )
+
+    use_bounds: BoolProperty(
+        name="Bounds",
+        description="Write a bounding box and sphere for the whole mesh and for each vertex list",
+        default=False,
+        )
+
+    use_meshlets: BoolProperty(
+        name="Meshlets",
+        description="Split each vertex list into spatial chunks of up to 128 triangles with their own bounds, implies Bounds",
+        default=False,
+        )
+
+    use_streaming: BoolProperty(
+        name="Streamed Write",
+        description="Gather, encode and write the vertices in chunks of triangles to keep memory use flat on large meshes, "
+                    "not available with Indexed, Optimize Vertex Cache, Quantize Positions, Bounds, Meshlets, Interleaved or Compression",
+        default=False,
+        )
+
+    use_interleaved: BoolProperty(
+        name="Interleaved",
+        description="Write one interleaved vertex buffer in the Vertex Layout with a layout descriptor in the header, "
+                    "the vertex and index buffers start on 16 byte boundaries",
+        default=False,
+        )
+    
+    vertex_layout: StringProperty(
+        name="Vertex Layout",
+        description="Attributes of an interleaved vertex in order, any of position normal binormal tangent uv",
+        default="position normal binormal tangent uv",
+        )
+    
+    vertex_stride: IntProperty(
+        name="Vertex Stride",
+        description="Bytes per interleaved vertex, a multiple of 4, 0 rounds the layout up to 16 bytes",
+        default=0,
+        min=0,
+        )
+
+    compression: EnumProperty(
+        name="Compression",
+        description="Compress each section of the file on its own so readers can decompress them in parallel",
+        items=(('NONE', "None", "Raw .kmesh"),
+               ('ZLIB', "zlib", "Fast to decompress"),
+               ('LZMA', "lzma", "Smaller, slower to compress and decompress")),
+        default='NONE',
+        )
+    
+    section_filter: EnumProperty(
+        name="Filter",
+        description="Rearrange each section's bytes before compressing it",
+        items=(('NONE',    "None",    "Compress the bytes as they are"),
+               ('SHUFFLE', "Shuffle", "Group the n-th byte of every 32-bit value"),
+               ('DELTA',   "Delta",   "Store each 32-bit value minus the previous one, then shuffle")),
+        default='NONE',
+        )
+
+    use_mapped_tangents: BoolProperty(
+        name="Normal Mapped Tangents Only",
+        description="Compute tangents and binormals only for materials with a Normal Map node, the others are written as zeros",
+        default=False,
+        )
+
+    tangent_cache_size: IntProperty(
+        name="Tangent Cache Size (MB)",
+        description="Computed tangents kept for re-exporting unchanged meshes, least recently used first out, 0 keeps none",
+        default=TANGENT_CACHE_SIZE,
+        min=0,
+        )
+
+    use_profile: BoolProperty(
+        name="Profile",
+        description="Report the time of each export phase, element counts, bytes written and peak memory",
+        default=False,
+        )
+    
+    profile_log: StringProperty(
+        name="Profile Log",
+        description="Append the profile to this file, one row per phase and counter for .csv, one json object per line otherwise",
+        default="",
+        subtype='FILE_PATH',
+        )
+
+    use_background: BoolProperty(
+        name="Background",
+        description="Copy the mesh data, then encode and write the file on a worker thread so Blender stays responsive, Esc cancels",
+        default=False,
+        )
+
+    use_cache: BoolProperty(
+        name="Cache",
+        description="Reuse the previous export when the exported inputs have not changed",
+        default=False,
+        )
+    
+    cache_size: IntProperty(
+        name="Cache Size (MB)",
+        description="Size of the export cache, least recently used exports are evicted first",
+        default=1024,
+        min=1,
+        )
 
     def execute(self, context):
-        return write(context, self.filepath)
+        if not any(obj.type == 'MESH' for obj in context.selected_objects):
+            self.report({'ERROR'}, "No mesh objects selected")
+            return {'CANCELLED'}
+        keywords = self.as_keywords(ignore=("filepath", "filter_glob", "check_existing", "use_cache", "cache_size",
+                                            "use_background"))
+        key = None
+        if self.use_cache:
+            key = hash_mesh_inputs(context, keywords)
+            if cache_fetch(key, self.filepath, self.filename_ext):
+                self.report({'INFO'}, "Inputs unchanged, reused the cached export")
+                return {'FINISHED'}
+        if self.use_background:
+            return self.start_background(context, keywords, key)
+        
+        result = write(context, self.filepath, report=self.report, **keywords)
+        if key is not None:
+            cache_store(key, self.filepath, self.filename_ext, self.cache_size * 1024 * 1024)
+        return result
+    
+    # the mesh is copied out of bpy here, the worker encodes and writes while the ui keeps running.
+    def start_background(self, context, keywords, key):
+        self.key         = key
+        self.profile_log = keywords.pop("profile_log")
+        self.profile     = ExportProfile('kmesh-binary') if keywords.pop("use_profile") or self.profile_log else None
+        self.job         = BackgroundExport(self.filepath, prepare_export(context, profile=self.profile, **keywords), 'wb')
+        
+        window_manager = context.window_manager
+        self.timer = window_manager.event_timer_add(0.1, window=context.window)
+        window_manager.progress_begin(0, 100)
+        window_manager.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+    
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            self.job.cancelled.set()
+            return {'RUNNING_MODAL'}
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+        
+        window_manager = context.window_manager
+        window_manager.progress_update(int(self.job.progress * 100))
+        if not self.job.future.done():
+            return {'PASS_THROUGH'}
+        
+        window_manager.event_timer_remove(self.timer)
+        window_manager.progress_end()
+        for kind, message in self.job.messages:
+            self.report(kind, message)
+        error = self.job.future.exception()
+        if isinstance(error, ExportCancelled):
+            self.report({'WARNING'}, "Export cancelled, %s was left unchanged" % self.filepath)
+            return {'CANCELLED'}
+        if error is not None:
+            self.report({'ERROR'}, "Export failed: %s" % error)
+            return {'CANCELLED'}
+        
+        finish_profile(self.profile, self.filepath, self.profile_log, self.report)
+        if self.key is not None:
+            cache_store(self.key, self.filepath, self.filename_ext, self.cache_size * 1024 * 1024)
+        return {'FINISHED'}
 
 # export menu
 def menu_func_export(self, context):
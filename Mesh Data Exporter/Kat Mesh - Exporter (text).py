@@ -15,13 +15,38 @@ bl_info = {
 
 import bpy
 import bmesh
+import os
+import sys
+import hashlib
+import importlib.util
+import numpy as np
 
 from bpy_extras.io_utils import ExportHelper
-from bpy.props import StringProperty, BoolProperty, EnumProperty
+from bpy.props import StringProperty, BoolProperty, EnumProperty, IntProperty
 from bpy.types import Operator
 from math      import sqrt, pi
 from mathutils import Matrix, Vector
 
+# helpers shared by the kat exporters have one copy, Exporter Common/kat_export_common.py next
+# to this exporter's folder. an importable kat_export_common (e.g. in blender's scripts/modules)
+# is used as is, so is one another exporter already loaded.
+def load_common():
+    try:
+        import kat_export_common
+        return kat_export_common
+    except ImportError:
+        root   = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        spec   = importlib.util.spec_from_file_location("kat_export_common", os.path.join(root, "Exporter Common", "kat_export_common.py"))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules["kat_export_common"] = module
+        spec.loader.exec_module(module)
+        return module
+
+kat_export_common = load_common()
+from kat_export_common import (TANGENT_CACHE_SIZE, normal_mapped_slots, tangent_space, group_by_material, gather_lists,
+                               to_kat_axes, advance, snapshot_object, snapshot_materials, PROFILE_OPTIONS, ExportProfile,
+                               profiled, finish_profile, cache_fetch, cache_store, ExportCancelled, BackgroundExport)
+
 def triangulate_object(obj):
     me = obj.data
     bm = bmesh.new()
@@ -30,124 +55,213 @@ def triangulate_object(obj):
     bm.to_mesh(me)
     bm.free()
 
-def write(context, filepath):   
-        
-    # duplicate selected objects, then join them into one mesh.
-    bpy.ops.object.duplicate()
-    bpy.ops.object.join()
+# pull the per-corner attributes of a triangulated mesh into flat arrays.
+# tangents are computed from them, see tangent_space.
+def extract_mesh_data(mesh, mapped = None, cache_bytes = TANGENT_CACHE_SIZE << 20):
+    polygon_count = len(mesh.polygons)
+    corner_count  = len(mesh.loops) # 3 corners per polygon once triangulated.
+    point_count   = len(mesh.vertices)
+
+    corner_points = np.empty(corner_count, dtype = np.int32)
+    mesh.loops.foreach_get('vertex_index', corner_points)
+
+    points = np.empty(point_count * 3, dtype = np.float32)
+    mesh.vertices.foreach_get('co', points)
+    point_normals = np.empty(point_count * 3, dtype = np.float32)
+    mesh.vertices.foreach_get('normal', point_normals)
+
+    uvs       = np.empty(corner_count * 2, dtype = np.float32)
+    mesh.uv_layers.active.data.foreach_get('uv', uvs)
+
+    face_normals   = np.empty(polygon_count * 3, dtype = np.float32)
+    mesh.polygons.foreach_get('normal', face_normals)
+    use_smooth     = np.empty(polygon_count, dtype = bool)
+    mesh.polygons.foreach_get('use_smooth', use_smooth)
+    material_index = np.empty(polygon_count, dtype = np.int32)
+    mesh.polygons.foreach_get('material_index', material_index)
+
+    positions     = points.reshape(-1, 3)[corner_points]
+    point_normals = point_normals.reshape(-1, 3)[corner_points]
+    face_normals  = face_normals.reshape(-1, 3)
+    uvs           = uvs.reshape(-1, 2)
     
-    f = open(filepath, 'w', encoding='utf-8')
+    # blender's loop normals without custom normals: smooth faces use the point normals.
+    normals = np.where(np.repeat(use_smooth, 3)[:, None], point_normals, np.repeat(face_normals, 3, axis = 0))
+    tangents, binormals = tangent_space(positions, normals, uvs, material_index, mapped, cache_bytes)
+
+    return {
+        'positions':      positions,
+        'point_normals':  point_normals,
+        'face_normals':   face_normals,
+        'use_smooth':     use_smooth,
+        'binormals':      binormals,
+        'tangents':       tangents,
+        'uvs':            uvs,
+        'material_index': material_index,
+    }
+
+# pull the per-corner attributes of an untriangulated mesh through its loop triangles.
+def extract_triangle_data(mesh, mapped = None, cache_bytes = TANGENT_CACHE_SIZE << 20):
+    mesh.calc_loop_triangles()
     
-    # there should be only one object in the array.
-    for selected in bpy.context.selected_objects:
+    triangle_count = len(mesh.loop_triangles)
+    corner_count   = len(mesh.loops)
+    point_count    = len(mesh.vertices)
+    polygon_count  = len(mesh.polygons)
     
-        mesh = selected.data
-        obj  = selected
-     
-        triangulate_object(obj)
-        
-        mesh.calc_tangents()
-            
-        # vertices orginised based on material
-        material_names   = [] # list of material names
-        material_counts  = [] # list of no. of vertices that make up a particular material in order of material names
-        material_offsets = [] # list of material indentations in order of material names
-        material_colours = [] # list of material colours in order of material names
-        
-        vertices   = []
-        uvs        = []
-        normals    = []
-        bitangents = []
-        tangents   = []
-        
-        #calculate vertex, normal & uv count
-        vertex_count = 0 
+    triangle_loops = np.empty(triangle_count * 3, dtype = np.int32)
+    mesh.loop_triangles.foreach_get('loops', triangle_loops)
+    triangle_points = np.empty(triangle_count * 3, dtype = np.int32)
+    mesh.loop_triangles.foreach_get('vertices', triangle_points)
+    triangle_polygons = np.empty(triangle_count, dtype = np.int32)
+    mesh.loop_triangles.foreach_get('polygon_index', triangle_polygons)
+    
+    points = np.empty(point_count * 3, dtype = np.float32)
+    mesh.vertices.foreach_get('co', points)
+    point_normals = np.empty(point_count * 3, dtype = np.float32)
+    mesh.vertices.foreach_get('normal', point_normals)
+    
+    uvs       = np.empty(corner_count * 2, dtype = np.float32)
+    mesh.uv_layers.active.data.foreach_get('uv', uvs)
+    
+    face_normals   = np.empty(triangle_count * 3, dtype = np.float32)
+    mesh.loop_triangles.foreach_get('normal', face_normals)
+    material_index = np.empty(triangle_count, dtype = np.int32)
+    mesh.loop_triangles.foreach_get('material_index', material_index)
+    use_smooth     = np.empty(polygon_count, dtype = bool)
+    mesh.polygons.foreach_get('use_smooth', use_smooth)
+    
+    positions     = points.reshape(-1, 3)[triangle_points]
+    point_normals = point_normals.reshape(-1, 3)[triangle_points]
+    face_normals  = face_normals.reshape(-1, 3)
+    use_smooth    = use_smooth[triangle_polygons]
+    uvs           = uvs.reshape(-1, 2)[triangle_loops]
+    
+    normals = np.where(np.repeat(use_smooth, 3)[:, None], point_normals, np.repeat(face_normals, 3, axis = 0))
+    tangents, binormals = tangent_space(positions, normals, uvs, material_index, mapped, cache_bytes)
+    
+    return {
+        'positions':      positions,
+        'point_normals':  point_normals,
+        'face_normals':   face_normals,
+        'use_smooth':     use_smooth,
+        'binormals':      binormals,
+        'tangents':       tangents,
+        'uvs':            uvs,
+        'material_index': material_index,
+    }
+
+# rows are formatted and written a chunk at a time, memory stays bounded for any mesh size.
+CHUNK_ROWS = 65536
+
+POWERS = 10 ** np.arange(13, dtype = np.int64)
+
+# '%f' of every float32 value in numpy: each value is right aligned with "\0" to at least
+# width characters and followed by its separator. the exact value * 10^6 is rounded half
+# to even in integers, as '%f' does. None for nan, inf and values past 1e12.
+def format_fixed(values, width, separators):
+    flat  = np.ascontiguousarray(values).ravel()
+    count = len(flat)
+    if flat.dtype != np.float32 or not np.all(np.isfinite(flat)) or (count and np.abs(flat).max() >= 1e12):
+        return None
+    
+    mantissa, exponent = np.frexp(flat)
+    scaled  = np.abs(mantissa * (1 << 24)).astype(np.int64) * 1000000
+    shift   = exponent.astype(np.int64) - 24
+    right   = np.clip(-shift, 1, 62)
+    rounded = scaled >> right
+    rest    = scaled - (rounded << right)
+    half    = np.int64(1) << (right - 1)
+    rounded += (rest > half) | ((rest == half) & ((rounded & 1) == 1))
+    if shift.max(initial = -1) >= 0:
+        rounded = np.where(shift >= 0, scaled << np.clip(shift, 0, 62), rounded)
+    
+    whole, fraction = np.divmod(rounded, 1000000)
+    fraction = fraction.astype(np.int32)
+    if whole.max(initial = 0) < 2**31:
+        whole = whole.astype(np.int32)
+    digits   = np.searchsorted(POWERS[1:], whole, side = 'right') + 1
+    negative = np.signbit(flat)
+    length   = negative + digits + 7
+    columns  = max(int(length.max(initial = 0)), width)
+    
+    # one row per character column, every write below is contiguous.
+    text = np.zeros((columns + 1, count), dtype = np.uint8)
+    for k in range(6):
+        text[columns - 1 - k] = fraction % 10 + 48
+        fraction //= 10
+    text[columns - 7] = ord('.')
+    for k in range(int(digits.max(initial = 1))):
+        text[columns - 8 - k] = np.where(k < digits, whole % 10 + 48, 0)
+        whole //= 10
+    signed = np.flatnonzero(negative)
+    text[columns - 8 - digits[signed], signed] = ord('-')
+    text[columns] = np.tile(np.frombuffer(separators.encode('ascii'), dtype = np.uint8), count // len(separators))
+    
+    # drop the padding past width, every value has the same length in most chunks.
+    start = columns - np.maximum(length, width)
+    if count == 0 or np.all(start == start[0]):
+        return np.ascontiguousarray(text[start[0] if count else 0:].T).tobytes().decode('ascii')
+    keep = np.arange(columns + 1) >= start[:, None]
+    return np.ascontiguousarray(text.T)[keep].tobytes().decode('ascii')
+
+# each value is ('%f ' or '%f\n').rjust(10, "\0").
+def write_kat_rows(f, vectors):
+    for start in range(0, len(vectors), CHUNK_ROWS):
+        chunk = to_kat_axes(vectors[start:start + CHUNK_ROWS])
+        text  = format_fixed(chunk, 9, '  \n')
+        if text is None:
+            # "%9f" pads with spaces, which become "\0", the separators are
+            # written as "\1" and turned back into spaces afterwards.
+            text = ('%9f\1%9f\1%9f\n' * len(chunk)) % tuple(chunk.ravel().tolist())
+            text = text.replace(' ', '\0').replace('\1', ' ')
+        f.write(text)
+
+def write_uv_rows(f, uvs):
+    for start in range(0, len(uvs), CHUNK_ROWS):
+        chunk = uvs[start:start + CHUNK_ROWS]
+        text  = format_fixed(chunk, 0, ' \n')
+        if text is None:
+            text = ('%f %f\n' * len(chunk)) % tuple(chunk.ravel().tolist())
+        f.write(text)
+
+def write_kmesh(f, obj, data, materials, profile = None, progress = None):
+    # vertices orginised based on material
+    with profiled(profile, "grouping"):
+        lists = group_by_material(materials, data['material_index'])
+    
+    material_names   = lists['names']   # list of material names
+    material_counts  = lists['counts']  # list of no. of vertices that make up a particular material in order of material names
+    material_offsets = lists['offsets'] # list of material indentations in order of material names
+    material_colours = lists['colours'] # list of material colours in order of material names
+    material_count   = len(material_names)
+    
+    #calculate vertex, normal & uv count
+    vertex_count = 3 * len(data['material_index'])
+    
+    with profiled(profile, "gather"):
+        vertices, normals, bitangents, tangents, uvs = gather_lists(data, lists)
+    advance(progress, 0.1)
         
-        for face in mesh.polygons:
-            vertex_count = vertex_count + 3
-            current_name = obj.material_slots[face.material_index].material.name
-            current_colour = obj.material_slots[face.material_index].material.diffuse_color
-            unique = True
-            
-            for material in material_names:
-                if (material == current_name):
-                    unique = False 
-                    break
-                
-            if(unique == True):
-                count = 0
-                num   = 0
-
-                for surface in mesh.polygons:          
-                    mat_surface = obj.material_slots[surface.material_index].material
-
-                    if (mat_surface.name == current_name):
-                        vertices.append(mesh.vertices[surface.vertices[0]].co)
-                        vertices.append(mesh.vertices[surface.vertices[1]].co)
-                        vertices.append(mesh.vertices[surface.vertices[2]].co)
-                        
-                        if (face.use_smooth == True):
-                            normals.append(mesh.vertices[surface.vertices[0]].normal)
-                            normals.append(mesh.vertices[surface.vertices[1]].normal)
-                            normals.append(mesh.vertices[surface.vertices[2]].normal)
-                        else:
-                            normals.append(surface.normal)
-                            normals.append(surface.normal)
-                            normals.append(surface.normal)
-                            
-                            
-                        bitangents.append(mesh.loops[num].bitangent)
-                        bitangents.append(mesh.loops[num + 1].bitangent)
-                        bitangents.append(mesh.loops[num + 2].bitangent)  
-                        
-                        tangents.append(mesh.loops[num].tangent)
-                        tangents.append(mesh.loops[num + 1].tangent)
-                        tangents.append(mesh.loops[num + 2].tangent)  
-                            
-                        uvs.append(mesh.uv_layers.active.data[num].uv)
-                        uvs.append(mesh.uv_layers.active.data[num + 1].uv)
-                        uvs.append(mesh.uv_layers.active.data[num + 2].uv)
-                        
-                        num   = num   + 3;
-                        count = count + 3;
-                    else:
-                        num   = num + 3
-                                                     
-                material_counts.append(count)
-                material_names.append(current_name) 
-                material_colours.append(current_colour)
-                
-        #calculate material offsets
-        cumulative = 0
-        count = 0
-        for mat in material_counts:
-            material_offsets.append(cumulative)
-            cumulative = cumulative + material_counts[count]
-            count = count + 1
-               
-        #calculate material count         
-        material_count = 0
-        for mat in material_names:
-            material_count = material_count + 1
-            
-        #calculate rotation
-        # (+) anti-clockwise (-) clockwise
-        rotation_x =  obj.rotation_euler.y # must be positive radians
-        rotation_y =  obj.rotation_euler.z # must be positive radians
-        rotation_z = -obj.rotation_euler.x # must be positive radians
+    #calculate rotation
+    # (+) anti-clockwise (-) clockwise
+    rotation_x =  obj.rotation_euler.y # must be positive radians
+    rotation_y =  obj.rotation_euler.z # must be positive radians
+    rotation_z = -obj.rotation_euler.x # must be positive radians
+    
+    if(rotation_x < 0): rotation_x = -rotation_x
+    else:               rotation_x = (2*pi) - rotation_x    
+    if(rotation_y < 0): rotation_y = -rotation_y
+    else:               rotation_y = (2*pi) - rotation_y
+    if(rotation_z < 0): rotation_z = -rotation_z
+    else:               rotation_z = (2*pi) - rotation_z
         
-        if(rotation_x < 0): rotation_x = -rotation_x
-        else:               rotation_x = (2*pi) - rotation_x    
-        if(rotation_y < 0): rotation_y = -rotation_y
-        else:               rotation_y = (2*pi) - rotation_y
-        if(rotation_z < 0): rotation_z = -rotation_z
-        else:               rotation_z = (2*pi) - rotation_z
-            
-        #writing    
+    #writing    
+    with profiled(profile, "write"):
         f.write("name: " + (obj.name).split('.')[0] + "\n")
         f.write('vertex   count: %i\n'   % (vertex_count)) 
         f.write('material count: %i\n\n' % (material_count))    
-        
+    
         count = 0  
         for mat in material_names:
             f.write('(%s offset:%i count:%i colour:%f %f %f %f)\n' % (material_names[count], material_offsets[count], material_counts[count], material_colours[count][0], material_colours[count][1], material_colours[count][2], material_colours[count][3]))
@@ -156,46 +270,191 @@ def write(context, filepath):
         f.write('\nposition: %f %f %f\n' % (obj.location.y      , obj.location.z      , -obj.location.x))
         f.write('rotation: %f %f %f\n'   % (rotation_x, rotation_y, rotation_z))
         f.write('scale:    %f %f %f\n\n' % (obj.scale.y         , obj.scale.z         ,  obj.scale.x))
-                   
+               
         f.write("vertex:\n")
-        for vertex in vertices:
-            f.write(('%f '  % ( vertex.y)).rjust(10, "\0"));
-            f.write(('%f '  % ( vertex.z)).rjust(10, "\0"));
-            f.write(('%f\n' % (-vertex.x)).rjust(10, "\0"));
+        write_kat_rows(f, vertices)
         f.write("\n")  
-        
+        advance(progress, 0.3)
+    
         f.write("uv:\n")
-        for uv in uvs:
-            f.write('%f %f\n' % (uv[0], uv[1]))
+        write_uv_rows(f, uvs)
         f.write("\n")  
-        
+        advance(progress, 0.45)
+    
         f.write("normal:\n")
-        for normal in normals:
-            f.write(('%f '  % ( normal.y)).rjust(10, "\0"));
-            f.write(('%f '  % ( normal.z)).rjust(10, "\0"));
-            f.write(('%f\n' % (-normal.x)).rjust(10,  "\0"));
+        write_kat_rows(f, normals)
         f.write("\n")  
-        
+        advance(progress, 0.65)
+    
         f.write("binormal:\n")
-        for bitangent in bitangents:
-            f.write(('%f '  % ( bitangent.y)).rjust(10, "\0"));
-            f.write(('%f '  % ( bitangent.z)).rjust(10, "\0"));
-            f.write(('%f\n' % (-bitangent.x)).rjust(10, "\0"));
+        write_kat_rows(f, bitangents)
         f.write("\n")
-        
+        advance(progress, 0.85)
+    
         f.write("tangent:\n")
-        for tangent in tangents:
-            f.write(('%f '  % ( tangent.y)).rjust(10, "\0"));
-            f.write(('%f '  % ( tangent.z)).rjust(10, "\0"));
-            f.write(('%f\n' % (-tangent.x)).rjust(10, "\0"));
+        write_kat_rows(f, tangents)
         f.write("\n")
+    
+    if profile is not None:
+        profile.count("triangles",    len(data['material_index']))
+        profile.count("vertex lists", material_count)
+        profile.count("vertices",     vertex_count)
+
+# read the selected meshes from the evaluated depsgraph without touching scene data.
+# meshes are placed in the active object's space, as bpy.ops.object.join() would.
+def gather_evaluated(context, use_mapped_tangents = False, cache_bytes = TANGENT_CACHE_SIZE << 20):
+    depsgraph = context.evaluated_depsgraph_get()
+    selected  = [obj for obj in context.selected_objects if obj.type == 'MESH']
+    active    = context.active_object if context.active_object in selected else selected[0]
+    to_active = active.matrix_world.inverted()
+    
+    parts     = []
+    materials = []
+    for obj in selected:
+        evaluated = obj.evaluated_get(depsgraph)
+        mesh      = evaluated.to_mesh()
+        if obj != active:
+            mesh.transform(to_active @ obj.matrix_world)
+        
+        slots = [slot.material for slot in obj.material_slots]
+        part  = extract_triangle_data(mesh, normal_mapped_slots(slots) if use_mapped_tangents else None, cache_bytes)
+        part['material_index'] = part['material_index'] + len(materials)
+        parts.append(part)
+        materials.extend(slots)
+        
+        evaluated.to_mesh_clear()
+    
+    data = {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+    return active, data, materials
+
+# read the export out of bpy on the main thread: one (object, data, materials) per written mesh.
+def gather_export(context, use_evaluated, profile = None, use_mapped_tangents = False, tangent_cache_size = TANGENT_CACHE_SIZE):
+    cache_bytes = tangent_cache_size << 20
+    if use_evaluated:
+        selected = [selected for selected in context.selected_objects if selected.type == 'MESH']
+        if profile is not None:
+            profile.count("objects",  len(selected))
+            profile.count("polygons", sum(len(selected.data.polygons) for selected in selected))
+            profile.count("corners",  sum(len(selected.data.loops)    for selected in selected))
+        with profiled(profile, "evaluate"):
+            obj, data, materials = gather_evaluated(context, use_mapped_tangents, cache_bytes)
+        if profile is not None:
+            profile.count("materials", len(materials))
+        return [(snapshot_object(obj), data, snapshot_materials(materials))]
+        
+    # duplicate selected objects, then join them into one mesh.
+    with profiled(profile, "duplicate/join"):
+        bpy.ops.object.duplicate()
+        bpy.ops.object.join()
+    
+    # there should be only one object in the array.
+    parts = []
+    for selected in bpy.context.selected_objects:
+    
+        mesh = selected.data
+        obj  = selected
+        if profile is not None:
+            profile.count("polygons",  len(mesh.polygons))
+            profile.count("corners",   len(mesh.loops))
+            profile.count("materials", len(obj.material_slots))
+     
+        with profiled(profile, "triangulate"):
+            triangulate_object(obj)
+        
+        mapped = normal_mapped_slots(slot.material for slot in obj.material_slots) if use_mapped_tangents else None
+        with profiled(profile, "extract"):
+            data = extract_mesh_data(mesh, mapped, cache_bytes)
+        parts.append((snapshot_object(obj), data, snapshot_materials(slot.material for slot in obj.material_slots)))
 
-    bpy.ops.object.delete()
-                    
+    with profiled(profile, "delete"):
+        bpy.ops.object.delete()
+    return parts
+
+# gathers on the calling (main) thread and returns encode(f, report, progress), which only
+# touches the copies and can run on a worker thread.
+def prepare_export(context, use_evaluated = False, use_mapped_tangents = False, tangent_cache_size = TANGENT_CACHE_SIZE,
+                   profile = None):
+    parts = gather_export(context, use_evaluated, profile, use_mapped_tangents, tangent_cache_size)
+    
+    def encode(f, report = None, progress = None):
+        for index, (obj, data, materials) in enumerate(parts):
+            step = None
+            if progress is not None:
+                step = lambda fraction, index = index: progress((index + fraction) / len(parts))
+            write_kmesh(f, obj, data, materials, profile, step)
+    return encode
+
+def write(context, filepath, use_evaluated = False, use_mapped_tangents = False, tangent_cache_size = TANGENT_CACHE_SIZE,
+          use_profile = False, profile_log = "", report = None):   
+    
+    # there is nothing to join or evaluate, and no file is written.
+    if not any(obj.type == 'MESH' for obj in context.selected_objects):
+        if report is not None:
+            report({'ERROR'}, "No mesh objects selected")
+        return {'CANCELLED'}
+    
+    profile = ExportProfile("kmesh-text") if use_profile or profile_log else None
+    encode  = prepare_export(context, use_evaluated, use_mapped_tangents, tangent_cache_size, profile)
+    
+    f = open(filepath, 'w', encoding='utf-8')
+    encode(f, report)
     f.close()
+    
+    finish_profile(profile, filepath, profile_log, report)
     return {'FINISHED'}
 
 
+# hash everything the export reads: geometry, uvs, materials, transforms and options.
+def hash_mesh_inputs(context, keywords):
+    digest = hashlib.blake2b(digest_size = 20)
+    for path in (__file__, kat_export_common.__file__):
+        with open(path, 'rb') as source:
+            digest.update(source.read())
+    digest.update(repr(sorted(item for item in keywords.items() if item[0] not in PROFILE_OPTIONS)).encode('utf-8'))
+    
+    use_evaluated = keywords.get('use_evaluated', False)
+    depsgraph     = context.evaluated_depsgraph_get() if use_evaluated else None
+    for obj in context.selected_objects:
+        if obj.type != 'MESH':
+            continue
+        evaluated = obj.evaluated_get(depsgraph) if use_evaluated else obj
+        mesh      = evaluated.to_mesh() if use_evaluated else obj.data
+        
+        digest.update(obj.name.encode('utf-8'))
+        digest.update(b'active' if obj == context.active_object else b'selected')
+        transform = [value for row in obj.matrix_world for value in row]
+        transform = transform + list(obj.location) + list(obj.rotation_euler) + list(obj.scale)
+        digest.update(np.array(transform, dtype = np.float64).tobytes())
+        
+        for collection, attribute, dtype, width in (
+                (mesh.vertices, 'co',             np.float32, 3),
+                (mesh.loops,    'vertex_index',   np.int32,   1),
+                (mesh.polygons, 'loop_start',     np.int32,   1),
+                (mesh.polygons, 'loop_total',     np.int32,   1),
+                (mesh.polygons, 'material_index', np.int32,   1),
+                (mesh.polygons, 'use_smooth',     bool,       1)):
+            values = np.empty(len(collection) * width, dtype = dtype)
+            collection.foreach_get(attribute, values)
+            digest.update(values.tobytes())
+        if mesh.uv_layers.active is not None:
+            uvs = np.empty(len(mesh.loops) * 2, dtype = np.float32)
+            mesh.uv_layers.active.data.foreach_get('uv', uvs)
+            digest.update(uvs.tobytes())
+        
+        for slot in obj.material_slots:
+            if slot.material is not None:
+                digest.update(slot.material.name.encode('utf-8'))
+                digest.update(np.array(slot.material.diffuse_color, dtype = np.float64).tobytes())
+        if keywords.get('use_mapped_tangents', False):
+            # which slots get tangents depends on the materials' node trees.
+            digest.update(normal_mapped_slots(slot.material for slot in obj.material_slots).tobytes())
+        
+        if use_evaluated:
+            evaluated.to_mesh_clear()
+    
+    return digest.hexdigest()
+
+
 class ExportMeshData(Operator, ExportHelper):
     """Export mesh data in Kat Mesh format [text] (.kmesh)""" 
     bl_idname = "export_kmesh.mesh_data_text"  # important since its how bpy.ops.import_test.some_data is constructed
@@ -204,9 +463,119 @@ class ExportMeshData(Operator, ExportHelper):
     # file extension
     filename_ext = ".kmesh"
     filter_glob: StringProperty(default="*.kmesh", options = {'HIDDEN'}, maxlen=255)
+    
+    use_evaluated: BoolProperty(
+        name="Evaluated Mesh",
+        description="Read the selected meshes from the evaluated depsgraph instead of duplicating and joining them, the scene is left untouched",
+        default=False,
+        )
+
+    use_mapped_tangents: BoolProperty(
+        name="Normal Mapped Tangents Only",
+        description="Compute tangents and binormals only for materials with a Normal Map node, the others are written as zeros",
+        default=False,
+        )
+
+    tangent_cache_size: IntProperty(
+        name="Tangent Cache Size (MB)",
+        description="Computed tangents kept for re-exporting unchanged meshes, least recently used first out, 0 keeps none",
+        default=TANGENT_CACHE_SIZE,
+        min=0,
+        )
+
+    use_profile: BoolProperty(
+        name="Profile",
+        description="Report the time of each export phase, element counts, bytes written and peak memory",
+        default=False,
+        )
+    
+    profile_log: StringProperty(
+        name="Profile Log",
+        description="Append the profile to this file, one row per phase and counter for .csv, one json object per line otherwise",
+        default="",
+        subtype='FILE_PATH',
+        )
+
+    use_background: BoolProperty(
+        name="Background",
+        description="Copy the mesh data, then encode and write the file on a worker thread so Blender stays responsive, Esc cancels",
+        default=False,
+        )
+
+    use_cache: BoolProperty(
+        name="Cache",
+        description="Reuse the previous export when the exported inputs have not changed",
+        default=False,
+        )
+    
+    cache_size: IntProperty(
+        name="Cache Size (MB)",
+        description="Size of the export cache, least recently used exports are evicted first",
+        default=1024,
+        min=1,
+        )
 
     def execute(self, context):
-        return write(context, self.filepath)
+        if not any(obj.type == 'MESH' for obj in context.selected_objects):
+            self.report({'ERROR'}, "No mesh objects selected")
+            return {'CANCELLED'}
+        keywords = self.as_keywords(ignore=("filepath", "filter_glob", "check_existing", "use_cache", "cache_size",
+                                            "use_background"))
+        key = None
+        if self.use_cache:
+            key = hash_mesh_inputs(context, keywords)
+            if cache_fetch(key, self.filepath, self.filename_ext):
+                self.report({'INFO'}, "Inputs unchanged, reused the cached export")
+                return {'FINISHED'}
+        if self.use_background:
+            return self.start_background(context, keywords, key)
+        
+        result = write(context, self.filepath, report=self.report, **keywords)
+        if key is not None:
+            cache_store(key, self.filepath, self.filename_ext, self.cache_size * 1024 * 1024)
+        return result
+    
+    # the mesh is copied out of bpy here, the worker encodes and writes while the ui keeps running.
+    def start_background(self, context, keywords, key):
+        self.key         = key
+        self.profile_log = keywords.pop("profile_log")
+        self.profile     = ExportProfile('kmesh-text') if keywords.pop("use_profile") or self.profile_log else None
+        self.job         = BackgroundExport(self.filepath, prepare_export(context, profile=self.profile, **keywords), 'w')
+        
+        window_manager = context.window_manager
+        self.timer = window_manager.event_timer_add(0.1, window=context.window)
+        window_manager.progress_begin(0, 100)
+        window_manager.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+    
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            self.job.cancelled.set()
+            return {'RUNNING_MODAL'}
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+        
+        window_manager = context.window_manager
+        window_manager.progress_update(int(self.job.progress * 100))
+        if not self.job.future.done():
+            return {'PASS_THROUGH'}
+        
+        window_manager.event_timer_remove(self.timer)
+        window_manager.progress_end()
+        for kind, message in self.job.messages:
+            self.report(kind, message)
+        error = self.job.future.exception()
+        if isinstance(error, ExportCancelled):
+            self.report({'WARNING'}, "Export cancelled, %s was left unchanged" % self.filepath)
+            return {'CANCELLED'}
+        if error is not None:
+            self.report({'ERROR'}, "Export failed: %s" % error)
+            return {'CANCELLED'}
+        
+        finish_profile(self.profile, self.filepath, self.profile_log, self.report)
+        if self.key is not None:
+            cache_store(self.key, self.filepath, self.filename_ext, self.cache_size * 1024 * 1024)
+        return {'FINISHED'}
 
 
 # export menu
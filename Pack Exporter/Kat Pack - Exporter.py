@@ -0,0 +1,230 @@
+# ========================================================================
+# Creator: Kat Mwenesongole
+# Notice: (C) Copyright 2025 by Kat Mwenesongole. All Rights Reserved.
+# ========================================================================
+
+bl_info = {
+    "name": "Kat Pack (.kpack)",
+    "description": "Export the selected objects' .kmesh and .kanim data into one Kat Pack archive (.kpack)",
+    "author": "Kat Mwenesongole",
+    "version": (1, 0),
+    "blender": (2, 80, 0),
+    "location": "File > Export",
+    "category": "Import-Export",
+}
+
+import bpy
+import os
+import sys
+import struct
+import importlib.util
+
+from bpy_extras.io_utils import ExportHelper
+from bpy.props import StringProperty, BoolProperty
+from bpy.types import Operator
+from math      import pi
+
+KPACK_MAGIC     = b"KPAK"
+KPACK_VERSION   = 1
+KPACK_ALIGNMENT = 16
+
+# entry types.
+KPACK_KMESH = 0
+KPACK_KANIM = 1
+
+HEADER_FORMAT = '<4s3IQ8x'      # 32 bytes.
+ENTRY_FORMAT  = '<96s2I2Q9f4x'  # 160 bytes.
+NAME_SIZE     = 96
+
+# the payloads are written by the binary exporters, an enabled exporter add-on is
+# used as is, otherwise the script is loaded from its folder next to this one.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXPORTERS = {
+    "kmesh": ("Kat Mesh [binary] (.kmesh)",      "Mesh Data Exporter/Kat Mesh - Exporter (binary).py"),
+    "kanim": ("Kat Animation [binary] (.kanim)", "Animation Data Exporter/Kat Animation - Exporter (binary).py"),
+}
+
+def load_exporter(kind):
+    title, script = EXPORTERS[kind]
+    for module in list(sys.modules.values()):
+        info = getattr(module, "bl_info", None)
+        if isinstance(info, dict) and info.get("name") == title:
+            return module
+
+    path   = os.path.join(ROOT, script)
+    spec   = importlib.util.spec_from_file_location("kat_pack_" + kind, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def align(offset):
+    return (offset + KPACK_ALIGNMENT - 1) // KPACK_ALIGNMENT * KPACK_ALIGNMENT
+
+# the entry transform, same axes and positive radians as the .kmesh mesh transform.
+def pack_transform(obj):
+    rotation = []
+    for value in (obj.rotation_euler.y, obj.rotation_euler.z, obj.rotation_euler.x):
+        rotation.append(-value if value < 0 else (2*pi) - value)
+    return (obj.location.y, obj.location.z, -obj.location.x,
+            rotation[0],    rotation[1],    rotation[2],
+            obj.scale.y,    obj.scale.z,    obj.scale.x)
+
+# one entry per mesh and per animated object, named "object.kmesh" and "object.kanim".
+def gather_entries(context, use_animation):
+    entries = []
+    for obj in context.selected_objects:
+        if obj.type == 'MESH':
+            entries.append((obj.name + ".kmesh", KPACK_KMESH, obj))
+        if use_animation and obj.animation_data is not None and obj.animation_data.action is not None:
+            entries.append((obj.name + ".kanim", KPACK_KANIM, obj))
+
+    # the table of contents is sorted by the encoded name, as the engine compares them.
+    entries = [(name.encode('utf-8'), kind, obj) for name, kind, obj in entries]
+    for name, kind, obj in entries:
+        if len(name) > NAME_SIZE:
+            raise ValueError("%s: entry names are limited to %i bytes" % (name.decode('utf-8'), NAME_SIZE))
+    entries.sort(key = lambda entry: entry[0])
+    return entries
+
+def write_mesh_entry(f, kmesh, obj, depsgraph, use_indexed, use_compact, use_vertex_cache, use_bounds, use_meshlets,
+                     use_streaming, use_interleaved, vertex_layout):
+    evaluated = obj.evaluated_get(depsgraph)
+    mesh      = evaluated.to_mesh()
+
+    # streamed entries only read the mesh sources, write_kmesh expands them chunk by chunk.
+    data      = kmesh.read_triangle_sources(mesh) if use_streaming else kmesh.extract_triangle_data(mesh)
+    materials = [slot.material for slot in obj.material_slots]
+    kmesh.write_kmesh(f, obj, data, materials, use_indexed, use_compact, use_vertex_cache = use_vertex_cache,
+                      use_bounds = use_bounds, use_meshlets = use_meshlets, use_streaming = use_streaming,
+                      use_interleaved = use_interleaved, vertex_layout = vertex_layout)
+
+    evaluated.to_mesh_clear()
+
+# payloads are written in table order, each at a 16 byte aligned offset,
+# then the header and the table of contents are filled in.
+def write_pack(context, filepath, use_animation = True, use_indexed = False, use_compact = False,
+               use_vertex_cache = False, use_bounds = False, use_meshlets = False, use_streaming = False,
+               use_interleaved = False, vertex_layout = "position normal binormal tangent uv", use_compact_animation = False,
+               report = None):
+    entries = gather_entries(context, use_animation)
+    kmesh   = load_exporter("kmesh") if any(kind == KPACK_KMESH for _, kind, _ in entries) else None
+    kanim   = load_exporter("kanim") if any(kind == KPACK_KANIM for _, kind, _ in entries) else None
+
+    depsgraph   = context.evaluated_depsgraph_get()
+    header_size = struct.calcsize(HEADER_FORMAT)
+    toc_size    = struct.calcsize(ENTRY_FORMAT) * len(entries)
+
+    f = open(filepath, 'wb')
+    f.write(bytes(align(header_size + toc_size)))
+
+    table = bytearray(toc_size)
+    for index, (name, kind, obj) in enumerate(entries):
+        offset = f.tell()
+        if kind == KPACK_KMESH:
+            write_mesh_entry(f, kmesh, obj, depsgraph, use_indexed, use_compact, use_vertex_cache, use_bounds, use_meshlets,
+                             use_streaming, use_interleaved, vertex_layout)
+        else:
+            kanim.write_kanim(f, obj, context.scene, use_compact = use_compact_animation)
+        size = f.tell() - offset
+        f.write(bytes(align(f.tell()) - f.tell()))
+
+        struct.pack_into(ENTRY_FORMAT, table, index * struct.calcsize(ENTRY_FORMAT),
+                         name, kind, 0, offset, size, *pack_transform(obj))
+
+    total = f.tell()
+    f.seek(0)
+    f.write(struct.pack(HEADER_FORMAT, KPACK_MAGIC, KPACK_VERSION, len(entries), header_size, total))
+    f.write(table)
+    f.close()
+
+    if report is not None:
+        report({'INFO'}, "Packed %i entries, %i bytes" % (len(entries), total))
+    return {'FINISHED'}
+
+
+class ExportPackData(Operator, ExportHelper):
+    """Export the selected objects' .kmesh and .kanim data into one Kat Pack archive (.kpack)"""
+    bl_idname = "export_kpack.pack_data"  # important since its how bpy.ops.import_test.some_data is constructed
+    bl_label = "Save .kpack"
+
+    filename_ext = ".kpack"
+    filter_glob: StringProperty(default="*.kpack", options = {'HIDDEN'}, maxlen=255)
+
+    use_animation: BoolProperty(
+        name="Animation",
+        description="Add a .kanim entry for every selected object with an action",
+        default=True,
+        )
+
+    use_indexed: BoolProperty(
+        name="Indexed",
+        description="Weld identical vertices in each vertex list and write an index buffer",
+        default=False,
+        )
+
+    use_compact: BoolProperty(
+        name="Compact Vertices",
+        description="Octahedral 16-bit normals and tangents, a bitangent sign bit instead of binormals and half-float uvs",
+        default=False,
+        )
+
+    use_vertex_cache: BoolProperty(
+        name="Optimize Vertex Cache",
+        description="Reorder the triangles of each vertex list for the GPU's post-transform vertex cache, implies Indexed",
+        default=False,
+        )
+
+    use_bounds: BoolProperty(
+        name="Bounds",
+        description="Write a bounding box and sphere for each mesh and for each of its vertex lists",
+        default=False,
+        )
+
+    use_meshlets: BoolProperty(
+        name="Meshlets",
+        description="Split each vertex list into spatial chunks of up to 128 triangles with their own bounds, implies Bounds",
+        default=False,
+        )
+
+    use_streaming: BoolProperty(
+        name="Streamed Write",
+        description="Gather, encode and write each mesh's vertices in chunks of triangles to keep memory use flat on large meshes",
+        default=False,
+        )
+
+    use_interleaved: BoolProperty(
+        name="Interleaved",
+        description="Write each mesh's vertices as one interleaved buffer in the Vertex Layout, entries keep their 16 byte alignment",
+        default=False,
+        )
+
+    vertex_layout: StringProperty(
+        name="Vertex Layout",
+        description="Attributes of an interleaved vertex in order, any of position normal binormal tangent uv",
+        default="position normal binormal tangent uv",
+        )
+
+    use_compact_animation: BoolProperty(
+        name="Compact Animation",
+        description="Quantized rotations, positions and scales instead of 10 floats per keyframe",
+        default=False,
+        )
+
+    def execute(self, context):
+        keywords = self.as_keywords(ignore=("filepath", "filter_glob", "check_existing"))
+        return write_pack(context, self.filepath, report=self.report, **keywords)
+
+# export menu
+def menu_func_export(self, context):
+    self.layout.operator(ExportPackData.bl_idname, text = "Kat Pack (.kpack)")
+
+def register():
+    bpy.utils.register_class(ExportPackData)
+    bpy.types.TOPBAR_MT_file_export.append(menu_func_export)
+
+def unregister():
+    bpy.utils.unregister_class(ExportPackData)
+    bpy.types.TOPBAR_MT_file_export.remove(menu_func_export)
+
+if __name__ == "__main__":
+    register()